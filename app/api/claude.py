@@ -1,5 +1,8 @@
 from typing import Optional, Dict, Any
+import json
 from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi.responses import StreamingResponse
+from loguru import logger
 
 from app.models.search import ClaudeQuery, ClaudeResponse
 from app.services.claude_service import claude_service
@@ -34,3 +37,38 @@ async def ask_claude(
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error querying Claude AI: {str(e)}")
+
+
+@router.post("/query/stream")
+async def ask_claude_stream(
+    query: ClaudeQuery = Body(..., description="Query for Claude AI")
+):
+    """
+    Send a question to Claude AI and stream the answer as server-sent events.
+    
+    Each event is a JSON object: "delta" events carry answer text, a final
+    "sources" event carries the RAG sources, and an "error" event is sent
+    if the answer could not be produced.
+    
+    Args:
+        query: Query for Claude
+    
+    Returns:
+        Streaming response of server-sent events
+    """
+    async def event_stream():
+        try:
+            async for event in claude_service.stream_answer(
+                query=query.query,
+                use_rag=query.use_rag,
+                search_type=query.search_type,
+                pmqa_reference=query.pmqa_reference,
+                max_tokens=query.max_tokens or 1000
+            ):
+                yield f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming Claude AI answer: {str(e)}")
+            error = {"type": "error", "detail": f"Error querying Claude AI: {str(e)}"}
+            yield f"data: {json.dumps(error, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
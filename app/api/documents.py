@@ -1,4 +1,5 @@
 from typing import List, Optional, Dict, Any
+import asyncio
 import os
 import uuid
 from datetime import datetime
@@ -42,11 +43,12 @@ async def upload_document(
         # Generate a unique document ID
         document_id = f"doc_{uuid.uuid4().hex[:12]}"
         
-        # Save the file to raw directory
-        file_path = file_storage.save_raw_document(file.file, file.filename)
-        
-        # Extract metadata from file
-        metadata = extract_metadata_from_file(file_path)
+        # Save the file to raw directory and extract its metadata off the event loop
+        loop = asyncio.get_running_loop()
+        file_path = await loop.run_in_executor(
+            None, file_storage.save_raw_document, file.file, file.filename
+        )
+        metadata = await loop.run_in_executor(None, extract_metadata_from_file, file_path)
         
         # Add user-provided metadata
         if title:
@@ -175,6 +177,29 @@ async def list_documents(
         raise HTTPException(status_code=500, detail=f"Error listing documents: {str(e)}")
 
 
+@router.get("/status", response_model=List[DocumentProcessingStatus])
+async def get_documents_processing_status(
+    ids: str = Query(..., description="Comma-separated document IDs")
+):
+    """
+    Get the processing status of several documents in one request.
+    
+    Declared before the /{document_id} routes so "status" isn't taken as an ID.
+    
+    Args:
+        ids: Comma-separated document IDs
+    
+    Returns:
+        Processing status per document, in request order; documents missing
+        from the processing queue have status "not_found"
+    """
+    try:
+        document_ids = [document_id.strip() for document_id in ids.split(",") if document_id.strip()]
+        return [document_processor.get_processing_status(document_id) for document_id in document_ids]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting document status: {str(e)}")
+
+
 @router.get("/{document_id}", response_model=Document)
 async def get_document(
     document_id: str = Path(..., description="Document ID")
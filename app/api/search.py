@@ -2,7 +2,7 @@ from typing import Optional, Dict, Any, List
 from fastapi import APIRouter, Depends, HTTPException, Body
 
 from app.models.search import (
-    SearchQuery, VectorSearchQuery, GraphSearchQuery, 
+    SearchQuery, VectorSearchQuery, VectorBatchSearchQuery, GraphSearchQuery, 
     HybridSearchQuery, SearchResults
 )
 from app.services.graph_rag import graph_rag
@@ -64,6 +64,32 @@ async def vector_search(
         raise HTTPException(status_code=500, detail=f"Error performing vector search: {str(e)}")
 
 
+@router.post("/vector/batch", response_model=List[SearchResults])
+async def vector_search_batch(
+    query: VectorBatchSearchQuery = Body(..., description="Batch vector search query")
+):
+    """
+    Search several queries using vector search, embedding them in one batch.
+    
+    Args:
+        query: Batch vector search query
+    
+    Returns:
+        Search results, one entry per query in input order
+    """
+    try:
+        search_results = await graph_rag.search_many(
+            queries=query.queries,
+            search_type="vector",
+            filters=query.filters,
+            top_k=query.top_k
+        )
+        
+        return search_results
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error performing batch vector search: {str(e)}")
+
+
 @router.post("/graph", response_model=SearchResults)
 async def graph_search(
     query: GraphSearchQuery = Body(..., description="Graph search query")
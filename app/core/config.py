@@ -21,6 +21,9 @@ class Settings(BaseSettings):
     NEO4J_URI: str = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     NEO4J_USER: str = os.getenv("NEO4J_USER", "neo4j")
     NEO4J_PASSWORD: str = os.getenv("NEO4J_PASSWORD", "password")
+    NEO4J_MAX_CONNECTION_POOL_SIZE: int = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "50"))
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT: float = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))
+    NEO4J_MAX_CONNECTION_LIFETIME: float = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
     
     # Chroma DB Config
     CHROMA_PERSIST_DIRECTORY: str = os.getenv("CHROMA_PERSIST_DIRECTORY", "../data/chroma_db")
@@ -28,6 +31,10 @@ class Settings(BaseSettings):
     # Ollama Config
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+    # Store cached embeddings int8-quantized (~4x less space for <=1% recall)
+    EMBEDDING_QUANT: bool = os.getenv("EMBEDDING_QUANT", "false").lower() == "true"
+    # SQLite file for the persistent embedding cache (empty disables it)
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "")
     ENTITY_MODEL: str = os.getenv("ENTITY_MODEL", "llama3")
     
     # Claude API Config
@@ -41,6 +48,9 @@ class Settings(BaseSettings):
     # Search Configuration
     TOP_K_VECTOR: int = int(os.getenv("TOP_K_VECTOR", "5"))
     TOP_K_GRAPH: int = int(os.getenv("TOP_K_GRAPH", "5"))
+    REPORT_TIMING: bool = os.getenv("REPORT_TIMING", "true").lower() == "true"
+    SEMANTIC_CACHE_SIZE: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "0"))
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
     
     # PMQA Structure
     PMQA_STRUCTURE_FILE: str = os.getenv("PMQA_STRUCTURE_FILE", "../data/pmqa_structure.json")
@@ -9,6 +9,9 @@ from loguru import logger
 
 from app.core.config import settings
 
+# Block size for copying uploads to disk
+_COPY_CHUNK_SIZE = 64 * 1024
+
 
 class FileSystemStorage:
     """
@@ -66,13 +69,8 @@ class FileSystemStorage:
         # Save the file
         try:
             with open(file_path, "wb") as f:
-                # Read and write in chunks to handle large files
-                chunk_size = 4096
-                while True:
-                    chunk = file.read(chunk_size)
-                    if not chunk:
-                        break
-                    f.write(chunk)
+                # Copy in blocks so large files are never held in memory whole
+                shutil.copyfileobj(file, f, _COPY_CHUNK_SIZE)
                     
             logger.info(f"Document saved to raw directory: {file_path}")
             return file_path
@@ -1,10 +1,11 @@
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Union
 
 from loguru import logger
 from neo4j import GraphDatabase, Driver, Session, Result
 from neo4j.exceptions import Neo4jError
 
 from app.core.config import settings
+from app.db.schema import FULLTEXT_INDEXES
 
 
 class Neo4jDatabase:
@@ -27,6 +28,10 @@ class Neo4jDatabase:
             self._driver = GraphDatabase.driver(
                 settings.NEO4J_URI,
                 auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+                max_connection_pool_size=settings.NEO4J_MAX_CONNECTION_POOL_SIZE,
+                connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+                max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME,
+                keep_alive=True,
             )
             # Verify connection
             with self._driver.session() as session:
@@ -115,6 +120,42 @@ class Neo4jDatabase:
                 logger.error(f"Neo4j read query error: {str(e)}")
                 raise
 
+    def execute_read_query_streaming(
+        self, 
+        query: str, 
+        params: Optional[Dict] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Execute a read-only Cypher query and yield results one record at a time.
+        
+        Records are converted to dictionaries lazily; iteration stops after
+        `limit` records and the session is closed when the generator finishes.
+        
+        Args:
+            query: Cypher query string
+            params: Query parameters
+            limit: Optional maximum number of records to yield
+            
+        Returns:
+            Iterator of dictionaries containing the query results
+        """
+        if params is None:
+            params = {}
+            
+        with self.get_session() as session:
+            try:
+                result = session.run(query, params)
+                for count, record in enumerate(result, 1):
+                    yield record.data()
+                    if limit is not None and count >= limit:
+                        break
+                # Discard any records left on the server
+                result.consume()
+            except Neo4jError as e:
+                logger.error(f"Neo4j read query error: {str(e)}")
+                raise
+
     def execute_write_query(
         self, 
         query: str, 
@@ -141,6 +182,17 @@ class Neo4jDatabase:
                 logger.error(f"Neo4j write query error: {str(e)}")
                 raise
 
+    def create_fulltext_indexes(self) -> None:
+        """
+        Create the full-text indexes used by graph search.
+        """
+        try:
+            for statement, _ in FULLTEXT_INDEXES:
+                self.execute_write_query(statement)
+            logger.info("Full-text indexes are in place")
+        except Exception as e:
+            logger.error(f"Error creating full-text indexes: {str(e)}")
+
     def create_pmqa_structure(self, pmqa_data: Dict) -> None:
         """
         Create PMQA structure in Neo4j.
@@ -0,0 +1,15 @@
+# Full-text indexes used by graph search, as (statement, description). The Thai
+# analyzer splits words inside unspaced Thai text; the standard analyzer would
+# index each run of Thai characters as a single token
+FULLTEXT_INDEXES = [
+    (
+        "CREATE FULLTEXT INDEX chunk_content_fts IF NOT EXISTS FOR (c:Chunk) ON EACH [c.content] "
+        "OPTIONS {indexConfig: {`fulltext.analyzer`: 'thai'}}",
+        "full-text index for Chunk.content"
+    ),
+    (
+        "CREATE FULLTEXT INDEX doc_title_fts IF NOT EXISTS FOR (d:Document) ON EACH [d.title] "
+        "OPTIONS {indexConfig: {`fulltext.analyzer`: 'thai'}}",
+        "full-text index for Document.title"
+    )
+]
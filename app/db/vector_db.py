@@ -104,7 +104,8 @@ class ChromaDatabase:
         self,
         chunks: List[str],
         metadatas: List[Dict[str, Any]],
-        document_id: str
+        document_id: str,
+        embeddings: Optional[List[List[float]]] = None
     ) -> List[str]:
         """
         Add document chunks to the chunks collection.
@@ -113,6 +114,7 @@ class ChromaDatabase:
             chunks: List of text chunks
             metadatas: List of metadata dictionaries for each chunk
             document_id: Parent document ID
+            embeddings: Optional precomputed chunk embeddings
             
         Returns:
             List of generated chunk IDs
@@ -127,7 +129,8 @@ class ChromaDatabase:
             self.chunks_collection.add(
                 ids=chunk_ids,
                 documents=chunks,
-                metadatas=metadatas
+                metadatas=metadatas,
+                embeddings=embeddings
             )
             logger.info(f"Added {len(chunks)} chunks for document {document_id}")
             return chunk_ids
@@ -166,7 +169,7 @@ class ChromaDatabase:
 
     def search_chunks(
         self,
-        query_text: str,
+        query_embedding: List[float],
         n_results: int = 10,
         where_filter: Optional[Dict] = None
     ) -> Dict:
@@ -174,7 +177,7 @@ class ChromaDatabase:
         Search for similar chunks using vector similarity.
         
         Args:
-            query_text: Query text
+            query_embedding: Precomputed query embedding
             n_results: Number of results to return
             where_filter: Filter for chunk metadata
             
@@ -183,11 +186,11 @@ class ChromaDatabase:
         """
         try:
             results = self.chunks_collection.query(
-                query_texts=[query_text],
+                query_embeddings=[list(query_embedding)],
                 n_results=n_results,
                 where=where_filter
             )
-            logger.info(f"Chunk search for '{query_text[:50]}...' returned {len(results['ids'][0])} results")
+            logger.info(f"Chunk search returned {len(results['ids'][0])} results")
             return results
         except Exception as e:
             logger.error(f"Error searching chunks: {str(e)}")
@@ -1,3 +1,5 @@
+import asyncio
+
 import uvicorn
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,6 +10,7 @@ from app.core.config import settings
 from app.core.logging import setup_logging
 from app.db.graph_db import graph_db, close_db_connection as close_graph_db
 from app.db.vector_db import vector_db, close_db_connection as close_vector_db
+from app.services._ollama import close_ollama_clients
 
 # Setup logging
 setup_logging()
@@ -37,6 +40,10 @@ from app.api.documents import router as documents_router
 from app.api.search import router as search_router
 from app.api.claude import router as claude_router
 from app.api.pmqa import router as pmqa_router
+from app.services.graph_rag import graph_rag
+
+# The event loop only holds a weak reference to tasks, so the warmup task is kept here
+_warmup_task = None
 
 app.include_router(documents_router, prefix=f"{settings.API_V1_STR}/documents", tags=["documents"])
 app.include_router(search_router, prefix=f"{settings.API_V1_STR}/search", tags=["search"])
@@ -50,36 +57,54 @@ async def root():
     """
     return {"message": "Welcome to GraphRAG PMQA API", "status": "online"}
 
-@app.get(f"{settings.API_V1_STR}/health")
-async def health_check():
+def _check_neo4j() -> str:
     """
-    Health check endpoint to verify all services are running.
-    """
-    health_status = {
-        "api": "healthy",
-        "neo4j": "unknown",
-        "chroma": "unknown",
-    }
+    Check the Neo4j connection.
     
-    # Check Neo4j connection
+    Returns:
+        "healthy", or "unhealthy" with the reason
+    """
     try:
         with graph_db.get_session() as session:
             result = session.run("RETURN 1 as test")
             test_value = result.single()["test"]
             if test_value == 1:
-                health_status["neo4j"] = "healthy"
-            else:
-                health_status["neo4j"] = "unhealthy"
+                return "healthy"
+            return "unhealthy"
     except Exception as e:
-        health_status["neo4j"] = f"unhealthy: {str(e)}"
+        return f"unhealthy: {str(e)}"
+
+def _check_chroma() -> str:
+    """
+    Check the ChromaDB connection.
     
-    # Check ChromaDB connection
+    Returns:
+        "healthy", or "unhealthy" with the reason
+    """
     try:
         # Simple check to see if we can list collections
-        collections = vector_db.client.list_collections()
-        health_status["chroma"] = "healthy"
+        vector_db.client.list_collections()
+        return "healthy"
     except Exception as e:
-        health_status["chroma"] = f"unhealthy: {str(e)}"
+        return f"unhealthy: {str(e)}"
+
+@app.get(f"{settings.API_V1_STR}/health")
+async def health_check():
+    """
+    Health check endpoint to verify all services are running.
+    """
+    # Probe the services concurrently so the check takes as long as the slowest one
+    loop = asyncio.get_running_loop()
+    neo4j_status, chroma_status = await asyncio.gather(
+        loop.run_in_executor(None, _check_neo4j),
+        loop.run_in_executor(None, _check_chroma)
+    )
+    
+    health_status = {
+        "api": "healthy",
+        "neo4j": neo4j_status,
+        "chroma": chroma_status,
+    }
     
     # Determine overall status
     if all(value == "healthy" for value in health_status.values()):
@@ -99,17 +124,26 @@ async def startup_event():
     """
     Actions to run on application startup.
     """
-    # This is where we would initialize resources that need to be available at startup
-    pass
+    global _warmup_task
+    
+    # Full-text indexes back the graph search query
+    graph_db.create_fulltext_indexes()
+    
+    # Load the embedding model in the background so the first search doesn't pay for it
+    _warmup_task = asyncio.create_task(graph_rag.warmup())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """
     Actions to run on application shutdown.
     """
+    if _warmup_task is not None:
+        _warmup_task.cancel()
+    
     # Close database connections
     close_graph_db()
     close_vector_db()
+    await close_ollama_clients()
 
 # Custom OpenAPI schema
 def custom_openapi():
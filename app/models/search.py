@@ -40,6 +40,29 @@ class VectorSearchQuery(SearchQuery):
         }
 
 
+class VectorBatchSearchQuery(BaseModel):
+    """
+    Model for running several vector search queries in one request.
+    """
+    queries: List[str] = Field(..., description="Search query texts")
+    filters: Optional[Dict[str, Any]] = Field(None, description="Optional filters applied to every query")
+    top_k: int = Field(5, description="Number of top results to return per query")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "queries": [
+                    "การวางแผนยุทธศาสตร์",
+                    "การพัฒนาบุคลากร"
+                ],
+                "filters": {
+                    "category": "หมวด_1"
+                },
+                "top_k": 5
+            }
+        }
+
+
 class GraphSearchQuery(SearchQuery):
     """
     Model for graph search queries.
@@ -138,7 +161,7 @@ class SearchResults(BaseModel):
     total_results: int = Field(..., description="Total number of results")
     results: List[SearchResult] = Field(..., description="Search results")
     search_type: str = Field(..., description="Type of search performed (vector, graph, hybrid)")
-    execution_time_ms: float = Field(..., description="Search execution time in milliseconds")
+    execution_time_ms: Optional[float] = Field(None, description="Search execution time in milliseconds (when timing is enabled)")
     
     class Config:
         schema_extra = {
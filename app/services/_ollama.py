@@ -0,0 +1,58 @@
+from functools import lru_cache
+import httpx
+import requests
+from loguru import logger
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=1)
+def ollama_session() -> requests.Session:
+    """
+    Get the shared HTTP session used for all Ollama API calls.
+    
+    Sharing one session keeps the connection opened by the availability probe
+    alive for the first embedding or generation request.
+    
+    Returns:
+        Pooled requests session
+    """
+    return requests.Session()
+
+
+@lru_cache(maxsize=1)
+def ollama_async_client() -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client used for non-blocking Ollama API calls.
+    
+    Returns:
+        Pooled httpx async client with keep-alive connections
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=32)
+    )
+
+
+async def close_ollama_clients() -> None:
+    """
+    Close the shared async Ollama client if it was created.
+    """
+    if ollama_async_client.cache_info().currsize:
+        await ollama_async_client().aclose()
+        ollama_async_client.cache_clear()
+
+
+def is_ollama_available() -> bool:
+    """
+    Check whether the Ollama server is reachable.
+    
+    Returns:
+        True if the server responded, False otherwise
+    """
+    try:
+        ollama_session().head(f"{settings.OLLAMA_BASE_URL}/api/tags", timeout=(1, 1))
+        return True
+    except Exception as e:
+        logger.warning(f"Ollama service not available: {str(e)}")
+        return False
@@ -1,5 +1,6 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 import requests
+import httpx
 import json
 import time
 from loguru import logger
@@ -51,21 +52,7 @@ class ClaudeService:
             start_time = time.time()
             
             # If using RAG, get relevant context
-            context = ""
-            sources = []
-            
-            if use_rag:
-                # Get RAG results
-                rag_results = await graph_rag.search(
-                    query=query,
-                    search_type=search_type,
-                    pmqa_reference=pmqa_reference,
-                    top_k=5  # Limit to top 5 results for context
-                )
-                
-                # Extract context from results
-                sources = rag_results.get("results", [])
-                context = self._prepare_context(sources)
+            sources, context = await self._retrieve_context(query, use_rag, search_type, pmqa_reference)
             
             # Create prompt for Claude
             prompt = self._create_prompt(query, context)
@@ -86,6 +73,70 @@ class ClaudeService:
             logger.error(f"Error in Claude service: {str(e)}")
             raise
 
+    async def stream_answer(
+        self, 
+        query: str, 
+        use_rag: bool = True,
+        search_type: str = "hybrid",
+        pmqa_reference: Optional[Dict[str, str]] = None,
+        max_tokens: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a question using Claude API, yielding the answer as it is generated.
+        
+        Args:
+            query: User's question
+            use_rag: Whether to use RAG for context
+            search_type: Type of search for RAG ("vector", "graph", or "hybrid")
+            pmqa_reference: Optional PMQA reference to focus the search
+            max_tokens: Maximum number of tokens in the response
+            
+        Yields:
+            {"type": "delta", "text": ...} events for each piece of the answer,
+            followed by a single {"type": "sources", "sources": [...]} event
+        """
+        sources, context = await self._retrieve_context(query, use_rag, search_type, pmqa_reference)
+        prompt = self._create_prompt(query, context)
+        
+        async for text in self._stream_claude_api(prompt, max_tokens):
+            yield {"type": "delta", "text": text}
+        
+        yield {"type": "sources", "sources": sources}
+
+    async def _retrieve_context(
+        self, 
+        query: str, 
+        use_rag: bool,
+        search_type: str,
+        pmqa_reference: Optional[Dict[str, str]]
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Retrieve RAG sources and the context built from them.
+        
+        Args:
+            query: User's question
+            use_rag: Whether to use RAG for context
+            search_type: Type of search for RAG
+            pmqa_reference: Optional PMQA reference to focus the search
+            
+        Returns:
+            Tuple of (sources, formatted context); both empty when RAG is off
+        """
+        if not use_rag:
+            return [], ""
+        
+        # Get RAG results
+        rag_results = await graph_rag.search(
+            query=query,
+            search_type=search_type,
+            pmqa_reference=pmqa_reference,
+            top_k=5  # Limit to top 5 results for context
+        )
+        
+        # Extract context from results
+        sources = rag_results.get("results", [])
+        return sources, self._prepare_context(sources)
+
     def _prepare_context(self, sources: List[Dict[str, Any]]) -> str:
         """
         Prepare context from RAG results.
@@ -189,6 +240,52 @@ class ClaudeService:
             logger.error(f"Error calling Claude API: {str(e)}")
             return f"ขออภัย ไม่สามารถเชื่อมต่อกับ Claude AI ได้ในขณะนี้ (ข้อผิดพลาด: {str(e)})"
 
+    async def _stream_claude_api(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        """
+        Call Claude API with a prompt and stream the response text.
+        
+        Args:
+            prompt: Prompt for Claude
+            max_tokens: Maximum number of tokens in the response
+            
+        Yields:
+            Pieces of Claude's response as they arrive
+        """
+        # Check if API key is configured
+        if not self.api_key or self.api_key == "":
+            logger.warning("Claude API key not configured, using mock response")
+            for line in self._generate_mock_response(prompt).splitlines(keepends=True):
+                yield line
+            return
+        
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "stream": True
+        }
+        
+        # Errors are not turned into apology text here: the streaming endpoint
+        # reports them as an "error" event so clients can tell a failed answer
+        # from a finished one
+        async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=5.0)) as client:
+            async with client.stream("POST", self.api_url, headers=self.headers, json=payload) as response:
+                response.raise_for_status()
+                
+                # Server-sent events; only text deltas carry answer content
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    
+                    event = json.loads(line[6:])
+                    if event.get("type") == "content_block_delta":
+                        text = event.get("delta", {}).get("text")
+                        if text:
+                            yield text
+
     def _generate_mock_response(self, prompt: str) -> str:
         """
         Generate a mock response for testing purposes.
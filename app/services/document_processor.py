@@ -221,7 +221,9 @@ class DocumentProcessor:
             self._update_task_progress(document_id, 70, "Storing chunks in vector database")
             
             # Store chunks in vector database
-            chunk_ids = vector_db.add_chunks(chunks, chunk_metadatas, document_id)
+            chunk_ids = vector_db.add_chunks(
+                chunks, chunk_metadatas, document_id, embeddings=chunk_embeddings
+            )
             
             # Update progress
             self._update_task_progress(document_id, 80, "Creating document node in graph database")
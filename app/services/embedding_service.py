@@ -1,24 +1,225 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
 import requests
 import numpy as np
 from loguru import logger
 
 from app.core.config import settings
+from app.services._ollama import ollama_session, ollama_async_client, is_ollama_available
 
 
-class OllamaEmbeddingService:
+def _quantize(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Symmetrically quantize a float vector to int8.
+    
+    Args:
+        vector: Float embedding vector
+        
+    Returns:
+        Tuple of (int8 vector, scale) where vector ~= int8 vector * scale
+    """
+    max_abs = float(np.max(np.abs(vector))) if vector.size else 0.0
+    if max_abs == 0.0:
+        return np.zeros(vector.shape, dtype=np.int8), 1.0
+    
+    quantized = np.round(vector * (127.0 / max_abs)).astype(np.int8)
+    return quantized, max_abs / 127.0
+
+
+def _cosine_int8(vec1: np.ndarray, vec2: np.ndarray) -> float:
+    """
+    Calculate cosine similarity between two int8 vectors.
+    
+    The per-vector scales cancel out in the cosine, so they are not needed here.
+    Accumulation is done in int32 to avoid int8 overflow.
+    
+    Args:
+        vec1: First int8 vector
+        vec2: Second int8 vector
+        
+    Returns:
+        Cosine similarity score
+    """
+    a = vec1.astype(np.int32)
+    b = vec2.astype(np.int32)
+    
+    norm_product = float(np.dot(a, a)) * float(np.dot(b, b))
+    if norm_product == 0:
+        return 0.0
+    
+    return float(np.dot(a, b)) / float(np.sqrt(norm_product))
+
+
+def _normalize_text(text: str) -> str:
+    """
+    Normalize a text for use as an embedding cache key.
+    
+    Only Unicode compatibility forms and whitespace runs are folded (e.g. a
+    trailing space or a double space); case and punctuation are kept since
+    they can change the meaning ("C++" vs "C", "1.2" vs "12").
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        Normalized text
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class _EmbeddingDiskCache:
+    """
+    Persistent embedding cache backed by SQLite.
+    
+    Vectors are keyed by a hash of the model name and text and stored as float32
+    bytes, so they survive restarts at half the size of float64. With quantize
+    set they are stored as int8 plus a per-vector scale, a quarter of float32.
+    """
+
+    def __init__(self, path: str, quantize: bool = False):
+        """
+        Open (or create) the cache database.
+        
+        Args:
+            path: Path of the SQLite file
+            quantize: Store new vectors int8-quantized
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, scale REAL)"
+        )
+        self._lock = threading.Lock()
+        self.quantize = quantize
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        """
+        Build the cache key for a text.
+        
+        The text is normalized first, so near-identical texts share an entry.
+        
+        Args:
+            model: Embedding model name
+            text: Input text
+            
+        Returns:
+            Hex digest of the model name and text
+        """
+        # "embed" marks vectors from /api/embed, which are unit length unlike the
+        # ones the older /api/embeddings endpoint returned
+        return hashlib.sha256(f"embed|{model}|{_normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """
+        Look up a cached embedding.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Embedding vector, or None if not cached
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, scale FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        
+        blob, scale = row
+        if scale is None:
+            return np.frombuffer(blob, dtype=np.float32).tolist()
+        # int8-quantized entry (scale is NULL for float32 ones)
+        return (np.frombuffer(blob, dtype=np.int8).astype(np.float32) * np.float32(scale)).tolist()
+
+    def set(self, key: str, embedding: List[float]) -> None:
+        """
+        Store an embedding.
+        
+        Args:
+            key: Cache key
+            embedding: Embedding vector
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        scale = None
+        if self.quantize:
+            vector, scale = _quantize(vector)
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, scale) VALUES (?, ?, ?)",
+                (key, vector.tobytes(), scale)
+            )
+
+
+class _Int8EmbeddingMixin:
+    """
+    int8 embedding helpers shared by the embedding services.
+    
+    Subclasses provide create_embedding.
+    """
+
+    def create_embedding_int8(self, text: str) -> Tuple[np.ndarray, float]:
+        """
+        Create an int8-quantized embedding for a single text.
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            Tuple of (int8 embedding vector, scale)
+        """
+        return _quantize(np.asarray(self.create_embedding(text), dtype=np.float32))
+
+    def calculate_similarity_int8(
+        self, 
+        embedding1: np.ndarray, 
+        embedding2: np.ndarray
+    ) -> float:
+        """
+        Calculate cosine similarity between two int8-quantized embeddings.
+        
+        Args:
+            embedding1: First int8 embedding vector
+            embedding2: Second int8 embedding vector
+            
+        Returns:
+            Cosine similarity score (0-1)
+        """
+        return _cosine_int8(embedding1, embedding2)
+
+
+class OllamaEmbeddingService(_Int8EmbeddingMixin):
     """
     Service for creating embeddings using Ollama's API.
     """
 
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
         """
         Initialize the embedding service with configured model.
+        
+        Args:
+            session: Optional HTTP session (defaults to the shared Ollama session)
         """
+        self.session = session or ollama_session()
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.EMBEDDING_MODEL
-        self.embedding_url = f"{self.base_url}/api/embeddings"
+        # /api/embed takes a single text or a list of texts and returns unit-length vectors
+        self.embedding_url = f"{self.base_url}/api/embed"
         self.batch_size = 10  # Default batch size for processing multiple texts
+        self.cache = (
+            _EmbeddingDiskCache(settings.EMBEDDING_CACHE_PATH, quantize=settings.EMBEDDING_QUANT)
+            if settings.EMBEDDING_CACHE_PATH else None
+        )
 
     def create_embedding(self, text: str) -> List[float]:
         """
@@ -30,17 +231,36 @@ class OllamaEmbeddingService:
         Returns:
             Embedding vector as a list of floats
         """
+        return self._create_embeddings_batch([text])[0]
+
+    async def create_embedding_async(self, text: str) -> List[float]:
+        """
+        Create an embedding for a single text without blocking the event loop.
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            Embedding vector as a list of floats
+        """
+        cache_key = self.cache.key(self.model, text) if self.cache is not None else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
             payload = {
                 "model": self.model,
-                "prompt": text
+                "input": text
             }
             
-            response = requests.post(self.embedding_url, json=payload)
+            response = await ollama_async_client().post(self.embedding_url, json=payload)
             response.raise_for_status()
             
-            result = response.json()
-            embedding = result.get("embedding", [])
+            embedding = response.json().get("embeddings", [[]])[0]
+            if cache_key is not None and embedding:
+                self.cache.set(cache_key, embedding)
             
             logger.debug(f"Created embedding with {len(embedding)} dimensions")
             return embedding
@@ -74,17 +294,48 @@ class OllamaEmbeddingService:
         """
         Create embeddings for a batch of texts.
         
+        Texts found in the disk cache are served from it; the rest are sent
+        to Ollama in one request.
+        
         Args:
             texts: Batch of input texts
             
         Returns:
-            List of embedding vectors for the batch
+            List of embedding vectors for the batch, in input order
         """
-        embeddings = []
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        cache_keys = [self.cache.key(self.model, text) for text in texts] if self.cache is not None else None
+        if cache_keys is not None:
+            embeddings = [self.cache.get(cache_key) for cache_key in cache_keys]
         
-        for text in texts:
-            embedding = self.create_embedding(text)
-            embeddings.append(embedding)
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not misses:
+            return embeddings
+        
+        try:
+            payload = {
+                "model": self.model,
+                "input": [texts[i] for i in misses]
+            }
+            
+            response = self.session.post(self.embedding_url, json=payload)
+            response.raise_for_status()
+            
+            vectors = response.json().get("embeddings", [])
+            if len(vectors) != len(misses):
+                raise ValueError(f"Expected {len(misses)} embeddings, got {len(vectors)}")
+            
+            for i, embedding in zip(misses, vectors):
+                embeddings[i] = embedding
+                if cache_keys is not None and embedding:
+                    self.cache.set(cache_keys[i], embedding)
+            
+            logger.debug(f"Created {len(vectors)} embeddings with {len(vectors[0])} dimensions")
+        except Exception as e:
+            logger.error(f"Error creating embeddings: {str(e)}")
+            # Return zero vectors as fallback
+            for i in misses:
+                embeddings[i] = [0.0] * 384  # Default dimension for most embedding models
         
         return embeddings
 
@@ -120,7 +371,7 @@ class OllamaEmbeddingService:
 
 
 # Alternative implementation using a mock service for testing
-class MockEmbeddingService:
+class MockEmbeddingService(_Int8EmbeddingMixin):
     """
     Mock embedding service for testing purposes.
     """
@@ -143,23 +394,34 @@ class MockEmbeddingService:
             Mock embedding vector
         """
         # Create deterministic but unique embedding based on text hash
-        import hashlib
-        
-        # Get hash of the text
         text_hash = hashlib.md5(text.encode()).hexdigest()
         
-        # Convert hash to a seed for random number generator
+        # Convert hash to a seed for a local generator (avoids mutating global NumPy state)
         seed = int(text_hash, 16) % (2**32)
-        np.random.seed(seed)
+        rng = np.random.default_rng(seed)
         
-        # Generate a random embedding
-        embedding = np.random.uniform(-1, 1, self.embedding_dim)
+        # Generate a random float32 embedding in [-1, 1)
+        embedding = rng.random(self.embedding_dim, dtype=np.float32)
+        embedding *= np.float32(2)
+        embedding -= np.float32(1)
         
-        # Normalize to unit length
-        embedding = embedding / np.linalg.norm(embedding)
+        # Normalize to unit length in place
+        embedding *= np.float32(1.0 / math.sqrt(float(np.vdot(embedding, embedding)) + 1e-12))
         
         return embedding.tolist()
 
+    async def create_embedding_async(self, text: str) -> List[float]:
+        """
+        Create a mock embedding for a single text.
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            Mock embedding vector
+        """
+        return self.create_embedding(text)
+
     def create_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Create mock embeddings for multiple texts.
@@ -204,11 +466,8 @@ class MockEmbeddingService:
 
 
 # Choose the actual implementation based on availability of Ollama
-try:
-    # Test if Ollama is available
-    requests.get(f"{settings.OLLAMA_BASE_URL}/api/tags")
+if is_ollama_available():
     embedding_service = OllamaEmbeddingService()
     logger.info(f"Using Ollama embedding service with model {settings.EMBEDDING_MODEL}")
-except Exception as e:
-    logger.warning(f"Ollama service not available, using mock embedding service: {str(e)}")
+else:
     embedding_service = MockEmbeddingService()
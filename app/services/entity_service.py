@@ -1,10 +1,10 @@
 from typing import List, Dict, Any, Optional
 import requests
 import json
-import re
 from loguru import logger
 
 from app.core.config import settings
+from app.services._ollama import ollama_session, is_ollama_available
 
 
 class OllamaEntityService:
@@ -13,14 +13,28 @@ class OllamaEntityService:
     extract keywords, and determine relationships.
     """
 
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
         """
         Initialize the entity service with configured model.
+        
+        Args:
+            session: Optional HTTP session (defaults to the shared Ollama session)
         """
+        self.session = session or ollama_session()
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.ENTITY_MODEL
         self.generate_url = f"{self.base_url}/api/generate"
         
+        # Pre-encode the static part of the generate request; only the prompt varies per call
+        static_payload = json.dumps({
+            "model": self.model,
+            "stream": True,
+            "format": "json",  # Constrain output to a single valid JSON document
+            "options": {"temperature": 0.1},  # Low temperature for more deterministic results
+            "system": "You are an expert document analyst specializing in PMQA 4.0 framework analysis."
+        }).encode("utf-8")
+        self._payload_prefix = static_payload[:-1] + b', "prompt": '
+        
         # Initialize PMQA structure
         self.pmqa_structure = self._load_pmqa_structure()
     
@@ -97,14 +111,17 @@ class OllamaEntityService:
         if len(text) <= max_length:
             return text
         
-        # Take beginning, middle, and end sections
+        # Take beginning, middle, and end sections, joined in a single allocation
         third = max_length // 3
-        beginning = text[:third]
         middle_start = (len(text) - third) // 2
-        middle = text[middle_start:middle_start + third]
-        end = text[-third:]
         
-        return f"{beginning}\n\n[...]\n\n{middle}\n\n[...]\n\n{end}"
+        return "".join((
+            text[:third],
+            "\n\n[...]\n\n",
+            text[middle_start:middle_start + third],
+            "\n\n[...]\n\n",
+            text[-third:]
+        ))
 
     def _create_analysis_prompt(self, text: str) -> str:
         """
@@ -152,19 +169,27 @@ PMQA 4.0 แบ่งออกเป็น 7 หมวด ดังนี้:
             LLM response
         """
         try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "temperature": 0.1,  # Low temperature for more deterministic results
-                "system": "You are an expert document analyst specializing in PMQA 4.0 framework analysis."
-            }
+            body = self._payload_prefix + json.dumps(prompt).encode("utf-8") + b"}"
             
-            response = requests.post(self.generate_url, json=payload)
-            response.raise_for_status()
+            # Stream the generation so we can stop reading as soon as Ollama reports completion
+            parts = []
+            with self.session.post(
+                self.generate_url,
+                data=body,
+                headers={"Content-Type": "application/json"},
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    parts.append(chunk.get("response", ""))
+                    if chunk.get("done"):
+                        break
             
-            result = response.json()
-            return result.get("response", "")
+            return "".join(parts)
         except Exception as e:
             logger.error(f"Error querying LLM: {str(e)}")
             raise
@@ -180,21 +205,8 @@ PMQA 4.0 แบ่งออกเป็น 7 หมวด ดังนี้:
             Parsed analysis
         """
         try:
-            # Extract JSON from the response
-            json_match = re.search(r'```json\s*(.*?)\s*```', result, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = result
-                
-            # Remove any markdown formatting
-            json_str = re.sub(r'```.*?```', '', json_str, flags=re.DOTALL)
-            
-            # Clean up JSON
-            json_str = json_str.strip()
-            json_str = re.sub(r'^```|```$', '', json_str)
-            
-            analysis = json.loads(json_str)
+            # Ollama's JSON mode guarantees a bare JSON document, so no fence stripping is needed
+            analysis = json.loads(result)
             
             # Ensure required fields exist
             if "pmqa_references" not in analysis:
@@ -302,11 +314,8 @@ class MockEntityService:
 
 
 # Choose the actual implementation based on availability of Ollama
-try:
-    # Test if Ollama is available
-    requests.get(f"{settings.OLLAMA_BASE_URL}/api/tags")
+if is_ollama_available():
     entity_service = OllamaEntityService()
     logger.info(f"Using Ollama entity service with model {settings.ENTITY_MODEL}")
-except Exception as e:
-    logger.warning(f"Ollama service not available, using mock entity service: {str(e)}")
+else:
     entity_service = MockEntityService()
@@ -1,12 +1,632 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from operator import itemgetter
 import asyncio
+import heapq
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from loguru import logger
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to NumPy ufuncs
+    njit = None
+
 from app.core.config import settings
 from app.db.graph_db import graph_db
 from app.db.vector_db import vector_db
-from app.services.embedding_service import embedding_service
+from app.services.embedding_service import embedding_service, _quantize
+
+
+# Characters and keywords with special meaning in Lucene full-text queries
+_LUCENE_SPECIAL_CHARS = re.compile(r'[+\-&|!(){}\[\]^"~*?:\\/]')
+_LUCENE_OPERATORS = re.compile(r"\b(AND|OR|NOT)\b")
+
+
+def _escape_lucene(text: str) -> str:
+    """
+    Escape Lucene query syntax so user input is matched as plain text.
+    
+    Boolean operators are only recognized in upper case, so they are
+    lowercased; the index analyzer lowercases terms anyway.
+    
+    Args:
+        text: Raw query text
+        
+    Returns:
+        Escaped query text for db.index.fulltext.queryNodes
+    """
+    text = _LUCENE_OPERATORS.sub(lambda match: match.group(0).lower(), text)
+    return _LUCENE_SPECIAL_CHARS.sub(r"\\\g<0>", text)
+
+
+class _QueryEmbeddingCache:
+    """
+    Thread-safe LRU cache of query embeddings keyed by (query, model).
+    
+    The embedding model name is part of the key so that switching models
+    never serves stale vectors.
+    """
+
+    def __init__(self, size: int):
+        """
+        Initialize the cache.
+        
+        Args:
+            size: Maximum number of cached embeddings
+        """
+        self.size = size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple[float, ...]]:
+        """
+        Look up an embedding, marking it as recently used.
+        
+        Args:
+            key: (query, model) pair
+            
+        Returns:
+            Cached embedding, or None on a miss
+        """
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+            return embedding
+
+    def put(self, key: Tuple[str, str], embedding: Tuple[float, ...]) -> None:
+        """
+        Store an embedding, evicting the least recently used entries beyond the cap.
+        
+        Args:
+            key: (query, model) pair
+            embedding: Query embedding
+        """
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop all cached embeddings.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+_query_embeddings = _QueryEmbeddingCache(1024)
+
+
+def _embed_cached(query: str, model: str) -> Tuple[float, ...]:
+    """
+    Create a query embedding, memoized per process.
+    
+    The embedding service returns an all-zero vector when Ollama fails; that
+    raises instead, so the failure is not cached and the next call retries.
+    
+    Args:
+        query: Search query
+        model: Embedding model name
+        
+    Returns:
+        Query embedding as a tuple of floats
+    """
+    key = (query, model)
+    embedding = _query_embeddings.get(key)
+    if embedding is not None:
+        return embedding
+    
+    vector = embedding_service.create_embedding(query)
+    if not any(vector):
+        raise RuntimeError("Embedding service failed to embed the query")
+    
+    embedding = tuple(vector)
+    _query_embeddings.put(key, embedding)
+    return embedding
+
+
+def _embed_cached_many(queries: List[str], model: str) -> Dict[str, Tuple[float, ...]]:
+    """
+    Create embeddings for several queries, memoized like _embed_cached.
+    
+    Cached queries are served from memory and only the misses go to the
+    embedding service, in one batch. Queries whose embedding comes back
+    all-zero (a failed request) are left out, so callers fall back to
+    _embed_cached for them.
+    
+    Args:
+        queries: Search queries
+        model: Embedding model name
+        
+    Returns:
+        Dictionary of query -> embedding for the queries that were embedded
+    """
+    embeddings: Dict[str, Tuple[float, ...]] = {}
+    misses = []
+    for query in queries:
+        embedding = _query_embeddings.get((query, model))
+        if embedding is not None:
+            embeddings[query] = embedding
+        else:
+            misses.append(query)
+    
+    if misses:
+        for query, vector in zip(misses, embedding_service.create_embeddings(misses)):
+            if not any(vector):
+                logger.warning("Embedding service failed to embed a batched query")
+                continue
+            embedding = tuple(vector)
+            _query_embeddings.put((query, model), embedding)
+            embeddings[query] = embedding
+    
+    return embeddings
+
+
+def _freeze(filters: Optional[Dict[str, Any]]) -> Optional[Tuple[Tuple[str, Any], ...]]:
+    """
+    Freeze a filter dict into a hashable cache key.
+    
+    Insertion order is kept because later keys can override earlier ones
+    (e.g. published_after/published_before both map to published_date).
+    
+    Args:
+        filters: Filters in API format
+        
+    Returns:
+        Tuple of (key, value) pairs, or None for empty filters
+    """
+    return tuple(filters.items()) if filters else None
+
+
+def _convert_filters_to_chroma(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Convert filters to Chroma format.
+    
+    Args:
+        filters: Filters in API format
+        
+    Returns:
+        Filters in Chroma format
+    """
+    if not filters:
+        return None
+    
+    chroma_filters = {}
+    
+    # Map filters to Chroma format
+    for key, value in filters.items():
+        if key == "category":
+            chroma_filters["category"] = value
+        elif key == "published_after":
+            chroma_filters["published_date"] = {"$gte": value}
+        elif key == "published_before":
+            chroma_filters["published_date"] = {"$lte": value}
+        elif key == "author":
+            chroma_filters["author"] = value
+        elif key == "keywords":
+            # Not directly supported in Chroma - would need a different approach
+            pass
+        else:
+            # Pass through other filters directly
+            chroma_filters[key] = value
+    
+    return chroma_filters if chroma_filters else None
+
+
+@lru_cache(maxsize=256)
+def _convert_filters_to_chroma_cached(
+    frozen_filters: Optional[Tuple[Tuple[str, Any], ...]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Convert frozen filters to Chroma format, memoized per process.
+    
+    The returned dict is shared between callers and must not be mutated.
+    
+    Args:
+        frozen_filters: Filters as returned by _freeze
+        
+    Returns:
+        Filters in Chroma format
+    """
+    return _convert_filters_to_chroma(dict(frozen_filters) if frozen_filters else None)
+
+
+def _fuse_scores_np(
+    vector_scores: np.ndarray,
+    graph_scores: np.ndarray,
+    vector_weight: float,
+    graph_weight: float,
+    out: np.ndarray
+) -> None:
+    """
+    Write the weighted sum of vector and graph scores into `out` with NumPy ufuncs.
+    
+    Args:
+        vector_scores: Vector search scores
+        graph_scores: Graph search scores
+        vector_weight: Normalized weight for vector scores
+        graph_weight: Normalized weight for graph scores
+        out: Preallocated output array
+    """
+    np.multiply(vector_scores, vector_weight, out=out)
+    out += graph_weight * graph_scores
+
+
+def _fuse_scores_jit(
+    vector_scores: np.ndarray,
+    graph_scores: np.ndarray,
+    vector_weight: float,
+    graph_weight: float,
+    out: np.ndarray
+) -> None:
+    """
+    Write the weighted sum of vector and graph scores into `out` in one loop.
+    
+    Compiled with numba when available; references no module globals so it
+    stays typeable in nopython mode.
+    
+    Args:
+        vector_scores: Vector search scores
+        graph_scores: Graph search scores
+        vector_weight: Normalized weight for vector scores
+        graph_weight: Normalized weight for graph scores
+        out: Preallocated output array
+    """
+    for i in range(out.shape[0]):
+        out[i] = vector_weight * vector_scores[i] + graph_weight * graph_scores[i]
+
+
+_fuse_scores = njit(cache=True)(_fuse_scores_jit) if njit is not None else _fuse_scores_np
+
+
+# Probe text embedded at startup to load the embedding model
+_WARMUP_TEXT = "PMQA 4.0"
+
+# Minimum fraction of top_k shared by vector and graph results before hybrid search widens its fetch
+_HYBRID_MIN_OVERLAP = 0.5
+
+
+async def _no_results() -> List[Dict[str, Any]]:
+    """
+    Placeholder awaitable for a search side that is not re-fetched.
+    
+    Returns:
+        Empty result list
+    """
+    return []
+
+
+# PMQA reference fields returned by graph search
+_PMQA_FIELD_NAMES = (
+    "category_id", "category_name",
+    "subcategory_id", "subcategory_name",
+    "criteria_id", "criteria_name",
+)
+_pmqa_values = itemgetter(*_PMQA_FIELD_NAMES)
+
+# Graph query shape bits for the PMQA reference level
+_PMQA_CRITERIA = 1 << 0
+_PMQA_SUBCATEGORY = 1 << 1
+_PMQA_CATEGORY = 1 << 2
+# Graph query shape bit for an empty query, which matches every chunk without the full-text index
+_MATCH_ALL = 1 << 3
+
+# (filter key, Cypher parameter, WHERE clause). Every clause is always emitted and
+# disabled by passing null, so all filter combinations share one server-side plan.
+_GRAPH_FILTERS = (
+    ("category", "category", "(document.category = $category OR $category IS NULL)"),
+    ("published_after", "publishedAfter", "(document.published_date >= $publishedAfter OR $publishedAfter IS NULL)"),
+    ("published_before", "publishedBefore", "(document.published_date <= $publishedBefore OR $publishedBefore IS NULL)"),
+    ("author", "author", "(document.author = $author OR $author IS NULL)"),
+)
+
+
+@lru_cache(maxsize=None)
+def _graph_query_template(mask: int) -> str:
+    """
+    Build the graph search Cypher text for a query shape, memoized per process.
+    
+    Args:
+        mask: Bitmask of the PMQA reference level and query shape in use
+        
+    Returns:
+        Cypher query string
+    """
+    match_clauses = []
+    where_clauses = []
+    
+    if mask & _MATCH_ALL:
+        # An empty query has nothing to look up (Lucene rejects it); every chunk scores equally
+        match_clauses.append("""
+    WITH 1.0 AS score
+    MATCH (chunk:Chunk)<-[:HAS_CHUNK]-(document:Document)
+    """)
+    else:
+        # Base clause: full-text index lookup over chunk content and document titles.
+        # Title hits fan out to the document's chunks; each chunk keeps its best score.
+        match_clauses.append("""
+    CALL {
+        CALL db.index.fulltext.queryNodes('chunk_content_fts', $query) YIELD node, score
+        RETURN node AS chunk, score
+        UNION ALL
+        CALL db.index.fulltext.queryNodes('doc_title_fts', $query) YIELD node, score
+        MATCH (node)-[:HAS_CHUNK]->(chunk:Chunk)
+        RETURN chunk, score
+    }
+    WITH chunk, max(score) AS score
+    MATCH (chunk)<-[:HAS_CHUNK]-(document:Document)
+    """)
+    
+    # PMQA reference
+    if mask & _PMQA_CRITERIA:
+        match_clauses.append("MATCH (chunk)-[:RELATES_TO]->(criteria:Criteria)")
+        where_clauses.append("criteria.id = $criteriaId")
+    elif mask & _PMQA_SUBCATEGORY:
+        match_clauses.append("MATCH (chunk)-[:RELATES_TO]->(subcategory:Subcategory)")
+        where_clauses.append("subcategory.id = $subcategoryId")
+    elif mask & _PMQA_CATEGORY:
+        match_clauses.append("MATCH (chunk)-[:RELATES_TO]->(category:Category)")
+        where_clauses.append("category.id = $categoryId")
+    
+    # Document filters
+    where_clauses.extend(clause for _, _, clause in _GRAPH_FILTERS)
+    
+    # Keep the best-scoring candidates first so PMQA references are only collected for the top chunks
+    score_clause = """
+    WITH document, chunk, score
+    ORDER BY score DESC
+    SKIP $skip
+    LIMIT $limit
+    """
+    
+    # Get PMQA references, projected server-side so every key is always present
+    with_clause = """
+    OPTIONAL MATCH (chunk)-[:RELATES_TO]->(pmqa)
+    WHERE pmqa:Category OR pmqa:Subcategory OR pmqa:Criteria
+    WITH document, chunk, score, collect(pmqa {
+        category_id: coalesce(pmqa.category_id, ''),
+        category_name: coalesce(pmqa.category_name, ''),
+        subcategory_id: coalesce(pmqa.subcategory_id, ''),
+        subcategory_name: coalesce(pmqa.subcategory_name, ''),
+        criteria_id: coalesce(pmqa.criteria_id, ''),
+        criteria_name: coalesce(pmqa.criteria_name, '')
+    }) as pmqaRefs
+    """
+    
+    # Build full query
+    return f"""
+    {' '.join(match_clauses)}
+    WHERE {' AND '.join(where_clauses)}
+    {score_clause}
+    {with_clause}
+    RETURN document, chunk, pmqaRefs, score
+    ORDER BY score DESC
+    """
+
+
+class _SemanticCache:
+    """
+    In-memory cache of vector search results keyed by query embedding.
+    
+    Cached query embeddings are stored int8-quantized in one matrix, so a
+    lookup is a single integer matrix-vector product. A lookup hits when a
+    cached query with the same filters and top_k has cosine similarity at
+    or above the threshold.
+    """
+
+    def __init__(self, size: int, threshold: float):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            size: Maximum number of cached queries (0 disables the cache)
+            threshold: Minimum cosine similarity for a cache hit
+        """
+        self.size = size
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None
+        self._norms = np.zeros(size)
+        self._entries: List[Tuple[Any, List[Dict[str, Any]]]] = []
+        self._next = 0
+
+    @staticmethod
+    def _copy(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Copy results so fusion cannot mutate cached entries.
+        
+        Args:
+            results: Vector search results
+            
+        Returns:
+            Shallow copies with their own PMQA reference lists
+        """
+        return [{**result, "pmqa_references": list(result["pmqa_references"])} for result in results]
+
+    def get(self, embedding: List[float], key: Any) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up results for a semantically equivalent query.
+        
+        Args:
+            embedding: Query embedding
+            key: Hashable key for the filters and top_k of the search
+            
+        Returns:
+            Cached results, or None on a miss
+        """
+        if not self._entries:
+            return None
+        
+        query, _ = _quantize(np.asarray(embedding, dtype=np.float32))
+        query = query.astype(np.int32)
+        query_norm = float(np.sqrt(np.dot(query, query)))
+        if query_norm == 0.0:
+            return None
+        
+        count = len(self._entries)
+        # int8 rows promote to int32 against the int32 query, so the dot products cannot overflow
+        similarities = (self._vectors[:count] @ query) / (self._norms[:count] * query_norm)
+        
+        for row in np.argsort(-similarities).tolist():
+            if similarities[row] < self.threshold:
+                break
+            entry_key, results = self._entries[row]
+            if entry_key == key:
+                return self._copy(results)
+        
+        return None
+
+    def put(self, embedding: List[float], key: Any, results: List[Dict[str, Any]]) -> None:
+        """
+        Store results, evicting the oldest entry when full.
+        
+        Args:
+            embedding: Query embedding
+            key: Hashable key for the filters and top_k of the search
+            results: Vector search results
+        """
+        vector, _ = _quantize(np.asarray(embedding, dtype=np.float32))
+        if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+            # (Re)allocate on first use or when the embedding model changes
+            self._vectors = np.zeros((self.size, vector.shape[0]), dtype=np.int8)
+            self._entries = []
+            self._next = 0
+        
+        row = self._next
+        self._vectors[row] = vector
+        wide = vector.astype(np.int32)
+        self._norms[row] = np.sqrt(float(np.dot(wide, wide))) or 1.0
+        entry = (key, self._copy(results))
+        if row < len(self._entries):
+            self._entries[row] = entry
+        else:
+            self._entries.append(entry)
+        self._next = (row + 1) % self.size
+
+
+class _ScoreTable:
+    """
+    Structure-of-arrays table used to fuse vector and graph scores.
+    
+    Scores live in flat parallel arrays indexed by a chunk_id -> row map;
+    result dicts are only touched again for the final top-k rows.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty score table.
+        """
+        self.idx: Dict[str, int] = {}
+        self.v = array("d")
+        self.g = array("d")
+        self.payload: List[Dict[str, Any]] = []
+        self.ref_keys: List[Optional[set]] = []
+
+    def _row(self, chunk_id: str, payload: Dict[str, Any]) -> Tuple[int, bool]:
+        """
+        Get the row for a chunk, appending a new one if needed.
+        
+        Args:
+            chunk_id: Chunk ID
+            payload: Result dict to store if the row is new
+            
+        Returns:
+            Tuple of (row index, whether the row was created)
+        """
+        row = self.idx.get(chunk_id)
+        if row is not None:
+            return row, False
+        
+        row = self.idx[chunk_id] = len(self.payload)
+        self.v.append(0.0)
+        self.g.append(0.0)
+        self.payload.append(payload)
+        self.ref_keys.append(None)
+        return row, True
+
+    def upsert_vector(self, chunk_id: str, score: float, payload: Dict[str, Any]) -> None:
+        """
+        Record a vector search score for a chunk.
+        
+        Args:
+            chunk_id: Chunk ID
+            score: Vector similarity score
+            payload: Vector search result dict
+        """
+        row, _ = self._row(chunk_id, payload)
+        self.v[row] = score
+
+    def upsert_graph(self, chunk_id: str, score: float, payload: Dict[str, Any]) -> None:
+        """
+        Record a graph search score for a chunk, merging its PMQA references.
+        
+        Args:
+            chunk_id: Chunk ID
+            score: Graph search score
+            payload: Graph search result dict
+        """
+        row, created = self._row(chunk_id, payload)
+        self.g[row] = score
+        if created:
+            return
+        
+        # Track each payload's reference keys once so merges stay linear in refs
+        entry = self.payload[row]
+        existing_refs = self.ref_keys[row]
+        if existing_refs is None:
+            existing_refs = self.ref_keys[row] = {
+                (ref.get("category_id", ""), ref.get("subcategory_id", ""), ref.get("criteria_id", ""))
+                for ref in entry["pmqa_references"]
+            }
+        
+        for ref in payload["pmqa_references"]:
+            ref_tuple = (ref.get("category_id", ""), ref.get("subcategory_id", ""), ref.get("criteria_id", ""))
+            if ref_tuple not in existing_refs:
+                existing_refs.add(ref_tuple)
+                entry["pmqa_references"].append(ref)
+
+    def top_k(self, vector_weight: float, graph_weight: float, k: int) -> List[Dict[str, Any]]:
+        """
+        Fuse the scores and hydrate the k best results.
+        
+        Args:
+            vector_weight: Normalized weight for vector scores
+            graph_weight: Normalized weight for graph scores
+            k: Number of results to return
+            
+        Returns:
+            Top-k results sorted by combined score
+        """
+        if not self.payload:
+            return []
+        
+        vector_scores = np.frombuffer(self.v, dtype=np.float64)
+        graph_scores = np.frombuffer(self.g, dtype=np.float64)
+        combined = np.empty(len(self.payload))
+        _fuse_scores(vector_scores, graph_scores, vector_weight, graph_weight, combined)
+        combined_scores = combined.tolist()
+        
+        # Select the top k with a bounded heap instead of sorting every candidate
+        top_rows = heapq.nlargest(k, range(len(combined_scores)), key=combined_scores.__getitem__)
+        
+        results = []
+        for row in top_rows:
+            result = self.payload[row]
+            result["vector_score"] = self.v[row]
+            result["graph_score"] = self.g[row]
+            result["combined_score"] = combined_scores[row]
+            # Update the score field to be the combined score
+            result["score"] = result["combined_score"]
+            results.append(result)
+        
+        return results
 
 
 class GraphRAGService:
@@ -20,6 +640,29 @@ class GraphRAGService:
         """
         self.top_k_vector = settings.TOP_K_VECTOR
         self.top_k_graph = settings.TOP_K_GRAPH
+        # Blocking embedding/Chroma/Neo4j calls run here so hybrid search can overlap them
+        self._executor = ThreadPoolExecutor(max_workers=8)
+        self._semantic_cache = (
+            _SemanticCache(settings.SEMANTIC_CACHE_SIZE, settings.SEMANTIC_CACHE_THRESHOLD)
+            if settings.SEMANTIC_CACHE_SIZE > 0 else None
+        )
+
+    async def warmup(self) -> None:
+        """
+        Issue one embedding request so the model load and connection setup
+        happen before the first user query.
+        
+        The request goes through the same sync session and executor that
+        query embedding uses, so it is that connection pool that gets warmed.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self._executor, embedding_service.create_embedding, _WARMUP_TEXT
+            )
+            logger.info("GraphRAG service warmed up")
+        except Exception as e:
+            logger.warning(f"GraphRAG warmup failed: {str(e)}")
 
     async def search(
         self, 
@@ -29,7 +672,8 @@ class GraphRAGService:
         pmqa_reference: Optional[Dict[str, str]] = None,
         top_k: int = 10,
         vector_weight: float = 0.5,
-        graph_weight: float = 0.5
+        graph_weight: float = 0.5,
+        query_embedding: Optional[List[float]] = None
     ) -> Dict[str, Any]:
         """
         Search for relevant documents and chunks based on query.
@@ -42,11 +686,12 @@ class GraphRAGService:
             top_k: Number of top results to return
             vector_weight: Weight for vector search results (0-1) for hybrid search
             graph_weight: Weight for graph search results (0-1) for hybrid search
+            query_embedding: Optional precomputed query embedding
             
         Returns:
             Search results
         """
-        start_time = time.time()
+        start = time.perf_counter_ns() if settings.REPORT_TIMING else 0
         
         try:
             # Initialize results
@@ -54,35 +699,82 @@ class GraphRAGService:
             
             if search_type == "vector":
                 # Vector search only
-                results = await self._vector_search(query, filters, top_k)
+                results = await self._vector_search(query, filters, top_k, query_embedding)
             elif search_type == "graph":
                 # Graph search only
                 results = await self._graph_search(query, filters, pmqa_reference, top_k)
             else:
                 # Hybrid search (default)
                 results = await self._hybrid_search(
-                    query, filters, pmqa_reference, top_k, vector_weight, graph_weight
+                    query, filters, pmqa_reference, top_k, vector_weight, graph_weight,
+                    query_embedding
                 )
             
-            # Calculate execution time
-            execution_time_ms = (time.time() - start_time) * 1000
-            
-            return {
+            response = {
                 "query": query,
                 "total_results": len(results),
                 "results": results,
-                "search_type": search_type,
-                "execution_time_ms": execution_time_ms
+                "search_type": search_type
             }
+            
+            # Calculate execution time
+            if settings.REPORT_TIMING:
+                response["execution_time_ms"] = (time.perf_counter_ns() - start) / 1_000_000
+            
+            return response
         except Exception as e:
             logger.error(f"Error in GraphRAG search: {str(e)}")
             raise
 
+    async def search_many(
+        self, 
+        queries: List[str],
+        search_type: str = "hybrid",
+        filters: Optional[Dict[str, Any]] = None,
+        pmqa_reference: Optional[Dict[str, str]] = None,
+        top_k: int = 10,
+        vector_weight: float = 0.5,
+        graph_weight: float = 0.5
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for several queries at once, embedding them in a single batch.
+        
+        Args:
+            queries: Search queries
+            search_type: Type of search ("vector", "graph", or "hybrid")
+            filters: Optional filters for search
+            pmqa_reference: Optional PMQA reference to focus the search
+            top_k: Number of top results to return per query
+            vector_weight: Weight for vector search results (0-1) for hybrid search
+            graph_weight: Weight for graph search results (0-1) for hybrid search
+            
+        Returns:
+            Search results, one entry per query in input order
+        """
+        embeddings: Dict[str, Tuple[float, ...]] = {}
+        
+        if search_type != "graph" and queries:
+            # Deduplicate and sort by length so similar-sized inputs are batched together
+            unique_queries = sorted(set(queries), key=len)
+            loop = asyncio.get_running_loop()
+            embeddings = await loop.run_in_executor(
+                self._executor, _embed_cached_many, unique_queries, settings.EMBEDDING_MODEL
+            )
+        
+        return await asyncio.gather(*(
+            self.search(
+                query, search_type, filters, pmqa_reference, top_k,
+                vector_weight, graph_weight, embeddings.get(query)
+            )
+            for query in queries
+        ))
+
     async def _vector_search(
         self, 
         query: str,
         filters: Optional[Dict[str, Any]] = None,
-        top_k: int = 10
+        top_k: int = 10,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Perform vector search.
@@ -91,50 +783,67 @@ class GraphRAGService:
             query: Search query
             filters: Optional filters for search
             top_k: Number of top results to return
+            query_embedding: Optional precomputed query embedding
             
         Returns:
             List of search results
         """
         try:
-            # Create embedding for query
-            query_embedding = embedding_service.create_embedding(query)
+            # Create embedding for query unless the caller already batched it
+            loop = asyncio.get_running_loop()
+            if query_embedding is None:
+                query_embedding = await loop.run_in_executor(
+                    self._executor, _embed_cached, query, settings.EMBEDDING_MODEL
+                )
             
             # Convert filters to Chroma format if provided
             where_filter = self._convert_filters_to_chroma(filters)
             
+            # Serve near-duplicate queries from the semantic cache
+            cache_key = (top_k, repr(where_filter))
+            if self._semantic_cache is not None:
+                cached = self._semantic_cache.get(query_embedding, cache_key)
+                if cached is not None:
+                    return cached
+            
             # Search chunks
-            results = vector_db.search_chunks(
-                query_text=query,
-                n_results=top_k,
-                where_filter=where_filter
+            results = await loop.run_in_executor(
+                self._executor,
+                lambda: vector_db.search_chunks(
+                    query_embedding=query_embedding,
+                    n_results=top_k,
+                    where_filter=where_filter
+                )
             )
             
             # Process results
             processed_results = []
             
-            if results and len(results["ids"][0]) > 0:
-                for i in range(len(results["ids"][0])):
-                    chunk_id = results["ids"][0][i]
-                    document = results["metadatas"][0][i]
-                    content = results["documents"][0][i]
-                    score = float(results["distances"][0][i]) if "distances" in results else 0.0
-                    
-                    # Convert score to similarity (1 - distance)
-                    similarity = 1.0 - score
-                    
+            if results and results["ids"][0]:
+                ids = results["ids"][0]
+                distances = results["distances"][0] if "distances" in results else [0.0] * len(ids)
+                skip = {"document_id", "pmqa_references"}
+                
+                for chunk_id, document, content, distance in zip(
+                    ids, results["metadatas"][0], results["documents"][0], distances
+                ):
                     processed_results.append({
                         "document_id": document.get("document_id", ""),
                         "document_title": document.get("title", ""),
                         "chunk_id": chunk_id,
                         "content": content,
-                        "score": similarity,
+                        # Convert distance to similarity (1 - distance)
+                        "score": 1.0 - float(distance),
                         "pmqa_references": document.get("pmqa_references", []),
                         "metadata": {
                             key: val for key, val in document.items()
-                            if key not in ["document_id", "pmqa_references"]
+                            if key not in skip
                         }
                     })
             
+            if self._semantic_cache is not None:
+                self._semantic_cache.put(query_embedding, cache_key, processed_results)
+            
             return processed_results
         except Exception as e:
             logger.error(f"Error in vector search: {str(e)}")
@@ -145,7 +854,8 @@ class GraphRAGService:
         query: str,
         filters: Optional[Dict[str, Any]] = None,
         pmqa_reference: Optional[Dict[str, str]] = None,
-        top_k: int = 10
+        top_k: int = 10,
+        skip: int = 0
     ) -> List[Dict[str, Any]]:
         """
         Perform graph search.
@@ -155,16 +865,21 @@ class GraphRAGService:
             filters: Optional filters for search
             pmqa_reference: Optional PMQA reference to focus the search
             top_k: Number of top results to return
+            skip: Number of top-ranked results to skip
             
         Returns:
             List of search results
         """
         try:
             # Create Cypher query for graph search
-            cypher_query, params = self._build_graph_query(query, filters, pmqa_reference, top_k)
+            cypher_query, params = self._build_graph_query(query, filters, pmqa_reference, top_k, skip)
             
-            # Execute query
-            results = graph_db.execute_read_query(cypher_query, params)
+            # Execute query, converting at most top_k records
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                self._executor,
+                lambda: list(graph_db.execute_read_query_streaming(cypher_query, params, top_k))
+            )
             
             # Process results
             processed_results = []
@@ -174,19 +889,12 @@ class GraphRAGService:
                 document = result.get("document", {})
                 score = result.get("score", 0.0)
                 
-                # Get PMQA references
-                pmqa_refs = []
-                if "pmqaRefs" in result:
-                    for ref in result["pmqaRefs"]:
-                        if ref:
-                            pmqa_refs.append({
-                                "category_id": ref.get("category_id", ""),
-                                "category_name": ref.get("category_name", ""),
-                                "subcategory_id": ref.get("subcategory_id", ""),
-                                "subcategory_name": ref.get("subcategory_name", ""),
-                                "criteria_id": ref.get("criteria_id", ""),
-                                "criteria_name": ref.get("criteria_name", "")
-                            })
+                # Get PMQA references (keys are guaranteed by the Cypher projection)
+                pmqa_refs = [
+                    dict(zip(_PMQA_FIELD_NAMES, _pmqa_values(ref)))
+                    for ref in result.get("pmqaRefs") or ()
+                    if ref
+                ]
                 
                 processed_results.append({
                     "document_id": document.get("id", ""),
@@ -215,7 +923,8 @@ class GraphRAGService:
         pmqa_reference: Optional[Dict[str, str]] = None,
         top_k: int = 10,
         vector_weight: float = 0.5,
-        graph_weight: float = 0.5
+        graph_weight: float = 0.5,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Perform hybrid search, combining vector and graph search.
@@ -227,22 +936,53 @@ class GraphRAGService:
             top_k: Number of top results to return
             vector_weight: Weight for vector search results (0-1)
             graph_weight: Weight for graph search results (0-1)
+            query_embedding: Optional precomputed query embedding
             
         Returns:
             List of search results
         """
         try:
+            # Normalize weights once; _combine_results expects them to sum to 1
+            total_weight = vector_weight + graph_weight
+            if total_weight == 0 or top_k <= 0:
+                return []
+            
+            vector_weight = vector_weight / total_weight
+            graph_weight = graph_weight / total_weight
+            
+            # A zero-weighted side cannot affect the ranking, so skip its round-trip
+            if graph_weight == 0:
+                vector_results = await self._vector_search(query, filters, top_k, query_embedding)
+                return self._combine_results(vector_results, [], 1.0, 0.0, top_k)
+            if vector_weight == 0:
+                graph_results = await self._graph_search(query, filters, pmqa_reference, top_k)
+                return self._combine_results([], graph_results, 0.0, 1.0, top_k)
+            
             # Run vector and graph search in parallel
-            vector_results_task = asyncio.create_task(
-                self._vector_search(query, filters, top_k * 2)
-            )
-            graph_results_task = asyncio.create_task(
-                self._graph_search(query, filters, pmqa_reference, top_k * 2)
+            vector_results, graph_results = await asyncio.gather(
+                self._vector_search(query, filters, top_k, query_embedding),
+                self._graph_search(query, filters, pmqa_reference, top_k)
             )
             
-            # Wait for both searches to complete
-            vector_results = await vector_results_task
-            graph_results = await graph_results_task
+            # When the two sides mostly disagree, widen each full candidate pool to 2*top_k
+            overlap = len(
+                {result["chunk_id"] for result in vector_results}
+                & {result["chunk_id"] for result in graph_results}
+            )
+            if overlap < top_k * _HYBRID_MIN_OVERLAP:
+                widen_vector = len(vector_results) >= top_k
+                widen_graph = len(graph_results) >= top_k
+                if widen_vector or widen_graph:
+                    more_vector, more_graph = await asyncio.gather(
+                        self._vector_search(query, filters, top_k * 2, query_embedding)
+                        if widen_vector else _no_results(),
+                        self._graph_search(query, filters, pmqa_reference, top_k, skip=top_k)
+                        if widen_graph else _no_results()
+                    )
+                    # Chroma has no offset, so the wider vector fetch replaces the first one
+                    if widen_vector:
+                        vector_results = more_vector
+                    graph_results.extend(more_graph)
             
             # Combine and re-rank results
             combined_results = self._combine_results(
@@ -263,124 +1003,71 @@ class GraphRAGService:
         """
         Convert filters to Chroma format.
         
+        Identical filter dicts are served from a cache; filters with
+        unhashable values fall back to a direct conversion.
+        
         Args:
             filters: Filters in API format
             
         Returns:
             Filters in Chroma format
         """
-        if not filters:
-            return None
-        
-        chroma_filters = {}
-        
-        # Map filters to Chroma format
-        for key, value in filters.items():
-            if key == "category":
-                chroma_filters["category"] = value
-            elif key == "published_after":
-                chroma_filters["published_date"] = {"$gte": value}
-            elif key == "published_before":
-                chroma_filters["published_date"] = {"$lte": value}
-            elif key == "author":
-                chroma_filters["author"] = value
-            elif key == "keywords":
-                # Not directly supported in Chroma - would need a different approach
-                pass
-            else:
-                # Pass through other filters directly
-                chroma_filters[key] = value
-        
-        return chroma_filters if chroma_filters else None
+        try:
+            return _convert_filters_to_chroma_cached(_freeze(filters))
+        except TypeError:
+            return _convert_filters_to_chroma(filters)
 
     def _build_graph_query(
         self, 
         query: str,
         filters: Optional[Dict[str, Any]] = None,
         pmqa_reference: Optional[Dict[str, str]] = None,
-        top_k: int = 10
+        top_k: int = 10,
+        skip: int = 0
     ) -> tuple:
         """
         Build Cypher query for graph search.
         
+        Only the parameters are built per call; the query text is looked up
+        from a template cache keyed by the PMQA level and whether the query is
+        empty; unused filters are null.
+        
         Args:
             query: Search query
             filters: Optional filters for search
             pmqa_reference: Optional PMQA reference to focus the search
             top_k: Number of top results to return
+            skip: Number of top-ranked results to skip
             
         Returns:
             Tuple of (query_string, parameters)
         """
         # Initialize parameters
         params = {
-            "query": query,
+            "query": _escape_lucene(query),
+            "skip": skip,
             "limit": top_k
         }
+        mask = 0 if query.strip() else _MATCH_ALL
         
-        # Start building the query
-        match_clauses = []
-        where_clauses = []
-        
-        # Base match clause for chunks and documents
-        match_clauses.append("MATCH (chunk:Chunk)-[:HAS_CHUNK]-(document:Document)")
-        
-        # Add PMQA reference if provided
+        # Add PMQA reference if provided (most specific level wins)
         if pmqa_reference:
             if "criteria_id" in pmqa_reference:
-                match_clauses.append("MATCH (chunk)-[:RELATES_TO]->(criteria:Criteria)")
-                where_clauses.append("criteria.id = $criteriaId")
+                mask |= _PMQA_CRITERIA
                 params["criteriaId"] = pmqa_reference["criteria_id"]
             elif "subcategory_id" in pmqa_reference:
-                match_clauses.append("MATCH (chunk)-[:RELATES_TO]->(subcategory:Subcategory)")
-                where_clauses.append("subcategory.id = $subcategoryId")
+                mask |= _PMQA_SUBCATEGORY
                 params["subcategoryId"] = pmqa_reference["subcategory_id"]
             elif "category_id" in pmqa_reference:
-                match_clauses.append("MATCH (chunk)-[:RELATES_TO]->(category:Category)")
-                where_clauses.append("category.id = $categoryId")
+                mask |= _PMQA_CATEGORY
                 params["categoryId"] = pmqa_reference["category_id"]
         
-        # Add filters if provided
-        if filters:
-            if "category" in filters:
-                where_clauses.append("document.category = $category")
-                params["category"] = filters["category"]
-            if "published_after" in filters:
-                where_clauses.append("document.published_date >= $publishedAfter")
-                params["publishedAfter"] = filters["published_after"]
-            if "published_before" in filters:
-                where_clauses.append("document.published_date <= $publishedBefore")
-                params["publishedBefore"] = filters["published_before"]
-            if "author" in filters:
-                where_clauses.append("document.author = $author")
-                params["author"] = filters["author"]
-        
-        # Add text search
-        where_clauses.append("chunk.content CONTAINS $query OR document.title CONTAINS $query")
-        
-        # Get PMQA references
-        with_clause = """
-        OPTIONAL MATCH (chunk)-[:RELATES_TO]->(pmqa)
-        WHERE pmqa:Category OR pmqa:Subcategory OR pmqa:Criteria
-        WITH document, chunk, collect(pmqa) as pmqaRefs,
-        CASE
-            WHEN chunk.content CONTAINS $query THEN 3
-            WHEN document.title CONTAINS $query THEN 2
-            ELSE 1
-        END as score
-        """
-        
-        # Build full query
-        query_string = f"""
-        {' '.join(match_clauses)}
-        {' AND '.join(['WHERE ' + clause for clause in where_clauses]) if where_clauses else ''}
-        {with_clause}
-        RETURN document, chunk, pmqaRefs, score
-        ORDER BY score DESC
-        LIMIT $limit
-        """
-        
-        return query_string, params
+        # Add filters, passing null for the ones not provided
+        filters = filters or {}
+        for filter_key, param_name, _ in _GRAPH_FILTERS:
+            params[param_name] = filters.get(filter_key)
+        
+        return _graph_query_template(mask), params
 
     def _combine_results(
         self, 
@@ -393,76 +1080,33 @@ class GraphRAGService:
         """
         Combine and re-rank results from vector and graph search.
         
+        Graph scores are unbounded Lucene scores, so they are divided by the
+        best graph score first to put them on the same 0-1 scale as the
+        vector similarities.
+        
         Args:
             vector_results: Results from vector search
             graph_results: Results from graph search
-            vector_weight: Weight for vector search results (0-1)
-            graph_weight: Weight for graph search results (0-1)
+            vector_weight: Normalized weight for vector search results (0-1)
+            graph_weight: Normalized weight for graph search results (0-1)
             top_k: Number of top results to return
             
         Returns:
             Combined and re-ranked results
         """
-        # Normalize weights
-        total_weight = vector_weight + graph_weight
-        if total_weight == 0:
+        if top_k <= 0:
             return []
-            
-        vector_weight = vector_weight / total_weight
-        graph_weight = graph_weight / total_weight
         
-        # Create a dictionary to combine results by chunk_id
-        combined_dict = {}
+        graph_max = max((result["score"] for result in graph_results), default=0.0)
+        graph_scale = 1.0 / graph_max if graph_max > 0 else 0.0
         
-        # Add vector results
+        table = _ScoreTable()
         for result in vector_results:
-            chunk_id = result["chunk_id"]
-            if chunk_id in combined_dict:
-                # Update existing entry
-                combined_dict[chunk_id]["vector_score"] = result["score"]
-                combined_dict[chunk_id]["combined_score"] += result["score"] * vector_weight
-            else:
-                # Create new entry
-                result["vector_score"] = result["score"]
-                result["graph_score"] = 0.0
-                result["combined_score"] = result["score"] * vector_weight
-                combined_dict[chunk_id] = result
-        
-        # Add graph results
+            table.upsert_vector(result["chunk_id"], result["score"], result)
         for result in graph_results:
-            chunk_id = result["chunk_id"]
-            if chunk_id in combined_dict:
-                # Update existing entry
-                combined_dict[chunk_id]["graph_score"] = result["score"]
-                combined_dict[chunk_id]["combined_score"] += result["score"] * graph_weight
-                
-                # Merge PMQA references if needed
-                existing_refs = {
-                    (ref.get("category_id", ""), ref.get("subcategory_id", ""), ref.get("criteria_id", ""))
-                    for ref in combined_dict[chunk_id]["pmqa_references"]
-                }
-                
-                for ref in result["pmqa_references"]:
-                    ref_tuple = (ref.get("category_id", ""), ref.get("subcategory_id", ""), ref.get("criteria_id", ""))
-                    if ref_tuple not in existing_refs:
-                        combined_dict[chunk_id]["pmqa_references"].append(ref)
-            else:
-                # Create new entry
-                result["vector_score"] = 0.0
-                result["graph_score"] = result["score"]
-                result["combined_score"] = result["score"] * graph_weight
-                combined_dict[chunk_id] = result
-        
-        # Convert dictionary back to list and sort by combined score
-        combined_results = list(combined_dict.values())
-        combined_results.sort(key=lambda x: x["combined_score"], reverse=True)
-        
-        # Update the score field to be the combined score
-        for result in combined_results:
-            result["score"] = result["combined_score"]
+            table.upsert_graph(result["chunk_id"], result["score"] * graph_scale, result)
         
-        # Return top k results
-        return combined_results[:top_k]
+        return table.top_k(vector_weight, graph_weight, top_k)
 
 
 # Create a singleton instance
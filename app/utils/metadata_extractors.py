@@ -1,10 +1,102 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from functools import lru_cache
+from itertools import islice
 import os
 import re
 import json
 import datetime
+import yaml
 from loguru import logger
 
+try:
+    # libyaml C backend when available
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+# Filename date patterns: (compiled pattern, (year, month, day) group indices)
+_FILENAME_DATE_PATTERNS = [
+    # YYYY-MM-DD
+    (re.compile(r'(\d{4})[_-](\d{1,2})[_-](\d{1,2})'), (1, 2, 3)),
+    # DD-MM-YYYY
+    (re.compile(r'(\d{1,2})[_-](\d{1,2})[_-](\d{4})'), (3, 2, 1)),
+    # Plain YYYYMMDD
+    (re.compile(r'(\d{4})(\d{2})(\d{2})'), (1, 2, 3))
+]
+_CATEGORY_RE = re.compile(r'หมวด[_-]?(\d)', re.IGNORECASE)
+# Date and category fragments removed from filename titles in one pass
+_TITLE_STRIP_RE = re.compile(
+    r'\d{4}[_-]\d{1,2}[_-]\d{1,2}|\d{1,2}[_-]\d{1,2}[_-]\d{4}|\d{8}|หมวด[_-]?\d',
+    re.IGNORECASE
+)
+# Separators turned into spaces before whitespace is collapsed
+_SEP_TRANS = str.maketrans("_-", "  ")
+_FILE_TITLE_DATE_RES = (
+    re.compile(r'\d{4}[_-]\d{2}[_-]\d{2}'),
+    re.compile(r'\d{2}[_-]\d{2}[_-]\d{4}')
+)
+
+# Text date formats in one alternation so the sample is scanned once;
+# the named group that matched identifies the format
+_TEXT_DATE_RE = re.compile(
+    r'(?P<dmy>วันที่\s*(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}))'
+    r'|(?P<ymd>(\d{4})[/.-](\d{1,2})[/.-](\d{1,2}))'
+    r'|(?P<thai>ลงวันที่\s*(\d{1,2})\s*(มกราคม|กุมภาพันธ์|มีนาคม|เมษายน|พฤษภาคม|มิถุนายน|กรกฎาคม|สิงหาคม|กันยายน|ตุลาคม|พฤศจิกายน|ธันวาคม)\s*(\d{4}))'
+)
+# Formats in priority order, mapped to the index of their first field group
+_TEXT_DATE_GROUPS = {"dmy": 2, "ymd": 6, "thai": 10}
+# Both Thai formats contain this literal; without it only YYYY-MM-DD can match
+_THAI_DATE_MARKER = "วันที่"
+_YMD_DATE_RE = re.compile(r'(\d{4})[/.-](\d{1,2})[/.-](\d{1,2})')
+
+# Thai month mapping
+_THAI_MONTHS = {
+    "มกราคม": 1, "กุมภาพันธ์": 2, "มีนาคม": 3, "เมษายน": 4,
+    "พฤษภาคม": 5, "มิถุนายน": 6, "กรกฎาคม": 7, "สิงหาคม": 8,
+    "กันยายน": 9, "ตุลาคม": 10, "พฤศจิกายน": 11, "ธันวาคม": 12
+}
+
+_DATE_LINE_RE = re.compile(r'\d+[/.-]\d+[/.-]\d+$')
+# Titles are only looked for near the top of the document
+_TITLE_SEARCH_LINES = 100
+_ORG_RES = (
+    re.compile(r'(?:โดย|จัดทำโดย|จาก|ผู้จัดทำ)[:\s]+([\w\s]+)'),
+    re.compile(r'(กรม[\w\s]+|สำนัก[\w\s]+|กระทรวง[\w\s]+)')
+)
+_PMQA_RE = re.compile(r'หมวด(?:ที่)?\s*(\d)\s*[:-]?\s*([\w\s]+)')
+
+# MIME types for the document formats we extract metadata from
+_EXT_TO_MIME = {
+    ".txt": "text/plain",
+    ".md": "text/markdown",
+    ".markdown": "text/markdown",
+    ".pdf": "application/pdf",
+    ".docx": "application/msword",
+    ".doc": "application/msword",
+    ".html": "text/html"
+}
+
+_PDF_DATE_RE = re.compile(r'D:(\d{4})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})')
+_YAML_FM_RE = re.compile(r'---\s+(.*?)\s+---', re.DOTALL)
+_JSON_FM_RE = re.compile(r'```json\s+(.*?)\s+```', re.DOTALL)
+
+
+@lru_cache(maxsize=256)
+def _iso_from_ts(timestamp: int) -> str:
+    """
+    Format a file timestamp (whole seconds) as an ISO 8601 local time string.
+    
+    Files imported in one batch usually share timestamps, so results are memoized.
+    
+    Args:
+        timestamp: POSIX timestamp in whole seconds
+        
+    Returns:
+        ISO 8601 formatted date-time
+    """
+    return datetime.datetime.fromtimestamp(timestamp).isoformat()
+
 
 def extract_metadata_from_filename(filename: str) -> Dict[str, Any]:
     """
@@ -16,6 +108,23 @@ def extract_metadata_from_filename(filename: str) -> Dict[str, Any]:
     Returns:
         Dictionary of extracted metadata
     """
+    return dict(_extract_metadata_from_filename_cached(filename))
+
+
+@lru_cache(maxsize=4096)
+def _extract_metadata_from_filename_cached(filename: str) -> Tuple[Tuple[str, Any], ...]:
+    """
+    Extract metadata from a filename, memoized per process.
+    
+    Re-indexing and retries see the same filenames repeatedly; the result is
+    returned as an immutable tuple of items so cached entries can't be mutated.
+    
+    Args:
+        filename: Name of the file
+        
+    Returns:
+        Tuple of (key, value) metadata items
+    """
     metadata = {}
     
     # Extract file extension
@@ -24,27 +133,15 @@ def extract_metadata_from_filename(filename: str) -> Dict[str, Any]:
         metadata["extension"] = ext.lower().lstrip(".")
     
     # Try to extract date from filename
-    date_patterns = [
-        # YYYY-MM-DD
-        (r'(\d{4})[_-](\d{1,2})[_-](\d{1,2})', "%Y-%m-%d"),
-        # DD-MM-YYYY
-        (r'(\d{1,2})[_-](\d{1,2})[_-](\d{4})', "%d-%m-%Y"),
-        # Plain YYYYMMDD
-        (r'(\d{4})(\d{2})(\d{2})', "%Y%m%d")
-    ]
-    
-    for pattern, date_format in date_patterns:
-        match = re.search(pattern, filename)
+    for pattern, (year_idx, month_idx, day_idx) in _FILENAME_DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
             try:
-                if date_format == "%Y-%m-%d":
-                    date_str = f"{match.group(1)}-{match.group(2)}-{match.group(3)}"
-                elif date_format == "%d-%m-%Y":
-                    date_str = f"{match.group(1)}-{match.group(2)}-{match.group(3)}"
-                else:  # %Y%m%d
-                    date_str = f"{match.group(1)}-{match.group(2)}-{match.group(3)}"
-                
-                date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d")
+                date_obj = datetime.datetime(
+                    int(match.group(year_idx)),
+                    int(match.group(month_idx)),
+                    int(match.group(day_idx))
+                )
                 metadata["date"] = date_obj.isoformat()
                 break
             except ValueError:
@@ -52,7 +149,7 @@ def extract_metadata_from_filename(filename: str) -> Dict[str, Any]:
                 pass
     
     # Extract PMQA category if present
-    category_match = re.search(r'หมวด[_-]?(\d)', filename, re.IGNORECASE)
+    category_match = _CATEGORY_RE.search(filename)
     if category_match:
         category_num = category_match.group(1)
         metadata["category"] = f"หมวด_{category_num}"
@@ -60,19 +157,15 @@ def extract_metadata_from_filename(filename: str) -> Dict[str, Any]:
     # Extract title
     # Remove extension and clean up
     title = os.path.splitext(filename)[0]
-    # Remove date patterns
-    for pattern, _ in date_patterns:
-        title = re.sub(pattern, "", title)
-    # Remove category pattern
-    title = re.sub(r'หมวด[_-]?\d', "", title, flags=re.IGNORECASE)
+    # Remove date and category patterns
+    title = _TITLE_STRIP_RE.sub("", title)
     # Clean up separators and extra spaces
-    title = re.sub(r'[_-]+', " ", title)
-    title = re.sub(r'\s+', " ", title).strip()
+    title = " ".join(title.translate(_SEP_TRANS).split())
     
     if title:
         metadata["title"] = title
     
-    return metadata
+    return tuple(metadata.items())
 
 
 def extract_metadata_from_text(text: str) -> Dict[str, Any]:
@@ -87,46 +180,47 @@ def extract_metadata_from_text(text: str) -> Dict[str, Any]:
     """
     metadata = {}
     
-    # Try to extract date
-    date_patterns = [
-        # Common formats with various separators
-        r'วันที่\s*(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})',
-        r'(\d{4})[/.-](\d{1,2})[/.-](\d{1,2})',
-        r'ลงวันที่\s*(\d{1,2})\s*(มกราคม|กุมภาพันธ์|มีนาคม|เมษายน|พฤษภาคม|มิถุนายน|กรกฎาคม|สิงหาคม|กันยายน|ตุลาคม|พฤศจิกายน|ธันวาคม)\s*(\d{4})'
-    ]
-    
-    # Thai month mapping
-    thai_months = {
-        "มกราคม": 1, "กุมภาพันธ์": 2, "มีนาคม": 3, "เมษายน": 4,
-        "พฤษภาคม": 5, "มิถุนายน": 6, "กรกฎาคม": 7, "สิงหาคม": 8,
-        "กันยายน": 9, "ตุลาคม": 10, "พฤศจิกายน": 11, "ธันวาคม": 12
-    }
-    
     # Check first 2000 characters for date
     text_sample = text[:2000]
     
-    for pattern in date_patterns:
-        match = re.search(pattern, text_sample)
+    # Record the date fields of the first match of each format in a single scan
+    first_matches = {}
+    if _THAI_DATE_MARKER not in text_sample:
+        # Cheap literal pre-filter: skip the Thai alternatives (including the month names)
+        match = _YMD_DATE_RE.search(text_sample)
         if match:
+            first_matches["ymd"] = match.groups()
+    else:
+        for match in _TEXT_DATE_RE.finditer(text_sample):
+            if match.lastgroup not in first_matches:
+                group = _TEXT_DATE_GROUPS[match.lastgroup]
+                first_matches[match.lastgroup] = match.group(group, group + 1, group + 2)
+                if len(first_matches) == len(_TEXT_DATE_GROUPS):
+                    break
+    
+    for order in _TEXT_DATE_GROUPS:
+        fields = first_matches.get(order)
+        if fields:
+            first, second, third = fields
             try:
-                if len(match.groups()) == 3 and match.group(2) in thai_months:
+                if order == "thai":
                     # Thai format with month name
-                    day = int(match.group(1))
-                    month = thai_months[match.group(2)]
-                    year = int(match.group(3))
+                    day = int(first)
+                    month = _THAI_MONTHS[second]
+                    year = int(third)
                     # Adjust for Thai year if needed
                     if year > 2400:
                         year -= 543
-                elif pattern.startswith(r'(\d{4})'):
+                elif order == "ymd":
                     # YYYY-MM-DD format
-                    year = int(match.group(1))
-                    month = int(match.group(2))
-                    day = int(match.group(3))
+                    year = int(first)
+                    month = int(second)
+                    day = int(third)
                 else:
                     # DD-MM-YYYY format
-                    day = int(match.group(1))
-                    month = int(match.group(2))
-                    year = int(match.group(3))
+                    day = int(first)
+                    month = int(second)
+                    year = int(third)
                 
                 date_obj = datetime.datetime(year, month, day)
                 metadata["date"] = date_obj.isoformat()
@@ -135,46 +229,37 @@ def extract_metadata_from_text(text: str) -> Dict[str, Any]:
                 # Invalid date, continue to next pattern
                 pass
     
-    # Try to extract title from first non-empty line
-    lines = text.split('\n')
-    for line in lines:
+    # Try to extract title from the first suitable line among the first _TITLE_SEARCH_LINES
+    for line in islice(text.split('\n', _TITLE_SEARCH_LINES), _TITLE_SEARCH_LINES):
         line = line.strip()
-        if line and len(line) > 5 and len(line) < 200:  # Reasonable title length
-            # Check if it's not a date line or other metadata
-            if not re.search(r'^\d+[/.-]\d+[/.-]\d+$', line) and not re.search(r'^วันที่', line):
-                metadata["title"] = line
-                break
+        # Reasonable title length (cheapest checks first)
+        if not 5 < len(line) < 200:
+            continue
+        # Skip date lines and other metadata
+        if line.startswith(_THAI_DATE_MARKER):
+            continue
+        if line[0].isdigit() and _DATE_LINE_RE.match(line):
+            continue
+        metadata["title"] = line
+        break
     
     # Try to extract author/organization
-    org_patterns = [
-        r'(?:โดย|จัดทำโดย|จาก|ผู้จัดทำ)[:\s]+([\w\s]+)',
-        r'(กรม[\w\s]+|สำนัก[\w\s]+|กระทรวง[\w\s]+)'
-    ]
-    
-    for pattern in org_patterns:
-        match = re.search(pattern, text_sample)
+    for pattern in _ORG_RES:
+        match = pattern.search(text_sample)
         if match:
             author = match.group(1).strip()
             metadata["author"] = author
             break
     
     # Try to extract PMQA category
-    pmqa_patterns = [
-        r'หมวด\s*(\d)\s*[:-]?\s*([\w\s]+)',
-        r'หมวดที่\s*(\d)\s*[:-]?\s*([\w\s]+)'
-    ]
-    
-    for pattern in pmqa_patterns:
-        match = re.search(pattern, text_sample)
-        if match:
-            category_num = match.group(1)
-            metadata["category"] = f"หมวด_{category_num}"
-            
-            # Get category name if available
-            if match.group(2):
-                metadata["category_name"] = match.group(2).strip()
-            
-            break
+    match = _PMQA_RE.search(text_sample)
+    if match:
+        category_num = match.group(1)
+        metadata["category"] = f"หมวด_{category_num}"
+        
+        # Get category name if available
+        if match.group(2):
+            metadata["category_name"] = match.group(2).strip()
     
     return metadata
 
@@ -210,7 +295,7 @@ def extract_metadata_from_pdf_info(pdf_info: Dict[str, Any]) -> Dict[str, Any]:
             # Handle dates
             if meta_field.endswith('_date') and isinstance(value, str):
                 # Try to parse PDF date format (D:YYYYMMDDHHmmSS)
-                date_match = re.match(r'D:(\d{4})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})', value)
+                date_match = _PDF_DATE_RE.match(value)
                 if date_match:
                     try:
                         year = int(date_match.group(1))
@@ -252,26 +337,34 @@ def extract_metadata_from_frontmatter(text: str) -> Dict[str, Any]:
     metadata = {}
     
     # Check for YAML frontmatter (---)
-    yaml_match = re.match(r'---\s+(.*?)\s+---', text, re.DOTALL)
+    yaml_match = _YAML_FM_RE.match(text)
     if yaml_match:
         try:
-            # For proper YAML parsing we would use PyYAML here,
-            # but for simplicity we'll just extract key-value pairs
-            frontmatter = yaml_match.group(1)
-            for line in frontmatter.split("\n"):
-                if ":" in line:
-                    key, value = line.split(":", 1)
-                    key = key.strip()
-                    value = value.strip()
-                    if key and value:
-                        metadata[key] = value
+            try:
+                frontmatter = yaml.load(yaml_match.group(1), Loader=_YamlLoader)
+            except yaml.YAMLError:
+                # Loosely written frontmatter (e.g. unquoted colons): fall back to key: value lines
+                frontmatter = dict(
+                    (part.strip() for part in line.split(":", 1))
+                    for line in yaml_match.group(1).split("\n")
+                    if ":" in line
+                )
+            
+            if isinstance(frontmatter, dict):
+                for key, value in frontmatter.items():
+                    if not key or value is None or value == "":
+                        continue
+                    # YAML dates load as date objects; keep metadata JSON-serializable
+                    if isinstance(value, (datetime.date, datetime.datetime)):
+                        value = value.isoformat()
+                    metadata[str(key)] = value
             
             return metadata
         except Exception as e:
             logger.error(f"Error parsing YAML frontmatter: {str(e)}")
     
     # Check for JSON frontmatter (```json)
-    json_match = re.match(r'```json\s+(.*?)\s+```', text, re.DOTALL)
+    json_match = _JSON_FM_RE.match(text)
     if json_match:
         try:
             frontmatter = json_match.group(1)
@@ -285,7 +378,9 @@ def extract_metadata_from_frontmatter(text: str) -> Dict[str, Any]:
 
 def extract_metadata_from_file(
     file_path: str, 
-    file_content: str = None
+    file_content: str = None,
+    *,
+    stat_result: Optional[os.stat_result] = None
 ) -> Dict[str, Any]:
     """
     Extract metadata from a file using all available methods.
@@ -293,6 +388,7 @@ def extract_metadata_from_file(
     Args:
         file_path: Path to the file
         file_content: Optional file content (to avoid reading large files multiple times)
+        stat_result: Optional stat result (e.g. DirEntry.stat() from os.scandir) to skip the stat call
         
     Returns:
         Dictionary of extracted metadata
@@ -302,14 +398,14 @@ def extract_metadata_from_file(
     try:
         # Get basic file info
         filename = os.path.basename(file_path)
-        file_stats = os.stat(file_path)
+        file_stats = stat_result if stat_result is not None else os.stat(file_path)
         
         metadata.update({
             "filename": filename,
             "file_path": file_path,
             "size": file_stats.st_size,
-            "created_at": datetime.datetime.fromtimestamp(file_stats.st_ctime).isoformat(),
-            "modified_at": datetime.datetime.fromtimestamp(file_stats.st_mtime).isoformat()
+            "created_at": _iso_from_ts(int(file_stats.st_ctime)),
+            "modified_at": _iso_from_ts(int(file_stats.st_mtime))
         })
         
         # Extract metadata from filename
@@ -318,16 +414,7 @@ def extract_metadata_from_file(
         
         # Get MIME type
         extension = os.path.splitext(filename)[1].lower()
-        mime_type = None
-        
-        if extension in ['.txt', '.md', '.markdown']:
-            mime_type = f"text/{extension[1:]}"
-        elif extension == '.pdf':
-            mime_type = "application/pdf"
-        elif extension in ['.docx', '.doc']:
-            mime_type = "application/msword"
-        elif extension == '.html':
-            mime_type = "text/html"
+        mime_type = _EXT_TO_MIME.get(extension)
         
         if mime_type:
             metadata["mimetype"] = mime_type
@@ -362,12 +449,11 @@ def extract_metadata_from_file(
         if "category" in metadata and "title" not in metadata:
             title = os.path.splitext(filename)[0]
             # Remove category and date information
-            title = re.sub(r'หมวด[_-]?\d', "", title, flags=re.IGNORECASE)
-            title = re.sub(r'\d{4}[_-]\d{2}[_-]\d{2}', "", title)
-            title = re.sub(r'\d{2}[_-]\d{2}[_-]\d{4}', "", title)
+            title = _CATEGORY_RE.sub("", title)
+            for pattern in _FILE_TITLE_DATE_RES:
+                title = pattern.sub("", title)
             # Clean up separators and extra spaces
-            title = re.sub(r'[_-]+', " ", title)
-            title = re.sub(r'\s+', " ", title).strip()
+            title = " ".join(title.translate(_SEP_TRANS).split())
             
             if title:
                 metadata["title"] = title
@@ -376,3 +462,4 @@ def extract_metadata_from_file(
         logger.error(f"Error extracting metadata from file {file_path}: {str(e)}")
     
     return metadata
+
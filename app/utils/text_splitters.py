@@ -1,4 +1,5 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
+from bisect import bisect_left
 import re
 
 
@@ -30,63 +31,138 @@ def split_text_by_chunk(
     if len(text) <= chunk_size:
         return [text]
     
-    # Split text by separator
-    splits = text.split(separator)
+    # Track splits as offsets so each chunk is one slice of the original text
+    return list(_split_by_offsets(text, separator, chunk_size, chunk_overlap))
+
+
+def _iter_split_offsets(text: str, separator: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) offsets of the pieces of text between separators.
     
-    # Initialize chunks
-    chunks = []
-    current_chunk = []
+    Equivalent to text.split(separator) without materializing the pieces.
+    
+    Args:
+        text: Text to split
+        separator: Non-empty separator string
+        
+    Returns:
+        Iterator of (start, end) character offsets into text
+    """
+    sep_len = len(separator)
+    start = 0
+    while True:
+        end = text.find(separator, start)
+        if end == -1:
+            yield start, len(text)
+            return
+        yield start, end
+        start = end + sep_len
+
+
+def _split_by_offsets(
+    text: str,
+    separator: str,
+    chunk_size: int,
+    chunk_overlap: int
+) -> Iterator[str]:
+    """
+    Chunk text by separator, tracking splits as offsets into the original text.
+    
+    Each emitted chunk is a single slice of text, so no per-split strings
+    are created.
+    
+    Args:
+        text: Text to split
+        separator: String to split on
+        chunk_size: Maximum size of each chunk
+        chunk_overlap: Overlap between chunks
+        
+    Returns:
+        Iterator of text chunks
+    """
+    if not separator:
+        raise ValueError("empty separator")
+    
+    sep_len = len(separator)
+    
+    # Start offsets and lengths of the splits in the current chunk
+    split_starts = []
+    split_lens = []
+    chunk_end = 0
     current_length = 0
     
-    for split in splits:
-        # Add separator back to the split except for the first one
-        if current_length > 0:
-            split_with_separator = separator + split
-        else:
-            split_with_separator = split
+    text_length = len(text)
+    
+    for start, end in _iter_split_offsets(text, separator):
+        # If everything left fits in the current chunk, emit it in one slice and stop
+        remaining = text_length - start + (sep_len if current_length > 0 else 0)
+        if current_length + remaining <= chunk_size:
+            yield text[split_starts[0] if split_starts else start:]
+            return
         
-        split_length = len(split_with_separator)
+        # Count the separator that joins this split to the previous one
+        split_length = end - start + sep_len if current_length > 0 else end - start
         
         # If adding this split would exceed the chunk size and we already have content,
         # finish the current chunk and start a new one
         if current_length + split_length > chunk_size and current_length > 0:
-            chunks.append(separator.join(current_chunk))
+            yield text[split_starts[0]:chunk_end]
             
             # If we have overlap, keep some of the current chunk for the next one
             if chunk_overlap > 0:
-                # Find where to start the next chunk by figuring out which splits to keep
+                # Walk back from the end until the kept splits exceed the overlap target
                 overlap_length = 0
-                overlap_splits = []
+                i = len(split_starts)
+                while i > 0 and overlap_length <= chunk_overlap:
+                    i -= 1
+                    overlap_length += split_lens[i] + (sep_len if i > 0 else 0)
                 
-                for i in range(len(current_chunk) - 1, -1, -1):
-                    split_text = current_chunk[i]
-                    if i > 0:  # Add separator for all except the first split
-                        split_text = separator + split_text
-                    
-                    overlap_length += len(split_text)
-                    
-                    if overlap_length > chunk_overlap:
-                        # We've reached our overlap target
-                        overlap_splits = current_chunk[i:]
-                        break
-                    
-                    overlap_splits.insert(0, current_chunk[i])
-                
-                current_chunk = overlap_splits
-                current_length = sum(len(s) + len(separator) for s in current_chunk[:-1]) + len(current_chunk[-1])
+                split_starts = split_starts[i:]
+                split_lens = split_lens[i:]
+                # The first kept split has no leading separator
+                current_length = overlap_length - (sep_len if i > 0 else 0)
             else:
-                current_chunk = []
+                split_starts = []
+                split_lens = []
                 current_length = 0
         
         # Add the current split to the chunk
-        current_chunk.append(split)
+        split_starts.append(start)
+        split_lens.append(end - start)
+        chunk_end = end
         current_length += split_length
     
     # Add the final chunk if there's anything left
-    if current_chunk:
-        chunks.append(separator.join(current_chunk))
+    if split_starts:
+        yield text[split_starts[0]:chunk_end]
+
+
+# Simple sentence splitter pattern: sentence-ending punctuation plus the whitespace after it.
+# Matching the punctuation directly (instead of a lookbehind) lets the engine scan for
+# the character class first; the punctuation is kept with the preceding sentence.
+_SENTENCE_END_RE = re.compile(r'[.!?]\s+')
+
+
+def _iter_sentences(text: str) -> Iterator[str]:
+    """
+    Yield the non-empty sentences of text one at a time.
     
-    return chunks
+    Args:
+        text: Text to split
+        
+    Returns:
+        Iterator of sentences
+    """
+    pos = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        sentence = text[pos:match.start() + 1]
+        if sentence.strip():
+            yield sentence
+        pos = match.end()
+    
+    sentence = text[pos:]
+    if sentence.strip():
+        yield sentence
 
 
 def split_text_by_sentence(
@@ -107,31 +183,25 @@ def split_text_by_sentence(
     Returns:
         List of text chunks
     """
-    # Simple sentence splitter pattern
-    sentence_endings = r'(?<=[.!?])\s+'
-    sentences = re.split(sentence_endings, text)
-    
-    # Remove empty sentences
-    sentences = [s for s in sentences if s.strip()]
-    
     # If the text is short enough, return it as a single chunk
     if len(text) <= chunk_size:
         return [text]
     
-    # Initialize chunks
+    # Initialize chunks; sentence_cum holds prefix sums of the sentence lengths in current_chunk
     chunks = []
     current_chunk = []
-    current_length = 0
+    sentence_cum = [0]
     
-    for sentence in sentences:
+    for sentence in _iter_sentences(text):
         sentence_length = len(sentence)
+        current_length = sentence_cum[-1]
         
         # If a single sentence is longer than chunk_size, split it
         if sentence_length > chunk_size:
             if current_chunk:
                 chunks.append(" ".join(current_chunk))
                 current_chunk = []
-                current_length = 0
+                sentence_cum = [0]
             
             # Split the long sentence
             sentence_chunks = split_text_by_chunk(
@@ -151,29 +221,18 @@ def split_text_by_sentence(
             
             # If we have overlap, keep some sentences for the next chunk
             if chunk_overlap > 0:
-                # Keep sentences until we reach the desired overlap
-                overlap_length = 0
-                overlap_sentences = []
-                
-                for i in range(len(current_chunk) - 1, -1, -1):
-                    overlap_length += len(current_chunk[i])
-                    
-                    if overlap_length > chunk_overlap:
-                        # We've reached our overlap target
-                        overlap_sentences = current_chunk[i:]
-                        break
-                    
-                    overlap_sentences.insert(0, current_chunk[i])
-                
-                current_chunk = overlap_sentences
-                current_length = sum(len(s) for s in current_chunk)
+                # Keep the shortest tail of sentences longer than the overlap (or all of them)
+                cut = max(bisect_left(sentence_cum, current_length - chunk_overlap) - 1, 0)
+                base = sentence_cum[cut]
+                current_chunk = current_chunk[cut:]
+                sentence_cum = [length - base for length in sentence_cum[cut:]]
             else:
                 current_chunk = []
-                current_length = 0
+                sentence_cum = [0]
         
         # Add the current sentence to the chunk
         current_chunk.append(sentence)
-        current_length += sentence_length
+        sentence_cum.append(sentence_cum[-1] + sentence_length)
     
     # Add the final chunk if there's anything left
     if current_chunk:
@@ -212,6 +271,11 @@ def split_text_semantic(
     return split_text_by_sentence(text, chunk_size, chunk_overlap)
 
 
+# Markdown heading patterns
+_HEADING_SPLIT_RE = re.compile(r'(^|\n)(#{1,6} .+?(?:\n|$))')
+_HEADING_RE = re.compile(r'^#{1,6} ')
+
+
 def split_markdown(
     text: str,
     chunk_size: int = 1000,
@@ -229,12 +293,13 @@ def split_markdown(
         List of markdown chunks
     """
     # Try to split at heading boundaries first
-    heading_pattern = r'(^|\n)(#{1,6} .+?(?:\n|$))'
-    sections = re.split(heading_pattern, text)
+    sections = _HEADING_SPLIT_RE.split(text)
     
-    # Recombine the separated headings with their content
+    # Recombine the separated headings with their content.
+    # The current chunk is kept as a list of parts and joined once when emitted.
     chunks = []
-    current_chunk = ""
+    current_parts = []
+    current_len = 0
     heading = ""
     
     for i, section in enumerate(sections):
@@ -243,7 +308,7 @@ def split_markdown(
             continue
         
         # Check if this is a heading (starts with #)
-        if re.match(r'^#{1,6} ', section.strip()):
+        if _HEADING_RE.match(section.strip()):
             heading = section
             continue
         
@@ -256,33 +321,34 @@ def split_markdown(
         
         # If adding this section would exceed the chunk size and we already have content,
         # finish the current chunk and start a new one
-        if len(current_chunk) + len(section_with_heading) > chunk_size and current_chunk:
-            chunks.append(current_chunk)
+        if current_len + len(section_with_heading) > chunk_size and current_len:
+            chunk_str = "".join(current_parts)
+            chunks.append(chunk_str)
             
             # Calculate overlap
-            if chunk_overlap > 0 and len(current_chunk) > chunk_overlap:
+            if chunk_overlap > 0 and current_len > chunk_overlap:
                 # Try to find paragraph breaks for cleaner overlap
-                overlap_text = current_chunk[-chunk_overlap:]
-                paragraph_match = re.search(r'\n\n', overlap_text)
-                
-                if paragraph_match:
-                    overlap_start = len(overlap_text) - paragraph_match.start()
-                    current_chunk = current_chunk[-overlap_start:]
-                else:
-                    current_chunk = current_chunk[-chunk_overlap:]
+                overlap_start = chunk_str.find("\n\n", current_len - chunk_overlap)
+                if overlap_start == -1:
+                    overlap_start = current_len - chunk_overlap
+                current_parts = [chunk_str[overlap_start:]]
+                current_len -= overlap_start
             else:
-                current_chunk = ""
+                current_parts = []
+                current_len = 0
         
         # Add the current section to the chunk
-        current_chunk += section_with_heading
+        current_parts.append(section_with_heading)
+        current_len += len(section_with_heading)
         
         # If the current chunk is already over the chunk size, finish it
-        if len(current_chunk) > chunk_size:
-            chunks.append(current_chunk)
-            current_chunk = ""
+        if current_len > chunk_size:
+            chunks.append("".join(current_parts))
+            current_parts = []
+            current_len = 0
     
     # Add the final chunk if there's anything left
-    if current_chunk:
-        chunks.append(current_chunk)
+    if current_parts:
+        chunks.append("".join(current_parts))
     
     return chunks
@@ -0,0 +1,47 @@
+import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# API Base URL
+API_BASE_URL = "http://localhost:8000/api"
+
+# (connect, read) timeouts for API calls; answers from Claude take longer to generate
+TIMEOUT = (3, 30)
+POLL_TIMEOUT = (1, 3)
+LLM_TIMEOUT = (3, 120)
+
+@st.cache_resource
+def api():
+    """
+    Get the HTTP session shared by the app and all pages.
+
+    Kept in cache_resource so keep-alive connections to the API survive reruns.
+
+    Returns:
+        Pooled requests session
+    """
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries))
+    return session
+
+def error_detail(response):
+    """
+    Get a displayable error message from a failed API response.
+
+    Only JSON bodies are parsed; anything else (e.g. an HTML page from a proxy)
+    is shown as a truncated text snippet.
+
+    Args:
+        response: Failed requests response
+
+    Returns:
+        Error message
+    """
+    if "json" in response.headers.get("Content-Type", ""):
+        try:
+            return response.json().get("detail", "ไม่ทราบสาเหตุ")
+        except ValueError:
+            pass
+    return response.text[:200] or "ไม่ทราบสาเหตุ"
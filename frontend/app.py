@@ -3,9 +3,9 @@ import requests
 import json
 import os
 import time
-from datetime import datetime
-import pandas as pd
-import io
+from concurrent.futures import ThreadPoolExecutor
+
+from api_client import API_BASE_URL, TIMEOUT, POLL_TIMEOUT, LLM_TIMEOUT, api, error_detail
 
 # Set page configuration
 st.set_page_config(
@@ -15,11 +15,35 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# API Base URL
-API_BASE_URL = "http://localhost:8000/api"
+# Chat turns kept per session, and the longest source snippet stored with each answer
+_CHAT_HISTORY_SIZE = 50
+_SOURCE_SNIPPET_CHARS = 500
+
+# Chat turns rendered by default, and how many of those get a sources expander
+_CHAT_DISPLAY_WINDOW = 20
+_CHAT_SOURCES_WINDOW = 5
+
+# PMQA 4.0 category/subcategory/criteria counts, shown when the structure cannot be loaded
+_DEFAULT_PMQA_COUNTS = (7, 14, 28)
+
+# Search types and their display labels
+_SEARCH_TYPE_LABELS = {
+    "hybrid": "Hybrid Search (ผสม)",
+    "vector": "Vector Search (ค้นหาความคล้ายคลึง)",
+    "graph": "Graph Search (ค้นหาความสัมพันธ์)"
+}
+_SEARCH_TYPES = tuple(_SEARCH_TYPE_LABELS)
+
+# PMQA category IDs for the graph search / chat reference selectors
+_PMQA_SELECT_OPTIONS = ("", *(str(i) for i in range(1, 8)))
+
+# PMQA categories used by the page filters
+_PMQA_CATEGORIES = ("หมวด_1", "หมวด_2", "หมวด_3", "หมวด_4", "หมวด_5", "หมวด_6", "หมวด_7")
+_CATEGORY_OPTIONS = ("",) + _PMQA_CATEGORIES
+_DOCUMENT_CATEGORY_OPTIONS = _CATEGORY_OPTIONS + ("raw",)
 
 # CSS Styling
-st.markdown("""
+_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -71,7 +95,146 @@ st.markdown("""
         color: #9e9e9e;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Streamlit drops elements that are not re-sent on a rerun, so the styles are injected every time
+st.markdown(_CSS, unsafe_allow_html=True)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_pmqa_structure():
+    """
+    Fetch the PMQA structure from the API.
+    
+    The structure rarely changes, so the parsed payload is cached for an hour
+    instead of being refetched on every rerun.
+    
+    Returns:
+        PMQA structure as a dictionary
+    """
+    response = api().get(f"{API_BASE_URL}/pmqa/structure", timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _get_doc_count():
+    """
+    Get the total number of documents for the home page stat card.
+    
+    Returns:
+        Document count, or "N/A" if the API is unavailable
+    """
+    try:
+        response = api().get(f"{API_BASE_URL}/documents?limit=1", timeout=POLL_TIMEOUT)
+        if response.status_code == 200:
+            return response.json().get("total", 0)
+        return "N/A"
+    except Exception:
+        return "N/A"
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _fetch_health():
+    """
+    Fetch the health of the API and its backing services.
+    
+    Returns:
+        Health check response as a dictionary
+    """
+    response = api().get(f"{API_BASE_URL}/health", timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _pmqa_structure_markdown():
+    """
+    Render the PMQA structure as markdown, one block per category.
+    
+    Each category tab is then a single markdown element instead of one element
+    per category, subcategory and criterion.
+    
+    Returns:
+        List of (category ID, markdown) tuples
+    """
+    rendered = []
+    
+    for category in _fetch_pmqa_structure().get("categories", []):
+        parts = [
+            f"## {category['name']} (หมวด {category['id']})",
+            f"*{category['description']}*"
+        ]
+        
+        # Subcategories
+        subcategories = category.get("subcategories", [])
+        for subcategory in subcategories:
+            parts.append(f"### {subcategory['id']} {subcategory['name']}")
+            parts.append(f"*{subcategory['description']}*")
+            
+            # Criteria
+            criteria = subcategory.get("criteria", [])
+            for criterion in criteria:
+                parts.append(f"#### {criterion['id']} {criterion['name']}")
+                parts.append(f"*{criterion['description']}*")
+            if not criteria:
+                parts.append(f"> ไม่มีเกณฑ์ในหัวข้อย่อย {subcategory['id']}")
+        
+        if not subcategories:
+            parts.append(f"> ไม่มีหัวข้อย่อยในหมวด {category['id']}")
+        
+        rendered.append((category["id"], "\n\n".join(parts)))
+    
+    return rendered
+
+def _get_pmqa_counts():
+    """
+    Count the categories, subcategories and criteria in the PMQA structure.
+    
+    Returns:
+        Tuple of (category count, subcategory count, criteria count)
+    """
+    try:
+        categories = _fetch_pmqa_structure().get("categories", [])
+    except Exception:
+        return _DEFAULT_PMQA_COUNTS
+    
+    subcategories = [sub for category in categories for sub in category.get("subcategories", [])]
+    criteria_count = sum(len(sub.get("criteria", [])) for sub in subcategories)
+    return len(categories), len(subcategories), criteria_count
+
+@st.cache_resource
+def _executor():
+    """
+    Get the thread pool used to fetch page data concurrently.
+    
+    Returns:
+        Shared thread pool executor
+    """
+    return ThreadPoolExecutor(max_workers=4)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _list_documents(category: str, author: str, keyword: str):
+    """
+    List documents matching the given filters.
+    
+    Cached briefly so reruns triggered by unrelated widgets reuse the same list.
+    
+    Args:
+        category: PMQA category filter (empty for all)
+        author: Author filter (empty for all)
+        keyword: Keyword filter (empty for all)
+        
+    Returns:
+        Documents API response as a dictionary
+    """
+    params = {}
+    if category:
+        params["category"] = category
+    if author:
+        params["author"] = author
+    if keyword:
+        params["keyword"] = keyword
+    
+    response = api().get(f"{API_BASE_URL}/documents", params=params, timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.json()
 
 def main():
     # Sidebar navigation
@@ -112,17 +275,18 @@ def home_page():
     # System statistics
     st.markdown('<div class="sub-header">ภาพรวมระบบ</div>', unsafe_allow_html=True)
     
-    # Try to get document count
+    # Fetch the stats concurrently (each is cached across reruns)
+    doc_count_future = _executor().submit(_get_doc_count)
+    pmqa_counts_future = _executor().submit(_get_pmqa_counts)
     try:
-        response = requests.get(f"{API_BASE_URL}/documents?limit=1")
-        if response.status_code == 200:
-            doc_count = response.json().get("total", 0)
-        else:
-            doc_count = "N/A"
-    except:
+        doc_count = doc_count_future.result(timeout=3)
+    except Exception:
         doc_count = "N/A"
+    try:
+        category_count, subcategory_count, criteria_count = pmqa_counts_future.result(timeout=3)
+    except Exception:
+        category_count, subcategory_count, criteria_count = _DEFAULT_PMQA_COUNTS
     
-    # Mock data for demonstration
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -136,26 +300,26 @@ def home_page():
     with col2:
         st.markdown("""
         <div class="stat-card">
-            <div class="stat-value">7</div>
+            <div class="stat-value">{}</div>
             <div class="stat-label">หมวด PMQA</div>
         </div>
-        """, unsafe_allow_html=True)
+        """.format(category_count), unsafe_allow_html=True)
     
     with col3:
         st.markdown("""
         <div class="stat-card">
-            <div class="stat-value">14</div>
+            <div class="stat-value">{}</div>
             <div class="stat-label">หัวข้อย่อย</div>
         </div>
-        """, unsafe_allow_html=True)
+        """.format(subcategory_count), unsafe_allow_html=True)
     
     with col4:
         st.markdown("""
         <div class="stat-card">
-            <div class="stat-value">28</div>
+            <div class="stat-value">{}</div>
             <div class="stat-label">เกณฑ์การประเมิน</div>
         </div>
-        """, unsafe_allow_html=True)
+        """.format(criteria_count), unsafe_allow_html=True)
     
     # Feature cards
     st.markdown('<div class="sub-header">ฟังก์ชั่นการทำงาน</div>', unsafe_allow_html=True)
@@ -219,11 +383,7 @@ def upload_page():
         author = st.text_input("ผู้เขียน/หน่วยงาน (ไม่บังคับ)")
         
         # PMQA Categories for selection
-        categories = [
-            "หมวด_1", "หมวด_2", "หมวด_3", 
-            "หมวด_4", "หมวด_5", "หมวด_6", "หมวด_7"
-        ]
-        category = st.selectbox("หมวด PMQA (ไม่บังคับ)", [""] + categories)
+        category = st.selectbox("หมวด PMQA (ไม่บังคับ)", _CATEGORY_OPTIONS)
         
         tags = st.text_input("แท็ก (คั่นด้วยเครื่องหมายคอมม่า, ไม่บังคับ)")
         
@@ -245,174 +405,215 @@ def upload_page():
                 # Remove None values
                 form_data = {k: v for k, v in form_data.items() if v is not None}
                 
-                # Prepare the file
-                files = {"file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
+                # Pass the file object itself rather than a copy of its bytes
+                uploaded_file.seek(0)
+                files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
                 
                 # Send to API
-                response = requests.post(
+                response = api().post(
                     f"{API_BASE_URL}/documents",
                     files=files,
-                    data=form_data
+                    data=form_data,
+                    timeout=TIMEOUT
                 )
                 
                 if response.status_code == 202:
                     document_id = response.json().get("document_id")
                     st.success(f"อัปโหลดเอกสารสำเร็จ! กำลังประมวลผล... (ID: {document_id})")
                     
-                    # Display processing status
+                    # Track processing status outside the spinner
                     if document_id:
-                        st.info("สถานะการประมวลผล:")
-                        status_placeholder = st.empty()
-                        progress_bar = st.progress(0)
-                        
-                        # Poll for status updates
-                        complete = False
-                        retry_count = 0
-                        
-                        while not complete and retry_count < 30:  # Timeout after 30 tries
-                            try:
-                                status_response = requests.get(f"{API_BASE_URL}/documents/{document_id}/status")
-                                
-                                if status_response.status_code == 200:
-                                    status_data = status_response.json()
-                                    status = status_data.get("status", "unknown")
-                                    progress = status_data.get("progress", 0)
-                                    
-                                    # Update UI
-                                    status_placeholder.text(f"สถานะ: {status}, ความคืบหน้า: {progress}%")
-                                    progress_bar.progress(progress / 100)
-                                    
-                                    if status == "completed":
-                                        complete = True
-                                        st.success("ประมวลผลเอกสารเสร็จสิ้น!")
-                                        break
-                                    elif status == "failed":
-                                        st.error(f"ประมวลผลเอกสารล้มเหลว: {status_data.get('error', 'ไม่ทราบสาเหตุ')}")
-                                        break
-                                
-                                time.sleep(1)  # Wait for 1 second before polling again
-                                retry_count += 1
-                                
-                            except Exception as e:
-                                st.error(f"เกิดข้อผิดพลาดในการติดตามสถานะ: {str(e)}")
-                                break
-                        
-                        if not complete and retry_count >= 30:
-                            st.warning("หมดเวลาการติดตามสถานะ แต่เอกสารยังคงประมวลผลในเบื้องหลัง")
+                        _start_status_polling(document_id)
                 else:
-                    st.error(f"อัปโหลดเอกสารล้มเหลว: {response.json().get('detail', 'ไม่ทราบสาเหตุ')}")
+                    st.error(f"อัปโหลดเอกสารล้มเหลว: {error_detail(response)}")
             
             except Exception as e:
                 st.error(f"เกิดข้อผิดพลาด: {str(e)}")
+    
+    # Display processing status of uploaded documents
+    if st.session_state.get("pending_docs"):
+        st.info("สถานะการประมวลผล:")
+        if st.session_state.get("upload_done"):
+            for kind, message in st.session_state["upload_results"].values():
+                getattr(st, kind)(message)
+        else:
+            _poll_status()
+
+def _start_status_polling(document_id: str):
+    """
+    Add an uploaded document to the status poller.
+    
+    Starts a new batch if the previous one has finished.
+    
+    Args:
+        document_id: ID of the uploaded document
+    """
+    if st.session_state.get("upload_done", True):
+        st.session_state["pending_docs"] = []
+        st.session_state["upload_status"] = {}
+        st.session_state["upload_results"] = {}
+    
+    st.session_state["pending_docs"].append(document_id)
+    st.session_state["upload_done"] = False
+    
+    # Back off from 0.25s up to 4s between polls, giving up after 2 minutes
+    st.session_state["upload_delay"] = 0.25
+    st.session_state["upload_next_poll"] = 0.0
+    st.session_state["upload_deadline"] = time.monotonic() + 120
+
+@st.fragment(run_every="1s")
+def _poll_status():
+    """
+    Render the processing status of the uploaded documents.
+    
+    Runs as a fragment so each tick only reruns this block, not the whole page.
+    The API is only polled once the current backoff delay has elapsed, with one
+    batched request for all documents that are still processing.
+    """
+    state = st.session_state
+    results = state["upload_results"]
+    now = time.monotonic()
+    
+    pending = [document_id for document_id in state["pending_docs"] if document_id not in results]
+    if pending and now >= state["upload_next_poll"]:
+        try:
+            status_response = api().get(
+                f"{API_BASE_URL}/documents/status",
+                params={"ids": ",".join(pending)},
+                timeout=POLL_TIMEOUT
+            )
+            if status_response.status_code == 200:
+                for status_data in status_response.json():
+                    state["upload_status"][status_data["document_id"]] = status_data
+        except Exception as e:
+            for document_id in pending:
+                results[document_id] = ("error", f"เกิดข้อผิดพลาดในการติดตามสถานะ: {str(e)}")
+        
+        state["upload_delay"] = min(state["upload_delay"] * 1.5, 4.0)
+        state["upload_next_poll"] = now + state["upload_delay"]
+    
+    for document_id in state["pending_docs"]:
+        status_data = state["upload_status"].get(document_id, {})
+        status = status_data.get("status", "unknown")
+        progress = status_data.get("progress", 0)
+        
+        # Update UI
+        st.text(f"{document_id} - สถานะ: {status}, ความคืบหน้า: {progress}%")
+        st.progress(progress / 100)
+        
+        if document_id not in results:
+            if status == "completed":
+                results[document_id] = ("success", f"ประมวลผลเอกสาร {document_id} เสร็จสิ้น!")
+            elif status == "failed":
+                results[document_id] = ("error", f"ประมวลผลเอกสาร {document_id} ล้มเหลว: {status_data.get('error', 'ไม่ทราบสาเหตุ')}")
+            elif now > state["upload_deadline"]:
+                results[document_id] = ("warning", f"หมดเวลาการติดตามสถานะ แต่เอกสาร {document_id} ยังคงประมวลผลในเบื้องหลัง")
+    
+    # Stop ticking and let the full page render the final results
+    if len(results) == len(state["pending_docs"]):
+        state["upload_done"] = True
+        st.rerun()
 
 def documents_page():
     st.markdown('<div class="main-header">จัดการเอกสาร</div>', unsafe_allow_html=True)
     st.markdown("จัดการเอกสารที่อัปโหลดเข้าสู่ระบบ")
     
-    # Filter options
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        category_filter = st.selectbox(
-            "กรองตามหมวด",
-            ["", "หมวด_1", "หมวด_2", "หมวด_3", "หมวด_4", "หมวด_5", "หมวด_6", "หมวด_7", "raw"]
-        )
+    # Filter options, batched in a form so editing them does not rerun the page
+    with st.form("documents_form"):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            category_filter = st.selectbox(
+                "กรองตามหมวด",
+                _DOCUMENT_CATEGORY_OPTIONS
+            )
+        
+        with col2:
+            author_filter = st.text_input("กรองตามผู้เขียน/หน่วยงาน")
+        
+        with col3:
+            keyword_filter = st.text_input("กรองตามคำค้นหา")
+        
+        submit_button = st.form_submit_button("ค้นหาเอกสาร")
     
-    with col2:
-        author_filter = st.text_input("กรองตามผู้เขียน/หน่วยงาน")
+    # The filters are kept so reruns from the detail selectbox keep the list
+    if submit_button:
+        st.session_state["documents_filters"] = (category_filter, author_filter, keyword_filter)
     
-    with col3:
-        keyword_filter = st.text_input("กรองตามคำค้นหา")
-    
-    # Apply button
-    if st.button("ค้นหาเอกสาร"):
-        # Build query parameters
-        params = {}
-        if category_filter:
-            params["category"] = category_filter
-        if author_filter:
-            params["author"] = author_filter
-        if keyword_filter:
-            params["keyword"] = keyword_filter
-        
+    filters = st.session_state.get("documents_filters")
+    if filters is not None:
         # Fetch documents
         try:
-            response = requests.get(f"{API_BASE_URL}/documents", params=params)
+            documents_data = _list_documents(*filters)
+            documents = documents_data.get("documents", [])
+            total = documents_data.get("total", 0)
+            by_id = {doc.get("id", ""): doc for doc in documents}
+            
+            # Display results
+            st.success(f"พบ {total} เอกสาร")
             
-            if response.status_code == 200:
-                documents_data = response.json()
-                documents = documents_data.get("documents", [])
-                total = documents_data.get("total", 0)
+            if documents:
+                # pandas is only needed here, so it is imported on first use
+                import pandas as pd
                 
-                # Display results
-                st.success(f"พบ {total} เอกสาร")
+                # Create a DataFrame for display, one column at a time
+                created_raw = [doc.get("created_at") for doc in documents]
+                created_str = (
+                    pd.to_datetime(created_raw, errors="coerce", format="ISO8601")
+                    .strftime("%d/%m/%Y %H:%M")
+                    .fillna("N/A")
+                    .tolist()
+                )
+                
+                df = pd.DataFrame({
+                    "ID": [doc.get("id", "") for doc in documents],
+                    "ชื่อเอกสาร": [doc.get("title", "ไม่มีชื่อ") for doc in documents],
+                    "หมวด": [doc.get("category", "N/A") for doc in documents],
+                    "ผู้เขียน/หน่วยงาน": [doc.get("author", "") for doc in documents],
+                    "วันที่สร้าง": created_str,
+                    "ประมวลผล": ["✅" if doc.get("processed", False) else "⏳" for doc in documents],
+                    "ขนาด (bytes)": [doc.get("size", 0) for doc in documents]
+                })
+                st.dataframe(df, use_container_width=True)
                 
-                if documents:
-                    # Create a DataFrame for display
-                    df_data = []
+                # Select a document for more details
+                st.markdown("### รายละเอียดเอกสาร")
+                doc_id = st.selectbox("เลือกเอกสารเพื่อดูรายละเอียด", list(by_id.keys()))
+                
+                if doc_id:
+                    # Find the selected document
+                    selected_doc = by_id.get(doc_id)
                     
-                    for doc in documents:
-                        # Format datetime
-                        created_at = datetime.fromisoformat(doc.get("created_at")) if "created_at" in doc else None
-                        created_str = created_at.strftime("%d/%m/%Y %H:%M") if created_at else "N/A"
-                        
-                        # Format category
-                        category = doc.get("category", "N/A")
-                        
-                        # Status indicator
-                        processed = "✅" if doc.get("processed", False) else "⏳"
+                    if selected_doc:
+                        col1, col2 = st.columns(2)
                         
-                        df_data.append({
-                            "ID": doc.get("id", ""),
-                            "ชื่อเอกสาร": doc.get("title", "ไม่มีชื่อ"),
-                            "หมวด": category,
-                            "ผู้เขียน/หน่วยงาน": doc.get("author", ""),
-                            "วันที่สร้าง": created_str,
-                            "ประมวลผล": processed,
-                            "ขนาด (bytes)": doc.get("size", 0)
-                        })
-                    
-                    df = pd.DataFrame(df_data)
-                    st.dataframe(df, use_container_width=True)
-                    
-                    # Select a document for more details
-                    st.markdown("### รายละเอียดเอกสาร")
-                    doc_id = st.selectbox("เลือกเอกสารเพื่อดูรายละเอียด", [doc.get("id", "") for doc in documents])
-                    
-                    if doc_id:
-                        # Find the selected document
-                        selected_doc = next((doc for doc in documents if doc.get("id", "") == doc_id), None)
+                        with col1:
+                            st.markdown(f"**ชื่อเอกสาร:** {selected_doc.get('title', 'ไม่มีชื่อ')}")
+                            st.markdown(f"**คำอธิบาย:** {selected_doc.get('description', '-')}")
+                            st.markdown(f"**ผู้เขียน/หน่วยงาน:** {selected_doc.get('author', '-')}")
+                            st.markdown(f"**หมวด:** {selected_doc.get('category', '-')}")
+                            
+                            if 'pmqa_references' in selected_doc and selected_doc['pmqa_references']:
+                                st.markdown("**อ้างอิง PMQA:**")
+                                for ref in selected_doc['pmqa_references']:
+                                    st.markdown(f"- {ref.get('category_name', '')} ({ref.get('category_id', '')})")
                         
-                        if selected_doc:
-                            col1, col2 = st.columns(2)
+                        with col2:
+                            download_url = selected_doc.get("download_url", "")
+                            if download_url:
+                                download_link = f"{API_BASE_URL}{download_url.lstrip('/')}"
+                                st.markdown(f"[📥 ดาวน์โหลดเอกสาร]({download_link})")
                             
-                            with col1:
-                                st.markdown(f"**ชื่อเอกสาร:** {selected_doc.get('title', 'ไม่มีชื่อ')}")
-                                st.markdown(f"**คำอธิบาย:** {selected_doc.get('description', '-')}")
-                                st.markdown(f"**ผู้เขียน/หน่วยงาน:** {selected_doc.get('author', '-')}")
-                                st.markdown(f"**หมวด:** {selected_doc.get('category', '-')}")
-                                
-                                if 'pmqa_references' in selected_doc and selected_doc['pmqa_references']:
-                                    st.markdown("**อ้างอิง PMQA:**")
-                                    for ref in selected_doc['pmqa_references']:
-                                        st.markdown(f"- {ref.get('category_name', '')} ({ref.get('category_id', '')})")
+                            st.markdown(f"**ประมวลผล:** {'เสร็จสิ้น' if selected_doc.get('processed', False) else 'กำลังดำเนินการ'}")
+                            st.markdown(f"**ขนาดไฟล์:** {selected_doc.get('size', 0):,} bytes")
                             
-                            with col2:
-                                download_url = selected_doc.get("download_url", "")
-                                if download_url:
-                                    download_link = f"{API_BASE_URL}{download_url.lstrip('/')}"
-                                    st.markdown(f"[📥 ดาวน์โหลดเอกสาร]({download_link})")
-                                
-                                st.markdown(f"**ประมวลผล:** {'เสร็จสิ้น' if selected_doc.get('processed', False) else 'กำลังดำเนินการ'}")
-                                st.markdown(f"**ขนาดไฟล์:** {selected_doc.get('size', 0):,} bytes")
-                                
-                                if 'keywords' in selected_doc and selected_doc['keywords']:
-                                    st.markdown("**คำสำคัญ:**")
-                                    st.write(", ".join(selected_doc['keywords']))
-                else:
-                    st.info("ไม่พบเอกสาร")
+                            if 'keywords' in selected_doc and selected_doc['keywords']:
+                                st.markdown("**คำสำคัญ:**")
+                                st.write(", ".join(selected_doc['keywords']))
             else:
-                st.error(f"ไม่สามารถโหลดเอกสารได้: {response.json().get('detail', 'ไม่ทราบสาเหตุ')}")
+                st.info("ไม่พบเอกสาร")
+        except requests.exceptions.HTTPError as e:
+            st.error(f"ไม่สามารถโหลดเอกสารได้: {error_detail(e.response)}")
         except Exception as e:
             st.error(f"เกิดข้อผิดพลาด: {str(e)}")
 
@@ -420,45 +621,43 @@ def search_page():
     st.markdown('<div class="main-header">ค้นหาข้อมูล</div>', unsafe_allow_html=True)
     st.markdown("ค้นหาข้อมูลในเอกสารโดยใช้ Vector Search และ Graph Search")
     
-    # Search options
-    search_query = st.text_input("คำค้นหา", placeholder="ค้นหาในเอกสาร...")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        search_type = st.selectbox(
-            "ประเภทการค้นหา",
-            ["hybrid", "vector", "graph"],
-            format_func=lambda x: {
-                "hybrid": "Hybrid Search (ผสม)",
-                "vector": "Vector Search (ค้นหาความคล้ายคลึง)",
-                "graph": "Graph Search (ค้นหาความสัมพันธ์)"
-            }.get(x, x)
-        )
-    
-    with col2:
-        category_filter = st.selectbox(
-            "กรองตามหมวด",
-            ["", "หมวด_1", "หมวด_2", "หมวด_3", "หมวด_4", "หมวด_5", "หมวด_6", "หมวด_7"]
-        )
-    
-    with col3:
-        top_k = st.slider("จำนวนผลลัพธ์", min_value=1, max_value=20, value=5)
-    
-    # Advanced options
-    with st.expander("ตัวเลือกขั้นสูง"):
-        if search_type == "hybrid":
+    # Search options, batched in a form so editing them does not rerun the page
+    with st.form("search_form"):
+        search_query = st.text_input("คำค้นหา", placeholder="ค้นหาในเอกสาร...")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            search_type = st.selectbox(
+                "ประเภทการค้นหา",
+                _SEARCH_TYPES,
+                format_func=_SEARCH_TYPE_LABELS.get
+            )
+        
+        with col2:
+            category_filter = st.selectbox(
+                "กรองตามหมวด",
+                _CATEGORY_OPTIONS
+            )
+        
+        with col3:
+            top_k = st.slider("จำนวนผลลัพธ์", min_value=1, max_value=20, value=5)
+        
+        # Advanced options (the weights only apply to hybrid search)
+        with st.expander("ตัวเลือกขั้นสูง"):
             col1, col2 = st.columns(2)
             with col1:
-                vector_weight = st.slider("น้ำหนัก Vector Search", min_value=0.0, max_value=1.0, value=0.5, step=0.1)
+                vector_weight = st.slider("น้ำหนัก Vector Search (Hybrid)", min_value=0.0, max_value=1.0, value=0.5, step=0.1)
             with col2:
-                graph_weight = st.slider("น้ำหนัก Graph Search", min_value=0.0, max_value=1.0, value=0.5, step=0.1)
+                graph_weight = st.slider("น้ำหนัก Graph Search (Hybrid)", min_value=0.0, max_value=1.0, value=0.5, step=0.1)
+            
+            pmqa_category = st.selectbox("หมวด PMQA สำหรับการค้นหาแบบ Graph", _PMQA_SELECT_OPTIONS)
+            pmqa_subcategory = st.text_input("หัวข้อย่อย PMQA (เช่น 1.1)")
         
-        pmqa_category = st.selectbox("หมวด PMQA สำหรับการค้นหาแบบ Graph", [""] + [str(i) for i in range(1, 8)])
-        pmqa_subcategory = st.text_input("หัวข้อย่อย PMQA (เช่น 1.1)")
+        submit_button = st.form_submit_button("ค้นหา")
     
     # Search button
-    if st.button("ค้นหา") and search_query:
+    if submit_button and search_query:
         with st.spinner("กำลังค้นหา..."):
             try:
                 # Build search request
@@ -497,16 +696,19 @@ def search_page():
                     search_url = f"{API_BASE_URL}/search/hybrid"
                 
                 # Execute search
-                response = requests.post(search_url, json=search_request)
+                response = api().post(search_url, json=search_request, timeout=TIMEOUT)
                 
                 if response.status_code == 200:
                     results = response.json()
                     search_results = results.get("results", [])
                     total_results = results.get("total_results", 0)
-                    execution_time = results.get("execution_time_ms", 0)
+                    execution_time = results.get("execution_time_ms")
                     
                     # Display results
-                    st.success(f"พบ {total_results} ผลลัพธ์ (ใช้เวลา {execution_time:.2f} ms)")
+                    if execution_time is not None:
+                        st.success(f"พบ {total_results} ผลลัพธ์ (ใช้เวลา {execution_time:.2f} ms)")
+                    else:
+                        st.success(f"พบ {total_results} ผลลัพธ์")
                     
                     if search_results:
                         # Create tabs for different result views
@@ -514,18 +716,13 @@ def search_page():
                         
                         with tab1:
                             for i, result in enumerate(search_results):
-                                with st.container():
-                                    st.markdown(
-                                        f"""
-                                        <div style="border: 1px solid #ddd; padding: 15px; border-radius: 5px; margin-bottom: 10px;">
-                                            <h4>{i+1}. {result.get('document_title', 'ไม่มีชื่อ')}</h4>
-                                            <p><strong>ความเกี่ยวข้อง:</strong> {result.get('score', 0):.2f}</p>
-                                            <p>{result.get('content', '')[:300]}...</p>
-                                            <p><strong>PMQA:</strong> {', '.join([f"{ref.get('category_name', '')} ({ref.get('category_id', '')})" for ref in result.get('pmqa_references', [])])}</p>
-                                        </div>
-                                        """,
-                                        unsafe_allow_html=True
-                                    )
+                                pmqa = ', '.join(f"{ref.get('category_name', '')} ({ref.get('category_id', '')})" for ref in result.get('pmqa_references', ()))
+                                
+                                with st.container(border=True):
+                                    st.subheader(f"{i+1}. {result.get('document_title', 'ไม่มีชื่อ')}")
+                                    st.caption(f"ความเกี่ยวข้อง: {result.get('score', 0):.2f}")
+                                    st.write(f"{result.get('content', '')[:300]}...")
+                                    st.caption(f"PMQA: {pmqa}")
                         
                         with tab2:
                             # Select a result to view in detail
@@ -566,7 +763,7 @@ def search_page():
                     else:
                         st.info("ไม่พบผลลัพธ์")
                 else:
-                    st.error(f"ค้นหาล้มเหลว: {response.json().get('detail', 'ไม่ทราบสาเหตุ')}")
+                    st.error(f"ค้นหาล้มเหลว: {error_detail(response)}")
             except Exception as e:
                 st.error(f"เกิดข้อผิดพลาด: {str(e)}")
 
@@ -576,42 +773,31 @@ def chat_page():
     
     # Initialize chat history
     if "messages" not in st.session_state:
+        # A plain list, shared with pages/chat.py; capped on each new turn
         st.session_state.messages = []
     
-    # Display chat history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-            
-            # Display sources if available
-            if "sources" in message and message["sources"]:
-                with st.expander("แหล่งข้อมูลอ้างอิง"):
-                    for i, source in enumerate(message["sources"]):
-                        st.markdown(
-                            f"**[{i+1}] จากเอกสาร:** {source.get('document_title', 'ไม่ระบุ')}"
-                        )
-                        st.markdown(f"*ข้อความ:* {source.get('content_snippet', '')}")
+    # Display recent chat history
+    _render_history()
     
-    # Chat options
+    # Chat options; batched in a form so tweaking them doesn't rerun the page
     with st.expander("ตัวเลือกการถาม-ตอบ"):
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            use_rag = st.checkbox("ใช้ข้อมูลจากเอกสาร (RAG)", value=True)
-            search_type = st.selectbox(
-                "ประเภทการค้นหา",
-                ["hybrid", "vector", "graph"],
-                format_func=lambda x: {
-                    "hybrid": "Hybrid Search (ผสม)",
-                    "vector": "Vector Search (ค้นหาความคล้ายคลึง)",
-                    "graph": "Graph Search (ค้นหาความสัมพันธ์)"
-                }.get(x, x)
-            )
-        
-        with col2:
-            pmqa_category = st.selectbox("หมวด PMQA", [""] + [str(i) for i in range(1, 8)])
-            pmqa_subcategory = st.text_input("หัวข้อย่อย PMQA (เช่น 1.1)")
-            max_tokens = st.slider("ความยาวคำตอบสูงสุด", 100, 3000, 1000)
+        with st.form("chat_options", clear_on_submit=False):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                use_rag = st.checkbox("ใช้ข้อมูลจากเอกสาร (RAG)", value=True)
+                search_type = st.selectbox(
+                    "ประเภทการค้นหา",
+                    _SEARCH_TYPES,
+                    format_func=_SEARCH_TYPE_LABELS.get
+                )
+            
+            with col2:
+                pmqa_category = st.selectbox("หมวด PMQA", _PMQA_SELECT_OPTIONS)
+                pmqa_subcategory = st.text_input("หัวข้อย่อย PMQA (เช่น 1.1)")
+                max_tokens = st.slider("ความยาวคำตอบสูงสุด", 100, 3000, 1000)
+            
+            st.form_submit_button("อัปเดต")
     
     # Chat input
     query = st.chat_input("ถามคำถามเกี่ยวกับ PMQA 4.0...")
@@ -623,102 +809,142 @@ def chat_page():
         
         # Add user message to history
         st.session_state.messages.append({"role": "user", "content": query})
+        del st.session_state.messages[:-_CHAT_HISTORY_SIZE]
+        
+        # Build Claude query
+        claude_request = _build_claude_request(
+            query, use_rag, search_type, max_tokens, pmqa_category, pmqa_subcategory
+        )
         
         # Process with Claude
         with st.chat_message("assistant"):
             with st.spinner("กำลังคิด..."):
                 try:
-                    # Build Claude query
-                    claude_request = {
-                        "query": query,
-                        "use_rag": use_rag,
-                        "search_type": search_type,
-                        "max_tokens": max_tokens
-                    }
-                    
-                    # Add PMQA reference if available
-                    if pmqa_category or pmqa_subcategory:
-                        pmqa_reference = {}
-                        if pmqa_category:
-                            pmqa_reference["category_id"] = pmqa_category
-                        if pmqa_subcategory:
-                            pmqa_reference["subcategory_id"] = pmqa_subcategory
-                        
-                        claude_request["pmqa_reference"] = pmqa_reference
-                    
                     # Call Claude API
-                    response = requests.post(f"{API_BASE_URL}/claude/query", json=claude_request)
+                    response = api().post(f"{API_BASE_URL}/claude/query", json=claude_request, timeout=LLM_TIMEOUT)
                     
                     if response.status_code == 200:
                         claude_response = response.json()
                         answer = claude_response.get("answer", "ขออภัย ฉันไม่สามารถตอบคำถามนี้ได้")
-                        sources = claude_response.get("sources", [])
+                        sources = [
+                            {**source, "content_snippet": source.get("content_snippet", "")[:_SOURCE_SNIPPET_CHARS]}
+                            for source in claude_response.get("sources", [])
+                        ]
                         
                         # Display answer
                         st.markdown(answer)
                         
-                        # Display sources
-                        if sources:
+                        # Display sources (formatted once and kept for history reruns)
+                        rendered_sources = _render_sources(sources)
+                        if rendered_sources:
                             with st.expander("แหล่งข้อมูลอ้างอิง"):
-                                for i, source in enumerate(sources):
-                                    st.markdown(
-                                        f"**[{i+1}] จากเอกสาร:** {source.get('document_title', 'ไม่ระบุ')}"
-                                    )
-                                    st.markdown(f"*ข้อความ:* {source.get('content_snippet', '')}")
+                                st.markdown(rendered_sources)
                         
                         # Add assistant message to history
                         st.session_state.messages.append({
                             "role": "assistant",
                             "content": answer,
-                            "sources": sources
+                            "sources": sources,
+                            "_rendered_sources": rendered_sources
                         })
                     else:
-                        st.error(f"ไม่สามารถติดต่อ Claude AI ได้: {response.json().get('detail', 'ไม่ทราบสาเหตุ')}")
+                        st.error(f"ไม่สามารถติดต่อ Claude AI ได้: {error_detail(response)}")
                 
                 except Exception as e:
                     st.error(f"เกิดข้อผิดพลาด: {str(e)}")
 
+@st.fragment
+def _render_history():
+    """
+    Render the most recent chat messages, and older ones on request.
+    
+    Runs as a fragment so the show-all button only reruns the history.
+    """
+    messages = st.session_state.messages
+    shown = messages[-_CHAT_DISPLAY_WINDOW:]
+    if len(messages) > _CHAT_DISPLAY_WINDOW and st.button("แสดงประวัติทั้งหมด"):
+        shown = messages
+    
+    sources_from = len(shown) - _CHAT_SOURCES_WINDOW
+    for i, message in enumerate(shown):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            
+            # Display sources for the latest messages only
+            if i >= sources_from and message.get("_rendered_sources"):
+                with st.expander("แหล่งข้อมูลอ้างอิง"):
+                    st.markdown(message["_rendered_sources"])
+
+def _build_claude_request(query, use_rag, search_type, max_tokens, pmqa_category, pmqa_subcategory):
+    """
+    Build the request body for the Claude query endpoint.
+    
+    Args:
+        query: User question
+        use_rag: Whether to retrieve context from documents
+        search_type: Search type used for retrieval
+        max_tokens: Maximum answer length
+        pmqa_category: PMQA category ID (empty for none)
+        pmqa_subcategory: PMQA subcategory ID (empty for none)
+        
+    Returns:
+        Request body as a dictionary
+    """
+    claude_request = {
+        "query": query,
+        "use_rag": use_rag,
+        "search_type": search_type,
+        "max_tokens": max_tokens
+    }
+    
+    # Add PMQA reference if available
+    if pmqa_category or pmqa_subcategory:
+        pmqa_reference = {}
+        if pmqa_category:
+            pmqa_reference["category_id"] = pmqa_category
+        if pmqa_subcategory:
+            pmqa_reference["subcategory_id"] = pmqa_subcategory
+        
+        claude_request["pmqa_reference"] = pmqa_reference
+    
+    return claude_request
+
+def _render_sources(sources):
+    """
+    Format answer sources as a single markdown string.
+    
+    Args:
+        sources: Sources returned by the Claude query endpoint
+        
+    Returns:
+        Markdown for all sources (empty if there are none)
+    """
+    return "\n\n".join(
+        f"**[{i+1}] จากเอกสาร:** {source.get('document_title', 'ไม่ระบุ')}\n\n"
+        f"*ข้อความ:* {source.get('content_snippet', '')}"
+        for i, source in enumerate(sources)
+    )
+
 def pmqa_structure_page():
     st.markdown('<div class="main-header">โครงสร้าง PMQA 4.0</div>', unsafe_allow_html=True)
     st.markdown("ดูโครงสร้าง PMQA 4.0 ทั้งหมด พร้อมรายละเอียดและความสัมพันธ์")
     
+    if st.button("รีเฟรชโครงสร้าง"):
+        _fetch_pmqa_structure.clear()
+        _pmqa_structure_markdown.clear()
+    
     try:
-        # Fetch PMQA structure
-        response = requests.get(f"{API_BASE_URL}/pmqa/structure")
+        # Fetch PMQA structure, pre-rendered as one markdown block per category
+        category_markdown = _pmqa_structure_markdown()
         
-        if response.status_code == 200:
-            pmqa_data = response.json()
-            categories = pmqa_data.get("categories", [])
-            
-            # Display structure as tabs
-            category_tabs = st.tabs([f"หมวด {cat['id']}" for cat in categories])
-            
-            for i, category in enumerate(categories):
-                with category_tabs[i]:
-                    st.markdown(f"## {category['name']} (หมวด {category['id']})")
-                    st.markdown(f"*{category['description']}*")
-                    
-                    # Subcategories
-                    subcategories = category.get("subcategories", [])
-                    
-                    if subcategories:
-                        for subcategory in subcategories:
-                            st.markdown(f"### {subcategory['id']} {subcategory['name']}")
-                            st.markdown(f"*{subcategory['description']}*")
-                            
-                            # Criteria
-                            criteria = subcategory.get("criteria", [])
-                            
-                            if criteria:
-                                for criterion in criteria:
-                                    st.markdown(f"#### {criterion['id']} {criterion['name']}")
-                                    st.markdown(f"*{criterion['description']}*")
-                            else:
-                                st.info(f"ไม่มีเกณฑ์ในหัวข้อย่อย {subcategory['id']}")
-                    else:
-                        st.info(f"ไม่มีหัวข้อย่อยในหมวด {category['id']}")
-        else:
-            st.error(f"ไม่สามารถโหลดโครงสร้าง PMQA ได้: {response.json().get('detail', 'ไม่ทราบสาเหตุ')}")
+        # Display structure as tabs
+        category_tabs = st.tabs([f"หมวด {category_id}" for category_id, _ in category_markdown])
+        
+        for tab, (_, markdown) in zip(category_tabs, category_markdown):
+            with tab:
+                st.markdown(markdown)
+    except requests.exceptions.HTTPError as e:
+        st.error(f"ไม่สามารถโหลดโครงสร้าง PMQA ได้: {error_detail(e.response)}")
     except Exception as e:
         st.error(f"เกิดข้อผิดพลาด: {str(e)}")
 
@@ -727,52 +953,44 @@ def system_status_page():
     st.markdown("ตรวจสอบสถานะการทำงานของระบบและบริการที่เกี่ยวข้อง")
     
     try:
-        # Check API health
-        response = requests.get(f"{API_BASE_URL}/health")
+        # Check API health (cached briefly so reruns don't re-probe every service)
+        health_data = _fetch_health()
+        overall_status = health_data.get("status", "unknown")
+        services = health_data.get("services", {})
         
-        if response.status_code == 200:
-            health_data = response.json()
-            overall_status = health_data.get("status", "unknown")
-            services = health_data.get("services", {})
-            
-            # Overall status
-            if overall_status == "healthy":
-                st.success("ระบบทำงานปกติ")
-            else:
-                st.error("ระบบมีปัญหาบางส่วน")
-            
-            # Services status
-            st.markdown("### สถานะบริการ")
-            
-            # Create DataFrame for services
-            df_data = []
-            
-            for service, status in services.items():
-                icon = "✅" if status == "healthy" else "❌"
-                df_data.append({
-                    "บริการ": service,
-                    "สถานะ": f"{icon} {status}"
-                })
-            
-            df = pd.DataFrame(df_data)
-            st.dataframe(df, use_container_width=True)
-            
-            # System information
-            st.markdown("### ข้อมูลระบบ")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("**API Version:** 1.0.0")
-                st.markdown("**GraphRAG Version:** 1.0.0")
-                st.markdown("**Claude AI:** Enabled")
-            
-            with col2:
-                st.markdown("**Neo4j:** " + ("Connected" if services.get("neo4j") == "healthy" else "Not Connected"))
-                st.markdown("**Chroma DB:** " + ("Connected" if services.get("chroma") == "healthy" else "Not Connected"))
-                st.markdown("**Ollama:** Available")
+        # Overall status
+        if overall_status == "healthy":
+            st.success("ระบบทำงานปกติ")
         else:
-            st.error(f"ไม่สามารถตรวจสอบสถานะระบบได้: {response.status_code}")
+            st.error("ระบบมีปัญหาบางส่วน")
+        
+        # Services status
+        st.markdown("### สถานะบริการ")
+        
+        # Services table, built as columns (Streamlit renders a dict of lists directly)
+        service_names = list(services)
+        service_status = [
+            f"{'✅' if status == 'healthy' else '❌'} {status}"
+            for status in services.values()
+        ]
+        st.dataframe({"บริการ": service_names, "สถานะ": service_status}, use_container_width=True)
+        
+        # System information
+        st.markdown("### ข้อมูลระบบ")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("**API Version:** 1.0.0")
+            st.markdown("**GraphRAG Version:** 1.0.0")
+            st.markdown("**Claude AI:** Enabled")
+        
+        with col2:
+            st.markdown("**Neo4j:** " + ("Connected" if services.get("neo4j") == "healthy" else "Not Connected"))
+            st.markdown("**Chroma DB:** " + ("Connected" if services.get("chroma") == "healthy" else "Not Connected"))
+            st.markdown("**Ollama:** Available")
+    except requests.exceptions.HTTPError as e:
+        st.error(f"ไม่สามารถตรวจสอบสถานะระบบได้: {e.response.status_code}")
     except Exception as e:
         st.error(f"เกิดข้อผิดพลาด: {str(e)}")
 
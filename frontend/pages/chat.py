@@ -1,8 +1,29 @@
 import streamlit as st
 import requests
+import json
+import threading
+import time
+from collections import OrderedDict
 
-# API Base URL
-API_BASE_URL = "http://localhost:8000/api"
+from api_client import API_BASE_URL, LLM_TIMEOUT, api, error_detail
+
+# Search type labels and PMQA category options for the selectboxes
+_SEARCH_LABELS = {
+    "hybrid": "Hybrid Search (ผสม)",
+    "vector": "Vector Search (ค้นหาความคล้ายคลึง)",
+    "graph": "Graph Search (ค้นหาความสัมพันธ์)"
+}
+_PMQA_CATS = ["", *map(str, range(1, 8))]
+
+# Chat messages kept per session, how many of the most recent are rendered,
+# and how many of those get a sources expander
+_MAX_HISTORY = 40
+_DISPLAY_HISTORY = 20
+_SOURCES_HISTORY = 5
+
+# Answers cached per (question, options), shared across sessions
+_ANSWER_CACHE_SIZE = 256
+_ANSWER_CACHE_TTL = 3600
 
 def render():
     st.markdown('<div class="main-header">ถาม-ตอบกับ Claude AI</div>', unsafe_allow_html=True)
@@ -12,102 +33,229 @@ def render():
     if "messages" not in st.session_state:
         st.session_state.messages = []
     
-    # Display chat history
-    for message in st.session_state.messages:
+    # Display recent chat history
+    _render_history()
+    
+    # Chat options; batched in a form so tweaking them doesn't rerun the page
+    with st.expander("ตัวเลือกการถาม-ตอบ"):
+        with st.form("chat_options", clear_on_submit=False):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                use_rag = st.checkbox("ใช้ข้อมูลจากเอกสาร (RAG)", value=True)
+                search_type = st.selectbox(
+                    "ประเภทการค้นหา",
+                    list(_SEARCH_LABELS),
+                    format_func=_SEARCH_LABELS.get
+                )
+            
+            with col2:
+                pmqa_category = st.selectbox("หมวด PMQA", _PMQA_CATS)
+                pmqa_subcategory = st.text_input("หัวข้อย่อย PMQA (เช่น 1.1)")
+                max_tokens = st.slider("ความยาวคำตอบสูงสุด", 100, 3000, 1000)
+            
+            st.form_submit_button("อัปเดต")
+    
+    # Regenerate the last answer, bypassing the answer cache
+    regenerate = False
+    if st.session_state.get("last_claude_request"):
+        regenerate = st.button("สร้างคำตอบใหม่")
+    
+    # Chat input
+    query = st.chat_input("ถามคำถามเกี่ยวกับ PMQA 4.0...")
+    
+    if query:
+        # Display user message
+        with st.chat_message("user"):
+            st.markdown(query)
+        
+        # Add user message to history, dropping the oldest turns beyond the cap
+        st.session_state.messages.append({"role": "user", "content": query})
+        del st.session_state.messages[:-_MAX_HISTORY]
+        
+        # Build Claude query
+        claude_request = {
+            "query": query,
+            "use_rag": use_rag,
+            "search_type": search_type,
+            "max_tokens": max_tokens
+        }
+        
+        # Add PMQA reference if available
+        if pmqa_category or pmqa_subcategory:
+            pmqa_reference = {}
+            if pmqa_category:
+                pmqa_reference["category_id"] = pmqa_category
+            if pmqa_subcategory:
+                pmqa_reference["subcategory_id"] = pmqa_subcategory
+            
+            claude_request["pmqa_reference"] = pmqa_reference
+    elif regenerate:
+        claude_request = st.session_state["last_claude_request"]
+    else:
+        return
+    
+    # Serialized once; the same body is the answer cache key and the request payload
+    cache_key = json.dumps(claude_request, sort_keys=True, ensure_ascii=False)
+    st.session_state["last_claude_request"] = claude_request
+    
+    with st.chat_message("assistant"):
+        try:
+            cached = None if regenerate else _cached_answer(cache_key)
+            
+            if cached is not None:
+                # Same question and options as an earlier one
+                answer, sources = cached
+                st.markdown(answer)
+            else:
+                # Process with Claude, rendering the answer as it streams in
+                result = {}
+                answer = st.write_stream(_stream_claude(cache_key, result))
+                sources = result.get("sources", [])
+                # The sources event only arrives once the answer finished cleanly;
+                # a cut-off answer must not be served to other sessions
+                if "sources" in result:
+                    _store_answer(cache_key, answer, sources)
+            
+            # Display sources
+            if sources:
+                with st.expander("แหล่งข้อมูลอ้างอิง"):
+                    for i, source in enumerate(sources):
+                        st.markdown(
+                            f"**[{i+1}] จากเอกสาร:** {source.get('document_title', 'ไม่ระบุ')}"
+                        )
+                        st.markdown(f"*ข้อความ:* {source.get('content_snippet', '')}")
+            
+            # Add assistant message to history; a regenerated answer replaces
+            # the previous answer to the same question
+            message = {
+                "role": "assistant",
+                "content": answer,
+                "sources": sources
+            }
+            messages = st.session_state.messages
+            if regenerate and messages and messages[-1]["role"] == "assistant":
+                messages[-1] = message
+            else:
+                messages.append(message)
+        
+        except requests.exceptions.HTTPError as e:
+            st.error(f"ไม่สามารถติดต่อ Claude AI ได้: {error_detail(e.response)}")
+        except Exception as e:
+            st.error(f"เกิดข้อผิดพลาด: {str(e)}")
+
+@st.fragment
+def _render_history():
+    """
+    Render the most recent chat messages, and older ones on request.
+    
+    Runs as a fragment so the show-all button only reruns the history.
+    """
+    messages = st.session_state.messages
+    shown = messages[-_DISPLAY_HISTORY:]
+    if len(messages) > _DISPLAY_HISTORY and st.button("แสดงประวัติทั้งหมด"):
+        shown = messages
+    
+    sources_from = len(shown) - _SOURCES_HISTORY
+    for i, message in enumerate(shown):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
             
-            # Display sources if available
-            if "sources" in message and message["sources"]:
+            # Display sources for the latest messages only
+            if i >= sources_from and message.get("sources"):
                 with st.expander("แหล่งข้อมูลอ้างอิง"):
-                    for i, source in enumerate(message["sources"]):
+                    for j, source in enumerate(message["sources"]):
                         st.markdown(
-                            f"**[{i+1}] จากเอกสาร:** {source.get('document_title', 'ไม่ระบุ')}"
+                            f"**[{j+1}] จากเอกสาร:** {source.get('document_title', 'ไม่ระบุ')}"
                         )
                         st.markdown(f"*ข้อความ:* {source.get('content_snippet', '')}")
+
+@st.cache_resource
+def _answer_cache():
+    """
+    Get the process-wide cache of Claude answers.
     
-    # Chat options
-    with st.expander("ตัวเลือกการถาม-ตอบ"):
-        col1, col2 = st.columns(2)
+    Streamed answers can't go through st.cache_data, so finished answers are kept
+    in an LRU dict keyed by the serialized request body.
+    
+    Returns:
+        Tuple of (OrderedDict of key -> (stored_at, answer, sources), lock)
+    """
+    return OrderedDict(), threading.Lock()
+
+def _cached_answer(cache_key):
+    """
+    Look up a cached answer.
+    
+    Args:
+        cache_key: Serialized Claude request body
         
-        with col1:
-            use_rag = st.checkbox("ใช้ข้อมูลจากเอกสาร (RAG)", value=True)
-            search_type = st.selectbox(
-                "ประเภทการค้นหา",
-                ["hybrid", "vector", "graph"],
-                format_func=lambda x: {
-                    "hybrid": "Hybrid Search (ผสม)",
-                    "vector": "Vector Search (ค้นหาความคล้ายคลึง)",
-                    "graph": "Graph Search (ค้นหาความสัมพันธ์)"
-                }.get(x, x)
-            )
+    Returns:
+        Tuple of (answer, sources), or None if missing or expired
+    """
+    cache, lock = _answer_cache()
+    with lock:
+        entry = cache.get(cache_key)
+        if entry is None:
+            return None
         
-        with col2:
-            pmqa_category = st.selectbox("หมวด PMQA", [""] + [str(i) for i in range(1, 8)])
-            pmqa_subcategory = st.text_input("หัวข้อย่อย PMQA (เช่น 1.1)")
-            max_tokens = st.slider("ความยาวคำตอบสูงสุด", 100, 3000, 1000)
+        stored_at, answer, sources = entry
+        if time.monotonic() - stored_at > _ANSWER_CACHE_TTL:
+            del cache[cache_key]
+            return None
+        
+        cache.move_to_end(cache_key)
+        return answer, sources
+
+def _store_answer(cache_key, answer, sources):
+    """
+    Cache an answer, evicting the least recently used entries beyond the cap.
     
-    # Chat input
-    query = st.chat_input("ถามคำถามเกี่ยวกับ PMQA 4.0...")
+    Args:
+        cache_key: Serialized Claude request body
+        answer: Answer text
+        sources: Sources used for the answer
+    """
+    cache, lock = _answer_cache()
+    with lock:
+        cache[cache_key] = (time.monotonic(), answer, sources)
+        cache.move_to_end(cache_key)
+        while len(cache) > _ANSWER_CACHE_SIZE:
+            cache.popitem(last=False)
+
+def _stream_claude(request_body, result):
+    """
+    Stream an answer from the Claude streaming endpoint.
     
-    if query:
-        # Display user message
-        with st.chat_message("user"):
-            st.markdown(query)
+    Args:
+        request_body: Request body for the Claude query endpoint, serialized as JSON
+        result: Dictionary that receives the answer sources under "sources"
+            once the stream has finished cleanly
         
-        # Add user message to history
-        st.session_state.messages.append({"role": "user", "content": query})
+    Yields:
+        Pieces of the answer text as they arrive
+    """
+    with api().post(
+        f"{API_BASE_URL}/claude/query/stream",
+        data=request_body.encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        stream=True,
+        # the read timeout applies between streamed chunks, not to the whole answer
+        timeout=LLM_TIMEOUT
+    ) as response:
+        if not response.ok:
+            # Read the error body before the stream is closed
+            response.content
+        response.raise_for_status()
         
-        # Process with Claude
-        with st.chat_message("assistant"):
-            with st.spinner("กำลังคิด..."):
-                try:
-                    # Build Claude query
-                    claude_request = {
-                        "query": query,
-                        "use_rag": use_rag,
-                        "search_type": search_type,
-                        "max_tokens": max_tokens
-                    }
-                    
-                    # Add PMQA reference if available
-                    if pmqa_category or pmqa_subcategory:
-                        pmqa_reference = {}
-                        if pmqa_category:
-                            pmqa_reference["category_id"] = pmqa_category
-                        if pmqa_subcategory:
-                            pmqa_reference["subcategory_id"] = pmqa_subcategory
-                        
-                        claude_request["pmqa_reference"] = pmqa_reference
-                    
-                    # Call Claude API
-                    response = requests.post(f"{API_BASE_URL}/claude/query", json=claude_request)
-                    
-                    if response.status_code == 200:
-                        claude_response = response.json()
-                        answer = claude_response.get("answer", "ขออภัย ฉันไม่สามารถตอบคำถามนี้ได้")
-                        sources = claude_response.get("sources", [])
-                        
-                        # Display answer
-                        st.markdown(answer)
-                        
-                        # Display sources
-                        if sources:
-                            with st.expander("แหล่งข้อมูลอ้างอิง"):
-                                for i, source in enumerate(sources):
-                                    st.markdown(
-                                        f"**[{i+1}] จากเอกสาร:** {source.get('document_title', 'ไม่ระบุ')}"
-                                    )
-                                    st.markdown(f"*ข้อความ:* {source.get('content_snippet', '')}")
-                        
-                        # Add assistant message to history
-                        st.session_state.messages.append({
-                            "role": "assistant",
-                            "content": answer,
-                            "sources": sources
-                        })
-                    else:
-                        st.error(f"ไม่สามารถติดต่อ Claude AI ได้: {response.json().get('detail', 'ไม่ทราบสาเหตุ')}")
-                
-                except Exception as e:
-                    st.error(f"เกิดข้อผิดพลาด: {str(e)}")
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            
+            event = json.loads(line[6:])
+            if event["type"] == "delta":
+                yield event["text"]
+            elif event["type"] == "sources":
+                result["sources"] = event["sources"]
+            elif event["type"] == "error":
+                raise RuntimeError(event["detail"])
@@ -1,8 +1,16 @@
 import streamlit as st
 import requests
+import json
 
-# API Base URL
-API_BASE_URL = "http://localhost:8000/api"
+from api_client import API_BASE_URL, TIMEOUT, api, error_detail
+
+# Search type labels and PMQA category options for the selectboxes
+_SEARCH_LABELS = {
+    "hybrid": "Hybrid Search (ผสม)",
+    "vector": "Vector Search (ค้นหาความคล้ายคลึง)",
+    "graph": "Graph Search (ค้นหาความสัมพันธ์)"
+}
+_PMQA_CATS = ["", *map(str, range(1, 8))]
 
 def render():
     st.markdown('<div class="main-header">ค้นหาข้อมูล</div>', unsafe_allow_html=True)
@@ -16,12 +24,8 @@ def render():
     with col1:
         search_type = st.selectbox(
             "ประเภทการค้นหา",
-            ["hybrid", "vector", "graph"],
-            format_func=lambda x: {
-                "hybrid": "Hybrid Search (ผสม)",
-                "vector": "Vector Search (ค้นหาความคล้ายคลึง)",
-                "graph": "Graph Search (ค้นหาความสัมพันธ์)"
-            }.get(x, x)
+            list(_SEARCH_LABELS),
+            format_func=_SEARCH_LABELS.get
         )
     
     with col2:
@@ -42,7 +46,7 @@ def render():
             with col2:
                 graph_weight = st.slider("น้ำหนัก Graph Search", min_value=0.0, max_value=1.0, value=0.5, step=0.1)
         
-        pmqa_category = st.selectbox("หมวด PMQA สำหรับการค้นหาแบบ Graph", [""] + [str(i) for i in range(1, 8)])
+        pmqa_category = st.selectbox("หมวด PMQA สำหรับการค้นหาแบบ Graph", _PMQA_CATS)
         pmqa_subcategory = st.text_input("หัวข้อย่อย PMQA (เช่น 1.1)")
     
     # Search button
@@ -84,76 +88,112 @@ def render():
                     search_request["graph_weight"] = graph_weight
                     search_url = f"{API_BASE_URL}/search/hybrid"
                 
-                # Execute search
-                response = requests.post(search_url, json=search_request)
+                # Execute search (cached per request so reruns and repeats skip the API)
+                results = _run_search(search_url, json.dumps(search_request, sort_keys=True, ensure_ascii=False))
+                st.session_state["last_search"] = results
+            except requests.exceptions.HTTPError as e:
+                st.session_state.pop("last_search", None)
+                st.error(f"ค้นหาล้มเหลว: {error_detail(e.response)}")
+            except Exception as e:
+                st.session_state.pop("last_search", None)
+                st.error(f"เกิดข้อผิดพลาด: {str(e)}")
+    
+    # Display the last search; kept in session state so the detail selectbox rerun keeps it
+    results = st.session_state.get("last_search")
+    if results is not None:
+        search_results = results.get("results", [])
+        total_results = results.get("total_results", 0)
+        execution_time = results.get("execution_time_ms")
+        
+        # Display results
+        if execution_time is not None:
+            st.success(f"พบ {total_results} ผลลัพธ์ (ใช้เวลา {execution_time:.2f} ms)")
+        else:
+            st.success(f"พบ {total_results} ผลลัพธ์")
+        
+        if search_results:
+            # Create tabs for different result views
+            tab1, tab2 = st.tabs(["รายการผลลัพธ์", "แสดงรายละเอียด"])
+            
+            with tab1:
+                for i, result in enumerate(search_results):
+                    title = result.get('document_title', 'ไม่มีชื่อ')
+                    score = result.get('score', 0)
+                    snippet = result.get('content', '')[:300]
+                    
+                    with st.container(border=True):
+                        st.subheader(f"{i+1}. {title}")
+                        st.caption(f"ความเกี่ยวข้อง: {score:.2f}")
+                        st.write(f"{snippet}...")
+                        st.caption(f"PMQA: {result['_pmqa_str']}")
+            
+            with tab2:
+                # Select a result to view in detail
+                selected_idx = st.selectbox(
+                    "เลือกผลลัพธ์เพื่อดูรายละเอียด",
+                    range(len(search_results)),
+                    format_func=lambda i: f"{i+1}. {search_results[i].get('document_title', 'ไม่มีชื่อ')}"
+                )
                 
-                if response.status_code == 200:
-                    results = response.json()
-                    search_results = results.get("results", [])
-                    total_results = results.get("total_results", 0)
-                    execution_time = results.get("execution_time_ms", 0)
+                # Display selected result
+                if selected_idx is not None:
+                    selected_result = search_results[selected_idx]
                     
-                    # Display results
-                    st.success(f"พบ {total_results} ผลลัพธ์ (ใช้เวลา {execution_time:.2f} ms)")
+                    st.markdown(f"### {selected_result.get('document_title', 'ไม่มีชื่อ')}")
+                    st.markdown(f"**Document ID:** {selected_result.get('document_id', '')}")
+                    st.markdown(f"**Chunk ID:** {selected_result.get('chunk_id', '')}")
+                    st.markdown(f"**ความเกี่ยวข้อง:** {selected_result.get('score', 0):.2f}")
                     
-                    if search_results:
-                        # Create tabs for different result views
-                        tab1, tab2 = st.tabs(["รายการผลลัพธ์", "แสดงรายละเอียด"])
-                        
-                        with tab1:
-                            for i, result in enumerate(search_results):
-                                with st.container():
-                                    st.markdown(
-                                        f"""
-                                        <div style="border: 1px solid #ddd; padding: 15px; border-radius: 5px; margin-bottom: 10px;">
-                                            <h4>{i+1}. {result.get('document_title', 'ไม่มีชื่อ')}</h4>
-                                            <p><strong>ความเกี่ยวข้อง:</strong> {result.get('score', 0):.2f}</p>
-                                            <p>{result.get('content', '')[:300]}...</p>
-                                            <p><strong>PMQA:</strong> {', '.join([f"{ref.get('category_name', '')} ({ref.get('category_id', '')})" for ref in result.get('pmqa_references', [])])}</p>
-                                        </div>
-                                        """,
-                                        unsafe_allow_html=True
-                                    )
-                        
-                        with tab2:
-                            # Select a result to view in detail
-                            selected_idx = st.selectbox(
-                                "เลือกผลลัพธ์เพื่อดูรายละเอียด",
-                                range(len(search_results)),
-                                format_func=lambda i: f"{i+1}. {search_results[i].get('document_title', 'ไม่มีชื่อ')}"
+                    st.markdown("### เนื้อหา:")
+                    st.markdown(selected_result.get('content', ''))
+                    
+                    st.markdown("### อ้างอิง PMQA:")
+                    if 'pmqa_references' in selected_result and selected_result['pmqa_references']:
+                        for ref in selected_result['pmqa_references']:
+                            st.markdown(
+                                f"- {ref.get('category_name', '')} ({ref.get('category_id', '')})"
+                                + (f" > {ref.get('subcategory_name', '')} ({ref.get('subcategory_id', '')})" if 'subcategory_name' in ref else "")
+                                + (f" > {ref.get('criteria_name', '')} ({ref.get('criteria_id', '')})" if 'criteria_name' in ref else "")
                             )
-                            
-                            # Display selected result
-                            if selected_idx is not None:
-                                selected_result = search_results[selected_idx]
-                                
-                                st.markdown(f"### {selected_result.get('document_title', 'ไม่มีชื่อ')}")
-                                st.markdown(f"**Document ID:** {selected_result.get('document_id', '')}")
-                                st.markdown(f"**Chunk ID:** {selected_result.get('chunk_id', '')}")
-                                st.markdown(f"**ความเกี่ยวข้อง:** {selected_result.get('score', 0):.2f}")
-                                
-                                st.markdown("### เนื้อหา:")
-                                st.markdown(selected_result.get('content', ''))
-                                
-                                st.markdown("### อ้างอิง PMQA:")
-                                if 'pmqa_references' in selected_result and selected_result['pmqa_references']:
-                                    for ref in selected_result['pmqa_references']:
-                                        st.markdown(
-                                            f"- {ref.get('category_name', '')} ({ref.get('category_id', '')})"
-                                            + (f" > {ref.get('subcategory_name', '')} ({ref.get('subcategory_id', '')})" if 'subcategory_name' in ref else "")
-                                            + (f" > {ref.get('criteria_name', '')} ({ref.get('criteria_id', '')})" if 'criteria_name' in ref else "")
-                                        )
-                                else:
-                                    st.markdown("ไม่มีข้อมูลอ้างอิง PMQA")
-                                
-                                # Metadata
-                                if 'metadata' in selected_result:
-                                    st.markdown("### ข้อมูลเพิ่มเติม:")
-                                    for key, value in selected_result['metadata'].items():
-                                        st.markdown(f"**{key}:** {value}")
                     else:
-                        st.info("ไม่พบผลลัพธ์")
-                else:
-                    st.error(f"ค้นหาล้มเหลว: {response.json().get('detail', 'ไม่ทราบสาเหตุ')}")
-            except Exception as e:
-                st.error(f"เกิดข้อผิดพลาด: {str(e)}")
+                        st.markdown("ไม่มีข้อมูลอ้างอิง PMQA")
+                    
+                    # Metadata
+                    if 'metadata' in selected_result:
+                        st.markdown("### ข้อมูลเพิ่มเติม:")
+                        for key, value in selected_result['metadata'].items():
+                            st.markdown(f"**{key}:** {value}")
+        else:
+            st.info("ไม่พบผลลัพธ์")
+
+@st.cache_data(ttl=120, max_entries=128, show_spinner=False)
+def _run_search(search_url, request_body):
+    """
+    Run a search against the API.
+    
+    Args:
+        search_url: Search endpoint URL
+        request_body: Search request serialized as JSON with sorted keys, so
+            identical requests share a cache entry
+        
+    Returns:
+        Search API response as a dictionary, with each result's PMQA references
+        pre-formatted under "_pmqa_str"
+    """
+    response = api().post(
+        search_url,
+        data=request_body.encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        timeout=TIMEOUT
+    )
+    response.raise_for_status()
+    results = response.json()
+    
+    # Format the PMQA references once per search rather than on every rerun
+    for result in results.get("results", []):
+        result["_pmqa_str"] = ", ".join(
+            f"{ref.get('category_name', '')} ({ref.get('category_id', '')})"
+            for ref in result.get("pmqa_references", ())
+        )
+    
+    return results
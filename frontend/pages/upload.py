@@ -1,9 +1,7 @@
 import streamlit as st
-import requests
 import time
 
-# API Base URL
-API_BASE_URL = "http://localhost:8000/api"
+from api_client import API_BASE_URL, TIMEOUT, POLL_TIMEOUT, api, error_detail
 
 def render():
     st.markdown('<div class="main-header">อัปโหลดเอกสาร</div>', unsafe_allow_html=True)
@@ -42,62 +40,111 @@ def render():
                 # Remove None values
                 form_data = {k: v for k, v in form_data.items() if v is not None}
                 
-                # Prepare the file
-                files = {"file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
+                # Pass the file object itself rather than a copy of its bytes
+                uploaded_file.seek(0)
+                files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
                 
                 # Send to API
-                response = requests.post(
+                response = api().post(
                     f"{API_BASE_URL}/documents",
                     files=files,
-                    data=form_data
+                    data=form_data,
+                    timeout=TIMEOUT
                 )
                 
                 if response.status_code == 202:
                     document_id = response.json().get("document_id")
                     st.success(f"อัปโหลดเอกสารสำเร็จ! กำลังประมวลผล... (ID: {document_id})")
                     
-                    # Display processing status
+                    # Track processing status outside the spinner
                     if document_id:
-                        st.info("สถานะการประมวลผล:")
-                        status_placeholder = st.empty()
-                        progress_bar = st.progress(0)
-                        
-                        # Poll for status updates
-                        complete = False
-                        retry_count = 0
-                        
-                        while not complete and retry_count < 30:  # Timeout after 30 tries
-                            try:
-                                status_response = requests.get(f"{API_BASE_URL}/documents/{document_id}/status")
-                                
-                                if status_response.status_code == 200:
-                                    status_data = status_response.json()
-                                    status = status_data.get("status", "unknown")
-                                    progress = status_data.get("progress", 0)
-                                    
-                                    # Update UI
-                                    status_placeholder.text(f"สถานะ: {status}, ความคืบหน้า: {progress}%")
-                                    progress_bar.progress(progress / 100)
-                                    
-                                    if status == "completed":
-                                        complete = True
-                                        st.success("ประมวลผลเอกสารเสร็จสิ้น!")
-                                        break
-                                    elif status == "failed":
-                                        st.error(f"ประมวลผลเอกสารล้มเหลว: {status_data.get('error', 'ไม่ทราบสาเหตุ')}")
-                                        break
-                                
-                                time.sleep(1)  # Wait for 1 second before polling again
-                                retry_count += 1
-                                
-                            except Exception as e:
-                                st.error(f"เกิดข้อผิดพลาดในการติดตามสถานะ: {str(e)}")
-                                break
-                        
-                        if not complete and retry_count >= 30:
-                            st.warning("หมดเวลาการติดตามสถานะ แต่เอกสารยังคงประมวลผลในเบื้องหลัง")
+                        _start_status_polling(document_id)
                 else:
-                    st.error(f"อัปโหลดเอกสารล้มเหลว: {response.json().get('detail', 'ไม่ทราบสาเหตุ')}")
+                    st.error(f"อัปโหลดเอกสารล้มเหลว: {error_detail(response)}")
             
             except Exception as e:
                 st.error(f"เกิดข้อผิดพลาด: {str(e)}")
+    
+    # Display processing status of uploaded documents
+    if st.session_state.get("pending_docs"):
+        st.info("สถานะการประมวลผล:")
+        if st.session_state.get("upload_done"):
+            for kind, message in st.session_state["upload_results"].values():
+                getattr(st, kind)(message)
+        else:
+            _poll_status()
+
+def _start_status_polling(document_id: str):
+    """
+    Add an uploaded document to the status poller.
+    
+    Starts a new batch if the previous one has finished.
+    
+    Args:
+        document_id: ID of the uploaded document
+    """
+    if st.session_state.get("upload_done", True):
+        st.session_state["pending_docs"] = []
+        st.session_state["upload_status"] = {}
+        st.session_state["upload_results"] = {}
+    
+    st.session_state["pending_docs"].append(document_id)
+    st.session_state["upload_done"] = False
+    
+    # Back off from 0.25s up to 4s between polls, giving up after 2 minutes
+    st.session_state["upload_delay"] = 0.25
+    st.session_state["upload_next_poll"] = 0.0
+    st.session_state["upload_deadline"] = time.monotonic() + 120
+
+@st.fragment(run_every="1s")
+def _poll_status():
+    """
+    Render the processing status of the uploaded documents.
+    
+    Runs as a fragment so each tick only reruns this block, not the whole page.
+    The API is only polled once the current backoff delay has elapsed, with one
+    batched request for all documents that are still processing.
+    """
+    state = st.session_state
+    results = state["upload_results"]
+    now = time.monotonic()
+    
+    pending = [document_id for document_id in state["pending_docs"] if document_id not in results]
+    if pending and now >= state["upload_next_poll"]:
+        try:
+            status_response = api().get(
+                f"{API_BASE_URL}/documents/status",
+                params={"ids": ",".join(pending)},
+                timeout=POLL_TIMEOUT
+            )
+            if status_response.status_code == 200:
+                for status_data in status_response.json():
+                    state["upload_status"][status_data["document_id"]] = status_data
+        except Exception as e:
+            for document_id in pending:
+                results[document_id] = ("error", f"เกิดข้อผิดพลาดในการติดตามสถานะ: {str(e)}")
+        
+        state["upload_next_poll"] = now + state["upload_delay"]
+        state["upload_delay"] = min(state["upload_delay"] * 2, 4.0)
+    
+    for document_id in state["pending_docs"]:
+        status_data = state["upload_status"].get(document_id, {})
+        status = status_data.get("status", "unknown")
+        progress = status_data.get("progress", 0)
+        
+        # Update UI
+        st.text(f"{document_id} - สถานะ: {status}, ความคืบหน้า: {progress}%")
+        st.progress(progress / 100)
+        
+        if document_id not in results:
+            if status == "completed":
+                results[document_id] = ("success", f"ประมวลผลเอกสาร {document_id} เสร็จสิ้น!")
+            elif status == "failed":
+                results[document_id] = ("error", f"ประมวลผลเอกสาร {document_id} ล้มเหลว: {status_data.get('error', 'ไม่ทราบสาเหตุ')}")
+            elif now > state["upload_deadline"]:
+                results[document_id] = ("warning", f"หมดเวลาการติดตามสถานะ แต่เอกสาร {document_id} ยังคงประมวลผลในเบื้องหลัง")
+    
+    # Stop ticking and let the full page render the final results
+    if len(results) == len(state["pending_docs"]):
+        state["upload_done"] = True
+        st.rerun()
@@ -1,34 +1,104 @@
 import os
 import sys
 import json
-from neo4j import GraphDatabase
+import functools
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
+
 # Add parent directory to system path to import app modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Load environment variables
 load_dotenv()
 
+# Full-text index DDL shared with the API, so the two can't drift apart
+from app.db.schema import FULLTEXT_INDEXES
+
 # Neo4j configuration
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "50"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
 
 # PMQA structure file
 PMQA_STRUCTURE_FILE = os.getenv("PMQA_STRUCTURE_FILE", "../data/pmqa_structure.json")
 
+# Rows per UNWIND transaction when loading the PMQA structure
+PMQA_BATCH_SIZE = int(os.getenv("PMQA_BATCH_SIZE", "1000"))
+
+# One UNWIND query per level; each level matches the parents merged by the previous one
+_CATEGORY_QUERY = """
+UNWIND $rows AS r
+MERGE (c:Category {id: r.id})
+SET c.name = r.name, c.description = r.description
+"""
+
+_SUBCATEGORY_QUERY = """
+UNWIND $rows AS r
+MATCH (c:Category {id: r.category_id})
+MERGE (s:Subcategory {id: r.id})
+SET s.name = r.name, s.description = r.description, s.category_id = r.category_id
+MERGE (c)-[:HAS_SUBCATEGORY]->(s)
+"""
+
+_CRITERIA_QUERY = """
+UNWIND $rows AS r
+MATCH (s:Subcategory {id: r.subcategory_id})
+MERGE (c:Criteria {id: r.id})
+SET c.name = r.name, c.description = r.description, c.subcategory_id = r.subcategory_id
+MERGE (s)-[:HAS_CRITERIA]->(c)
+"""
+
+_CLEAR_PMQA_QUERY = """
+MATCH (n)
+WHERE n:Category OR n:Subcategory OR n:Criteria
+DETACH DELETE n
+"""
+
+# (statement, description) for each uniqueness constraint and index
+_CONSTRAINTS = [
+    ("CREATE CONSTRAINT category_id_unique IF NOT EXISTS FOR (c:Category) REQUIRE c.id IS UNIQUE", "Category.id"),
+    ("CREATE CONSTRAINT subcategory_id_unique IF NOT EXISTS FOR (s:Subcategory) REQUIRE s.id IS UNIQUE", "Subcategory.id"),
+    ("CREATE CONSTRAINT criteria_id_unique IF NOT EXISTS FOR (c:Criteria) REQUIRE c.id IS UNIQUE", "Criteria.id"),
+    ("CREATE CONSTRAINT document_id_unique IF NOT EXISTS FOR (d:Document) REQUIRE d.id IS UNIQUE", "Document.id"),
+    ("CREATE CONSTRAINT chunk_id_unique IF NOT EXISTS FOR (c:Chunk) REQUIRE c.id IS UNIQUE", "Chunk.id")
+]
+
+_INDICES = [
+    ("CREATE INDEX document_title_index IF NOT EXISTS FOR (d:Document) ON (d.title)", "index for Document.title"),
+    ("CREATE INDEX document_category_index IF NOT EXISTS FOR (d:Document) ON (d.category)", "index for Document.category")
+]
+
+# Range index on Chunk.content from earlier versions, superseded by chunk_content_fts
+_DROP_CHUNK_CONTENT_INDEX = "DROP INDEX chunk_content_index IF EXISTS"
+
+@functools.lru_cache(maxsize=1)
 def connect_to_neo4j():
     """
     Connect to Neo4j database.
     
+    The driver is created once and shared by every caller in the process.
+    
     Returns:
         Neo4j driver instance
     """
+    # Imported here so loading this module (e.g. to check it) doesn't pay for the driver
+    from neo4j import GraphDatabase
+    
     try:
         driver = GraphDatabase.driver(
             NEO4J_URI,
-            auth=(NEO4J_USER, NEO4J_PASSWORD)
+            auth=(NEO4J_USER, NEO4J_PASSWORD),
+            max_connection_pool_size=NEO4J_MAX_CONNECTION_POOL_SIZE,
+            connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+            max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+            keep_alive=True
         )
         print(f"Connected to Neo4j at {NEO4J_URI}")
         return driver
@@ -36,40 +106,31 @@ def connect_to_neo4j():
         print(f"Error connecting to Neo4j: {str(e)}")
         sys.exit(1)
 
+def _run_statements(tx, statements):
+    """
+    Run several statements in one transaction.
+    
+    Args:
+        tx: Neo4j transaction
+        statements: Cypher statements
+    """
+    for statement in statements:
+        tx.run(statement)
+
 def create_constraints(driver):
     """
     Create uniqueness constraints for the database.
     
+    The statements are IF NOT EXISTS, so they are all sent in one transaction
+    without listing the existing constraints first.
+    
     Args:
         driver: Neo4j driver instance
     """
     with driver.session() as session:
         try:
-            # Check if constraints exist
-            result = session.run("SHOW CONSTRAINTS")
-            constraints = [record["name"] for record in result]
-            
-            # Create constraints if they don't exist
-            if "category_id_unique" not in constraints:
-                session.run("CREATE CONSTRAINT category_id_unique IF NOT EXISTS FOR (c:Category) REQUIRE c.id IS UNIQUE")
-                print("Created constraint for Category.id")
-            
-            if "subcategory_id_unique" not in constraints:
-                session.run("CREATE CONSTRAINT subcategory_id_unique IF NOT EXISTS FOR (s:Subcategory) REQUIRE s.id IS UNIQUE")
-                print("Created constraint for Subcategory.id")
-                
-            if "criteria_id_unique" not in constraints:
-                session.run("CREATE CONSTRAINT criteria_id_unique IF NOT EXISTS FOR (c:Criteria) REQUIRE c.id IS UNIQUE")
-                print("Created constraint for Criteria.id")
-                
-            if "document_id_unique" not in constraints:
-                session.run("CREATE CONSTRAINT document_id_unique IF NOT EXISTS FOR (d:Document) REQUIRE d.id IS UNIQUE")
-                print("Created constraint for Document.id")
-                
-            if "chunk_id_unique" not in constraints:
-                session.run("CREATE CONSTRAINT chunk_id_unique IF NOT EXISTS FOR (c:Chunk) REQUIRE c.id IS UNIQUE")
-                print("Created constraint for Chunk.id")
-                
+            session.execute_write(_run_statements, [statement for statement, _ in _CONSTRAINTS])
+            print(f"Ensured constraints for {', '.join(label for _, label in _CONSTRAINTS)}")
         except Exception as e:
             print(f"Error creating constraints: {str(e)}")
             raise
@@ -85,133 +146,147 @@ def load_pmqa_structure(file_path):
         PMQA structure as a dictionary
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            pmqa_data = json.load(f)
+        # Read bytes; both parsers decode UTF-8 themselves
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        pmqa_data = orjson.loads(data) if orjson is not None else json.loads(data)
         print(f"Loaded PMQA structure from {file_path}")
         return pmqa_data
     except Exception as e:
         print(f"Error loading PMQA structure: {str(e)}")
         sys.exit(1)
 
+def _flatten_pmqa_structure(pmqa_data):
+    """
+    Flatten the PMQA structure into one row list per node type.
+    
+    Args:
+        pmqa_data: PMQA structure as a dictionary
+        
+    Returns:
+        Tuple of (category rows, subcategory rows, criteria rows)
+    """
+    category_rows = []
+    subcategory_rows = []
+    criteria_rows = []
+    
+    for category in pmqa_data.get("categories", []):
+        category_rows.append({
+            "id": category["id"],
+            "name": category["name"],
+            "description": category.get("description", "")
+        })
+        
+        for subcategory in category.get("subcategories", []):
+            subcategory_rows.append({
+                "id": subcategory["id"],
+                "name": subcategory["name"],
+                "description": subcategory.get("description", ""),
+                "category_id": category["id"]
+            })
+            
+            for criterion in subcategory.get("criteria", []):
+                criteria_rows.append({
+                    "id": criterion["id"],
+                    "name": criterion["name"],
+                    "description": criterion.get("description", ""),
+                    "subcategory_id": subcategory["id"]
+                })
+    
+    return category_rows, subcategory_rows, criteria_rows
+
+def _batched(rows, n):
+    """
+    Split rows into consecutive batches.
+    
+    Args:
+        rows: List of rows
+        n: Maximum batch size
+        
+    Yields:
+        Slices of at most n rows
+    """
+    for i in range(0, len(rows), n):
+        yield rows[i:i + n]
+
+def _clear_pmqa_structure(tx):
+    """
+    Delete the existing PMQA structure.
+    
+    Args:
+        tx: Neo4j transaction
+    """
+    tx.run(_CLEAR_PMQA_QUERY)
+
+def _merge_rows(tx, query, rows):
+    """
+    Run an UNWIND query for a batch of rows.
+    
+    Args:
+        tx: Neo4j transaction
+        query: Cypher query reading the batch from $rows
+        rows: Batch of rows
+    """
+    tx.run(query, rows=rows)
+
 def create_pmqa_structure(driver, pmqa_data):
     """
     Create PMQA structure in Neo4j.
     
+    The structure is flattened into row lists and written with UNWIND queries,
+    one transaction per batch of PMQA_BATCH_SIZE rows, instead of one query per node.
+    
     Args:
         driver: Neo4j driver instance
         pmqa_data: PMQA structure as a dictionary
     """
-    categories = pmqa_data.get("categories", [])
+    category_rows, subcategory_rows, criteria_rows = _flatten_pmqa_structure(pmqa_data)
     
     with driver.session() as session:
-        # First, clear existing structure
         try:
-            session.run(
-                """
-                MATCH (n) 
-                WHERE n:Category OR n:Subcategory OR n:Criteria 
-                DETACH DELETE n
-                """
-            )
+            # First, clear existing structure
+            session.execute_write(_clear_pmqa_structure)
             print("Cleared existing PMQA structure")
+            
+            # Parents first, so each level's MATCH finds the committed nodes above it;
+            # progress is reported once per batch rather than per node
+            created = {"categories": 0, "subcategories": 0, "criteria": 0}
+            for level, query, rows in (
+                ("categories", _CATEGORY_QUERY, category_rows),
+                ("subcategories", _SUBCATEGORY_QUERY, subcategory_rows),
+                ("criteria", _CRITERIA_QUERY, criteria_rows)
+            ):
+                for batch in _batched(rows, PMQA_BATCH_SIZE):
+                    session.execute_write(_merge_rows, query, batch)
+                    created[level] += len(batch)
+                    print(f"Created {created[level]}/{len(rows)} {level}")
+            
+            print(
+                f"Created PMQA structure: {created['categories']} categories, "
+                f"{created['subcategories']} subcategories, {created['criteria']} criteria"
+            )
         except Exception as e:
-            print(f"Error clearing existing structure: {str(e)}")
+            print(f"Error creating PMQA structure: {str(e)}")
             raise
-        
-        # Create categories, subcategories, and criteria
-        for category in categories:
-            # Create category
-            try:
-                session.run(
-                    """
-                    CREATE (c:Category {
-                        id: $id,
-                        name: $name,
-                        description: $description
-                    })
-                    """,
-                    id=category["id"],
-                    name=category["name"],
-                    description=category.get("description", "")
-                )
-                print(f"Created Category {category['id']}: {category['name']}")
-                
-                # Create subcategories
-                subcategories = category.get("subcategories", [])
-                for subcategory in subcategories:
-                    try:
-                        session.run(
-                            """
-                            MATCH (c:Category {id: $category_id})
-                            CREATE (s:Subcategory {
-                                id: $id,
-                                name: $name,
-                                description: $description,
-                                category_id: $category_id
-                            })
-                            CREATE (c)-[:HAS_SUBCATEGORY]->(s)
-                            """,
-                            category_id=category["id"],
-                            id=subcategory["id"],
-                            name=subcategory["name"],
-                            description=subcategory.get("description", "")
-                        )
-                        print(f"Created Subcategory {subcategory['id']}: {subcategory['name']}")
-                        
-                        # Create criteria
-                        criteria = subcategory.get("criteria", [])
-                        for criterion in criteria:
-                            try:
-                                session.run(
-                                    """
-                                    MATCH (s:Subcategory {id: $subcategory_id})
-                                    CREATE (c:Criteria {
-                                        id: $id,
-                                        name: $name,
-                                        description: $description,
-                                        subcategory_id: $subcategory_id
-                                    })
-                                    CREATE (s)-[:HAS_CRITERIA]->(c)
-                                    """,
-                                    subcategory_id=subcategory["id"],
-                                    id=criterion["id"],
-                                    name=criterion["name"],
-                                    description=criterion.get("description", "")
-                                )
-                                print(f"Created Criteria {criterion['id']}: {criterion['name']}")
-                            except Exception as e:
-                                print(f"Error creating criteria {criterion['id']}: {str(e)}")
-                    except Exception as e:
-                        print(f"Error creating subcategory {subcategory['id']}: {str(e)}")
-            except Exception as e:
-                print(f"Error creating category {category['id']}: {str(e)}")
 
 def create_indices(driver):
     """
     Create indices for better query performance.
     
+    The statements are IF EXISTS / IF NOT EXISTS, so they are all sent in one
+    transaction without listing the existing indices first.
+    
     Args:
         driver: Neo4j driver instance
     """
+    indices = _INDICES + FULLTEXT_INDEXES
     with driver.session() as session:
         try:
-            # Check if indices exist
-            result = session.run("SHOW INDEXES")
-            indices = [record["name"] for record in result if "name" in record]
-            
-            # Create indices if they don't exist
-            if "document_title_index" not in indices:
-                session.run("CREATE INDEX document_title_index IF NOT EXISTS FOR (d:Document) ON (d.title)")
-                print("Created index for Document.title")
-                
-            if "document_category_index" not in indices:
-                session.run("CREATE INDEX document_category_index IF NOT EXISTS FOR (d:Document) ON (d.category)")
-                print("Created index for Document.category")
-                
-            if "chunk_content_index" not in indices:
-                session.run("CREATE INDEX chunk_content_index IF NOT EXISTS FOR (c:Chunk) ON (c.content)")
-                print("Created index for Chunk.content")
-                
+            # Chunk content is searched through chunk_content_fts; a range index on
+            # the whole text only slows down chunk writes
+            statements = [_DROP_CHUNK_CONTENT_INDEX] + [statement for statement, _ in indices]
+            session.execute_write(_run_statements, statements)
+            print(f"Ensured {', '.join(label for _, label in indices)}")
         except Exception as e:
             print(f"Error creating indices: {str(e)}")
             raise
@@ -226,18 +301,18 @@ def main():
     driver = connect_to_neo4j()
     
     try:
-        # Create constraints
+        # Create constraints first; their backing indexes serve the MERGE lookups during the load
         create_constraints(driver)
         
-        # Create indices
-        create_indices(driver)
-        
         # Load PMQA structure
         pmqa_data = load_pmqa_structure(PMQA_STRUCTURE_FILE)
         
         # Create PMQA structure in Neo4j
         create_pmqa_structure(driver, pmqa_data)
         
+        # Create the remaining indices after the bulk load, so it doesn't have to maintain them
+        create_indices(driver)
+        
         print("Neo4j database initialization completed successfully!")
     
     except Exception as e:
@@ -1,7 +1,9 @@
 import os
 import sys
-import requests
+import json
+import httpx
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,49 +14,38 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
 ENTITY_MODEL = os.getenv("ENTITY_MODEL", "llama3")
 
-def check_ollama_available():
+# Shared client, so the probe and the pulls reuse keep-alive connections
+_client = httpx.Client(base_url=OLLAMA_BASE_URL, timeout=httpx.Timeout(10.0))
+
+def probe_ollama():
     """
-    Check if Ollama API is available.
+    Check if Ollama API is available and list its models.
+    
+    Both come from a single /api/tags request.
     
     Returns:
-        bool: True if available, False otherwise
+        tuple: (True if available, list of available model names)
     """
     try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags")
+        response = _client.get("/api/tags", timeout=5)
         if response.status_code == 200:
             print(f"Ollama API is available at {OLLAMA_BASE_URL}")
-            return True
+            models = [model["name"] for model in response.json().get("models", [])]
+            return True, models
         else:
             print(f"Ollama API returned status code {response.status_code}")
-            return False
+            return False, []
     except Exception as e:
         print(f"Error connecting to Ollama API: {str(e)}")
-        return False
-
-def get_available_models():
-    """
-    Get list of models available in Ollama.
-    
-    Returns:
-        list: List of available model names
-    """
-    try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags")
-        if response.status_code == 200:
-            models_data = response.json()
-            models = [model["name"] for model in models_data.get("models", [])]
-            return models
-        else:
-            print(f"Error getting available models: Status code {response.status_code}")
-            return []
-    except Exception as e:
-        print(f"Error getting available models: {str(e)}")
-        return []
+        return False, []
 
 def pull_model(model_name):
     """
     Pull a model from Ollama.
     
+    Reads the pull progress as it streams in, so progress is reported while the
+    model downloads and an error ends the pull as soon as Ollama reports it.
+    
     Args:
         model_name: Name of the model to pull
         
@@ -64,18 +55,48 @@ def pull_model(model_name):
     print(f"Pulling model {model_name}...")
     
     try:
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/pull",
-            json={"name": model_name}
-        )
+        with _client.stream(
+            "POST",
+            "/api/pull",
+            json={"name": model_name, "stream": True},
+            timeout=httpx.Timeout(10.0, read=None)
+        ) as response:
+            if response.status_code != 200:
+                print(f"Error pulling model {model_name}: Status code {response.status_code}")
+                print(response.read().decode("utf-8", errors="replace"))
+                return False
+            
+            last_status = None
+            last_percent = -10
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                
+                event = json.loads(line)
+                if event.get("error"):
+                    print(f"Error pulling model {model_name}: {event['error']}")
+                    return False
+                
+                status = event.get("status", "")
+                if status == "success":
+                    print(f"Successfully pulled model {model_name}")
+                    return True
+                
+                # Report status changes, and download progress in 10% steps
+                if status != last_status:
+                    print(f"  {model_name}: {status}")
+                    last_status = status
+                    last_percent = -10
+                
+                total = event.get("total")
+                if total:
+                    percent = int(event.get("completed", 0) * 100 / total)
+                    if percent >= last_percent + 10:
+                        print(f"  {model_name}: {percent}%")
+                        last_percent = percent
         
-        if response.status_code == 200:
-            print(f"Successfully pulled model {model_name}")
-            return True
-        else:
-            print(f"Error pulling model {model_name}: Status code {response.status_code}")
-            print(response.text)
-            return False
+        print(f"Error pulling model {model_name}: stream ended before the pull completed")
+        return False
     except Exception as e:
         print(f"Error pulling model {model_name}: {str(e)}")
         return False
@@ -86,30 +107,33 @@ def main():
     """
     print("Checking Ollama availability...")
     
-    # Check if Ollama is available
-    if not check_ollama_available():
+    # Check if Ollama is available and get available models
+    available, available_models = probe_ollama()
+    if not available:
         print("Ollama is not available. Please make sure Ollama is running.")
         sys.exit(1)
     
-    # Get available models
-    available_models = get_available_models()
     print(f"Available models: {', '.join(available_models) if available_models else 'None'}")
     
-    # Pull embedding model if not available
-    if EMBEDDING_MODEL not in available_models:
-        if not pull_model(EMBEDDING_MODEL):
-            print(f"Failed to pull embedding model {EMBEDDING_MODEL}")
-            sys.exit(1)
-    else:
-        print(f"Embedding model {EMBEDDING_MODEL} is already available")
+    # Collect the required models that aren't available yet
+    to_pull = {}
+    for kind, model_name in (("Embedding", EMBEDDING_MODEL), ("Entity", ENTITY_MODEL)):
+        if model_name in available_models:
+            print(f"{kind} model {model_name} is already available")
+        else:
+            to_pull.setdefault(model_name, kind)
     
-    # Pull entity model if not available
-    if ENTITY_MODEL not in available_models:
-        if not pull_model(ENTITY_MODEL):
-            print(f"Failed to pull entity model {ENTITY_MODEL}")
+    # Pull missing models concurrently; each pull is a download on the Ollama server
+    if to_pull:
+        with ThreadPoolExecutor(max_workers=len(to_pull)) as executor:
+            futures = {model_name: executor.submit(pull_model, model_name) for model_name in to_pull}
+            results = {model_name: future.result() for model_name, future in futures.items()}
+        
+        failed = [model_name for model_name, pulled in results.items() if not pulled]
+        if failed:
+            for model_name in failed:
+                print(f"Failed to pull {to_pull[model_name].lower()} model {model_name}")
             sys.exit(1)
-    else:
-        print(f"Entity model {ENTITY_MODEL} is already available")
     
     print("All required models are available!")
 
@@ -3,8 +3,6 @@ import pytest
 import asyncio
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
-import tempfile
-import shutil
 
 # กำหนดค่าสภาพแวดล้อมการทดสอบ
 os.environ["TESTING"] = "True"
@@ -14,23 +12,74 @@ os.environ["NEO4J_PASSWORD"] = "password"
 os.environ["OLLAMA_BASE_URL"] = "http://localhost:11434"
 os.environ["CLAUDE_API_KEY"] = "dummy-api-key-for-testing"
 
+# Mock ของ DocumentService ที่ใช้ร่วมกันในหลายไฟล์ทดสอบ
+class MockDocumentService:
+    def __init__(self):
+        # เก็บข้อมูลจำลองเป็น dict เพื่อค้นหาแบบ O(1) เหมือนกับ service จริง
+        self._documents = {
+            "doc123": {
+                "id": "doc123",
+                "filename": "test.pdf",
+                "category": "หมวด_1",
+                "subcategory": "1.1",
+                "content": "Test content",
+                "status": "processed"
+            }
+        }
+        self._chunks = {
+            "doc123": [
+                {"id": "chunk1", "content": "Test content chunk 1", "document_id": "doc123"},
+                {"id": "chunk2", "content": "Test content chunk 2", "document_id": "doc123"}
+            ]
+        }
+        self._documents_by_category = {
+            "หมวด_1": [
+                {"id": "doc123", "filename": "test.pdf", "category": "หมวด_1"},
+                {"id": "doc456", "filename": "test2.pdf", "category": "หมวด_1"}
+            ]
+        }
+    
+    async def upload_document(self, file, filename, category, subcategory):
+        return "doc123"
+    
+    async def get_document(self, document_id):
+        return self._documents.get(document_id)
+    
+    async def get_document_chunks(self, document_id):
+        return self._chunks.get(document_id, [])
+    
+    async def delete_document(self, document_id):
+        return document_id in self._documents
+    
+    async def get_documents_by_category(self, category):
+        return self._documents_by_category.get(category, [])
+
 # Fixtures สำหรับการทดสอบ
-@pytest.fixture
+@pytest.fixture(scope="session")
 def event_loop():
-    """Create an instance of the default event loop for each test case."""
+    """Create one event loop shared by the whole test session."""
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
     loop.close()
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_client():
-    """สร้าง TestClient สำหรับ FastAPI"""
+    """สร้าง TestClient สำหรับ FastAPI (ใช้ร่วมกันทั้ง session เพื่อให้ startup ทำงานครั้งเดียว)"""
     # Import ที่นี่เพื่อไม่ให้มีการเรียกใช้ app ตอนเริ่มต้น
     from app.main import app
     
     with TestClient(app) as client:
         yield client
 
+@pytest.fixture(scope="session")
+def document_service():
+    """สร้าง instance ของ DocumentService สำหรับการทดสอบ (mock ไม่เก็บ state จึงสร้างครั้งเดียวต่อ session)"""
+    # สำหรับการทดสอบจริง ให้สร้าง instance ของ DocumentService จริงๆ
+    # return DocumentService()
+    
+    # สำหรับตัวอย่างนี้ ใช้ Mock แทน
+    return MockDocumentService()
+
 @pytest.fixture
 def mock_neo4j_driver():
     """Mock สำหรับ Neo4j Driver"""
@@ -59,31 +108,25 @@ def mock_claude_client():
         mock.return_value = mock_instance
         yield mock_instance
 
-@pytest.fixture
-def temp_document_dir():
-    """สร้างไดเรกทอรีชั่วคราวสำหรับทดสอบเอกสาร"""
-    temp_dir = tempfile.mkdtemp()
-    os.environ["DOCUMENTS_BASE_DIR"] = temp_dir
+@pytest.fixture(scope="session")
+def temp_document_dir(tmp_path_factory):
+    """สร้างไดเรกทอรีชั่วคราวสำหรับทดสอบเอกสาร (สร้างครั้งเดียวต่อ session, pytest ลบให้เอง)"""
+    temp_dir = tmp_path_factory.mktemp("documents")
+    os.environ["DOCUMENTS_BASE_DIR"] = str(temp_dir)
     
     # สร้างโครงสร้างโฟลเดอร์หมวดหมู่
     for category in ["หมวด_1", "หมวด_2", "หมวด_3", "หมวด_4", "หมวด_5", "หมวด_6", "หมวด_7", "raw"]:
-        os.makedirs(os.path.join(temp_dir, category), exist_ok=True)
+        (temp_dir / category).mkdir()
     
-    yield temp_dir
-    
-    # ลบไดเรกทอรีชั่วคราวเมื่อเสร็จสิ้นการทดสอบ
-    shutil.rmtree(temp_dir)
+    return str(temp_dir)
 
-@pytest.fixture
-def temp_vector_db_dir():
-    """สร้างไดเรกทอรีชั่วคราวสำหรับทดสอบ Vector Database"""
-    temp_dir = tempfile.mkdtemp()
-    os.environ["CHROMA_PERSIST_DIRECTORY"] = temp_dir
-    
-    yield temp_dir
+@pytest.fixture(scope="session")
+def temp_vector_db_dir(tmp_path_factory):
+    """สร้างไดเรกทอรีชั่วคราวสำหรับทดสอบ Vector Database (สร้างครั้งเดียวต่อ session, pytest ลบให้เอง)"""
+    temp_dir = tmp_path_factory.mktemp("chroma_db")
+    os.environ["CHROMA_PERSIST_DIRECTORY"] = str(temp_dir)
     
-    # ลบไดเรกทอรีชั่วคราวเมื่อเสร็จสิ้นการทดสอบ
-    shutil.rmtree(temp_dir)
+    return str(temp_dir)
 
 @pytest.fixture
 def sample_pdf_content():
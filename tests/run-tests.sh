@@ -10,6 +10,9 @@ echo "============================================"
 PROJECT_DIR="/Users/witoonpongsilathong/MCP_folder/mm_dev_mode/hope_x1"
 TEST_DIR="/Users/witoonpongsilathong/MCP_folder/mm_dev_mode/hope_x1/tests"
 
+# -n auto กระจายการทดสอบไปหลาย worker (pytest-xdist); loadgroup ให้ test ที่อยู่ xdist_group เดียวกันรันบน worker เดียวกัน
+XDIST_OPTS="-n auto --dist=loadgroup"
+
 # ตรวจสอบว่าสภาพแวดล้อมพร้อมสำหรับการทดสอบหรือไม่
 check_environment() {
     echo "ตรวจสอบสภาพแวดล้อมการทดสอบ..."
@@ -28,7 +31,7 @@ check_environment() {
     # ตรวจสอบว่า pytest ติดตั้งแล้ว
     if ! command -v pytest &> /dev/null; then
         echo "❌ ไม่พบ pytest - กำลังติดตั้ง..."
-        pip install pytest pytest-cov pytest-asyncio httpx pytest-mock
+        pip install pytest pytest-cov pytest-asyncio pytest-xdist httpx pytest-mock
     fi
     
     echo "✅ สภาพแวดล้อมพร้อมสำหรับการทดสอบ"
@@ -63,7 +66,7 @@ run_unit_tests() {
     
     # รันการทดสอบหน่วยถ้ามีไฟล์ทดสอบ
     if [ -d "${TEST_DIR}/unit" ] && [ "$(ls -A ${TEST_DIR}/unit 2>/dev/null)" ]; then
-        cd ${PROJECT_DIR} && python -m pytest ${TEST_DIR}/unit -v
+        cd ${PROJECT_DIR} && python -m pytest ${TEST_DIR}/unit -v ${XDIST_OPTS}
     else
         echo "⚠️ ไม่พบไฟล์การทดสอบหน่วย"
     fi
@@ -77,7 +80,7 @@ run_integration_tests() {
     
     # รันการทดสอบการทำงานร่วมกันถ้ามีไฟล์ทดสอบ
     if [ -d "${TEST_DIR}/integration" ] && [ "$(ls -A ${TEST_DIR}/integration 2>/dev/null)" ]; then
-        cd ${PROJECT_DIR} && python -m pytest ${TEST_DIR}/integration -v
+        cd ${PROJECT_DIR} && python -m pytest ${TEST_DIR}/integration -v ${XDIST_OPTS}
     else
         echo "⚠️ ไม่พบไฟล์การทดสอบการทำงานร่วมกัน"
     fi
@@ -104,7 +107,7 @@ run_system_tests() {
     
     # รันการทดสอบระบบถ้ามีไฟล์ทดสอบ
     if [ -d "${TEST_DIR}/system" ] && [ "$(ls -A ${TEST_DIR}/system 2>/dev/null)" ]; then
-        cd ${PROJECT_DIR} && python -m pytest ${TEST_DIR}/system -v
+        cd ${PROJECT_DIR} && python -m pytest ${TEST_DIR}/system -v ${XDIST_OPTS}
     else
         echo "⚠️ ไม่พบไฟล์การทดสอบระบบ"
     fi
@@ -124,7 +127,7 @@ run_performance_tests() {
     
     # รันการทดสอบประสิทธิภาพถ้ามีไฟล์ทดสอบ
     if [ -d "${TEST_DIR}/performance" ] && [ "$(ls -A ${TEST_DIR}/performance 2>/dev/null)" ]; then
-        cd ${PROJECT_DIR} && python -m pytest ${TEST_DIR}/performance -v
+        cd ${PROJECT_DIR} && python -m pytest ${TEST_DIR}/performance -v ${XDIST_OPTS}
     else
         echo "⚠️ ไม่พบไฟล์การทดสอบประสิทธิภาพ"
     fi
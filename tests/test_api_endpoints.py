@@ -113,9 +113,10 @@ async def get_pmqa_structure():
 
 # การทดสอบ API Endpoints
 @pytest.mark.api
+@pytest.mark.xdist_group("api")
 class TestAPIEndpoints:
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def client(self):
         """สร้าง TestClient สำหรับการทดสอบ API"""
         # สำหรับการทดสอบจริง ให้ใช้ app จริงๆ
@@ -1,6 +1,7 @@
 import pytest
 import asyncio
 import os
+from functools import lru_cache
 from unittest.mock import patch, MagicMock
 import numpy as np
 
@@ -10,41 +11,27 @@ import numpy as np
 # from app.services.entity_service import EntityService
 # from app.db.vector_db import vector_db
 
+# vector จำลองขนาด 384 มิติ (ขนาดเดียวกับ nomic-embed-text) แคชตามข้อความ/chunk ID
+# เพื่อให้คำค้นหาที่ซ้ำกันได้ vector เดิมโดยไม่ต้องสุ่มใหม่
+# เก็บเป็น float32 ndarray แบบอ่านอย่างเดียว เพราะ array เดียวกันถูกคืนให้ทุกการเรียก
+@lru_cache(maxsize=1024)
+def _mock_vector(key):
+    vector = np.random.rand(384).astype(np.float32)
+    vector.flags.writeable = False
+    return vector
+
 # Mock ของ EmbeddingService สำหรับการทดสอบ
 class MockEmbeddingService:
     async def create_embedding(self, text):
-        # สร้าง vector จำลองขนาด 384 มิติ (ขนาดเดียวกับ nomic-embed-text)
-        return np.random.rand(384).tolist()
+        return _mock_vector(("text", text))
     
     async def get_embedding(self, chunk_id):
-        # สร้าง vector จำลองขนาด 384 มิติ
-        return np.random.rand(384).tolist()
+        return _mock_vector(("chunk", chunk_id))
     
     async def create_embeddings_for_document(self, document_id, chunks):
-        # จำลองการสร้าง embeddings สำหรับทุก chunk
-        return [{"id": chunk["id"], "embedding": np.random.rand(384).tolist()} for chunk in chunks]
-
-# Mock ของ DocumentService สำหรับการทดสอบ
-class MockDocumentService:
-    async def get_document(self, document_id):
-        if document_id == "doc123":
-            return {
-                "id": "doc123",
-                "filename": "test.pdf",
-                "category": "หมวด_1",
-                "subcategory": "1.1",
-                "content": "Test content",
-                "status": "processed"
-            }
-        return None
-    
-    async def get_document_chunks(self, document_id):
-        if document_id == "doc123":
-            return [
-                {"id": "chunk1", "content": "Test content chunk 1", "document_id": "doc123"},
-                {"id": "chunk2", "content": "Test content chunk 2", "document_id": "doc123"}
-            ]
-        return []
+        # จำลองการสร้าง embeddings สำหรับทุก chunk ในครั้งเดียว (แบบ batch เหมือน EmbeddingService.create_embeddings)
+        matrix = np.random.rand(len(chunks), 384).astype(np.float32)
+        return [{"id": chunk["id"], "embedding": matrix[i]} for i, chunk in enumerate(chunks)]
 
 # Mock ของ VectorDB สำหรับการทดสอบ
 class MockVectorDB:
@@ -61,10 +48,11 @@ class MockVectorDB:
         return self.collections[name]
 
 # การทดสอบการทำงานร่วมกันสำหรับกระบวนการ Embedding
+# mock ไม่เก็บ state ระหว่างการทดสอบ จึงสร้างครั้งเดียวต่อคลาสแทนการสร้างใหม่ทุกการทดสอบ (document_service มาจาก conftest.py)
 @pytest.mark.integration
 class TestEmbeddingIntegration:
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def embedding_service(self):
         """สร้าง instance ของ EmbeddingService สำหรับการทดสอบ"""
         # สำหรับการทดสอบจริง ให้สร้าง instance ของ EmbeddingService จริงๆ
@@ -73,22 +61,12 @@ class TestEmbeddingIntegration:
         # สำหรับตัวอย่างนี้ ใช้ Mock แทน
         return MockEmbeddingService()
     
-    @pytest.fixture
-    def document_service(self):
-        """สร้าง instance ของ DocumentService สำหรับการทดสอบ"""
-        # สำหรับการทดสอบจริง ให้สร้าง instance ของ DocumentService จริงๆ
-        # return DocumentService()
-        
-        # สำหรับตัวอย่างนี้ ใช้ Mock แทน
-        return MockDocumentService()
-    
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def mock_vector_db(self):
-        """สร้าง mock ของ VectorDB สำหรับการทดสอบ"""
+        """สร้าง mock ของ VectorDB สำหรับการทดสอบ (patch ครั้งเดียวต่อคลาส)"""
         with patch("app.db.vector_db.vector_db", MockVectorDB()):
             yield
     
-    @pytest.mark.asyncio
     async def test_embedding_creation_flow(self, embedding_service, document_service, mock_vector_db):
         """ทดสอบกระบวนการสร้าง Embedding แบบครบวงจร"""
         # ดึงข้อมูลเอกสารและ chunks
@@ -107,9 +85,8 @@ class TestEmbeddingIntegration:
         for embedding in embeddings:
             assert "id" in embedding, "embedding ไม่มี id"
             assert "embedding" in embedding, "embedding ไม่มี vector"
-            assert len(embedding["embedding"]) == 384, "ขนาดของ embedding ไม่ถูกต้อง"
+            assert embedding["embedding"].shape == (384,), "ขนาดของ embedding ไม่ถูกต้อง"
     
-    @pytest.mark.asyncio
     async def test_embedding_creation_for_query(self, embedding_service):
         """ทดสอบการสร้าง Embedding สำหรับคำค้นหา"""
         # สร้าง embedding สำหรับคำค้นหา
@@ -118,9 +95,8 @@ class TestEmbeddingIntegration:
         
         # ตรวจสอบผลลัพธ์
         assert embedding is not None, "ไม่สามารถสร้าง embedding สำหรับคำค้นหาได้"
-        assert len(embedding) == 384, "ขนาดของ embedding ไม่ถูกต้อง"
+        assert embedding.shape == (384,), "ขนาดของ embedding ไม่ถูกต้อง"
     
-    @pytest.mark.asyncio
     async def test_get_embedding_by_chunk_id(self, embedding_service):
         """ทดสอบการดึง Embedding โดยใช้ chunk ID"""
         # ดึง embedding โดยใช้ chunk ID
@@ -129,9 +105,8 @@ class TestEmbeddingIntegration:
         
         # ตรวจสอบผลลัพธ์
         assert embedding is not None, "ไม่สามารถดึง embedding จาก chunk ID ได้"
-        assert len(embedding) == 384, "ขนาดของ embedding ไม่ถูกต้อง"
+        assert embedding.shape == (384,), "ขนาดของ embedding ไม่ถูกต้อง"
     
-    @pytest.mark.asyncio
     async def test_embedding_pipeline_with_error_handling(self, embedding_service, document_service):
         """ทดสอบกระบวนการ embedding พร้อมการจัดการข้อผิดพลาด"""
         # ทดสอบกับเอกสารที่ไม่มีอยู่จริง
@@ -148,26 +123,24 @@ class TestEmbeddingIntegration:
         assert len(embeddings) == 0, "ควรได้ลิสต์ว่างเมื่อสร้าง embeddings สำหรับลิสต์ chunks ว่าง"
 
 # การรันการทดสอบแบบ standalone (ไม่ผ่าน pytest)
-if __name__ == "__main__":
-    # สร้าง mock event loop
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+async def main():
+    from conftest import MockDocumentService
     
     # สร้าง services
     embedding_service = MockEmbeddingService()
     document_service = MockDocumentService()
     
     # ทดสอบ create_embedding
-    embedding = loop.run_until_complete(embedding_service.create_embedding("ทดสอบ"))
-    print(f"Embedding size: {len(embedding)}")
+    embedding = await embedding_service.create_embedding("ทดสอบ")
+    print(f"Embedding size: {embedding.shape[0]}")
     
     # ทดสอบ get_document_chunks
-    chunks = loop.run_until_complete(document_service.get_document_chunks("doc123"))
+    chunks = await document_service.get_document_chunks("doc123")
     print(f"Number of chunks: {len(chunks)}")
     
     # ทดสอบ create_embeddings_for_document
-    embeddings = loop.run_until_complete(embedding_service.create_embeddings_for_document("doc123", chunks))
+    embeddings = await embedding_service.create_embeddings_for_document("doc123", chunks)
     print(f"Number of embeddings: {len(embeddings)}")
-    
-    # ปิด event loop
-    loop.close()
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(main())
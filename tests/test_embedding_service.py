@@ -0,0 +1,37 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.services.embedding_service import OllamaEmbeddingService
+
+
+# การทดสอบหน่วยสำหรับ OllamaEmbeddingService
+@pytest.mark.unit
+class TestOllamaEmbeddingService:
+
+    def _service(self, embeddings):
+        session = MagicMock()
+        session.post.return_value.json.return_value = {"embeddings": embeddings}
+        service = OllamaEmbeddingService(session=session)
+        service.cache = None
+        return service, session
+
+    def test_batch_is_one_request(self):
+        """ทดสอบว่าการสร้าง embeddings หลายข้อความส่งเป็นคำขอ /api/embed เดียว"""
+        service, session = self._service([[0.1, 0.2], [0.3, 0.4]])
+
+        embeddings = service.create_embeddings(["หมวด 1", "หมวด 2"])
+
+        assert embeddings == [[0.1, 0.2], [0.3, 0.4]]
+        session.post.assert_called_once()
+        url = session.post.call_args.args[0]
+        assert url.endswith("/api/embed")
+        assert session.post.call_args.kwargs["json"]["input"] == ["หมวด 1", "หมวด 2"]
+
+    def test_failed_batch_returns_zero_vectors(self):
+        """ทดสอบว่าเมื่อ Ollama ล้มเหลว ทุกข้อความได้ vector ศูนย์"""
+        service, session = self._service([])
+        session.post.return_value.raise_for_status.side_effect = RuntimeError("Ollama down")
+
+        embeddings = service.create_embeddings(["หมวด 1", "หมวด 2"])
+
+        assert embeddings == [[0.0] * 384, [0.0] * 384]
@@ -0,0 +1,142 @@
+import pytest
+from unittest.mock import patch
+import numpy as np
+
+# graph_rag เชื่อมต่อ Neo4j และ Chroma ตอน import จึง patch client ไว้ก่อน
+with patch("neo4j.GraphDatabase.driver"), patch("chromadb.PersistentClient"):
+    from app.services import graph_rag as graph_rag_module
+
+
+# การทดสอบหน่วยสำหรับฟังก์ชันช่วยของ GraphRAG
+@pytest.mark.unit
+class TestFuseScores:
+    
+    def _inputs(self):
+        vector_scores = np.array([0.9, 0.5, 0.0, 0.2])
+        graph_scores = np.array([0.0, 1.0, 0.7, 0.2])
+        expected = 0.7 * vector_scores + 0.3 * graph_scores
+        return vector_scores, graph_scores, expected
+    
+    def test_fuse_scores_numpy(self):
+        """ทดสอบการรวมคะแนนด้วย NumPy"""
+        vector_scores, graph_scores, expected = self._inputs()
+        out = np.empty(len(vector_scores))
+        
+        graph_rag_module._fuse_scores_np(vector_scores, graph_scores, 0.7, 0.3, out)
+        
+        np.testing.assert_allclose(out, expected)
+    
+    def test_fuse_scores_numba(self):
+        """ทดสอบการรวมคะแนนแบบ compile ด้วย numba (ข้ามถ้าไม่ได้ติดตั้ง numba)"""
+        numba = pytest.importorskip("numba")
+        vector_scores, graph_scores, expected = self._inputs()
+        out = np.empty(len(vector_scores))
+        
+        numba.njit(graph_rag_module._fuse_scores_jit)(vector_scores, graph_scores, 0.7, 0.3, out)
+        
+        np.testing.assert_allclose(out, expected)
+    
+    def test_fuse_scores_selected_implementation(self):
+        """ทดสอบว่า _fuse_scores ที่เลือกไว้ตอน import ทำงานได้"""
+        vector_scores, graph_scores, expected = self._inputs()
+        out = np.empty(len(vector_scores))
+        
+        graph_rag_module._fuse_scores(vector_scores, graph_scores, 0.7, 0.3, out)
+        
+        np.testing.assert_allclose(out, expected)
+
+
+# การทดสอบหน่วยสำหรับแคช embedding ของคำค้นหา
+@pytest.mark.unit
+class TestEmbedCached:
+    
+    def test_failed_embedding_is_not_cached(self):
+        """ทดสอบว่า vector ศูนย์ที่ได้จากการเรียก embedding ล้มเหลวจะไม่ถูกแคช"""
+        graph_rag_module._query_embeddings.clear()
+        vector = [0.1] * 384
+        
+        with patch.object(
+            graph_rag_module.embedding_service, "create_embedding",
+            side_effect=[[0.0] * 384, vector]
+        ) as create_embedding:
+            # ครั้งแรก Ollama ล้มเหลว: ต้อง raise แทนการคืนค่า vector ศูนย์
+            with pytest.raises(RuntimeError):
+                graph_rag_module._embed_cached("การวางแผนยุทธศาสตร์", "test-model")
+            
+            # ครั้งถัดไปต้องเรียก service ใหม่และได้ vector จริง
+            assert graph_rag_module._embed_cached("การวางแผนยุทธศาสตร์", "test-model") == tuple(vector)
+            
+            # ครั้งที่สามต้องมาจากแคช
+            assert graph_rag_module._embed_cached("การวางแผนยุทธศาสตร์", "test-model") == tuple(vector)
+            assert create_embedding.call_count == 2
+        
+        graph_rag_module._query_embeddings.clear()
+    
+    def test_batch_embeds_only_cache_misses(self):
+        """ทดสอบว่า _embed_cached_many ส่งเฉพาะคำค้นหาที่ไม่อยู่ในแคชไปใน batch เดียว และไม่ใช้ vector ศูนย์"""
+        graph_rag_module._query_embeddings.clear()
+        cached = [0.3] * 384
+        fresh = [0.2] * 384
+        
+        with patch.object(graph_rag_module.embedding_service, "create_embedding", return_value=cached):
+            graph_rag_module._embed_cached("หมวด 1", "test-model")
+        
+        with patch.object(
+            graph_rag_module.embedding_service, "create_embeddings",
+            return_value=[fresh, [0.0] * 384]
+        ) as create_embeddings:
+            embeddings = graph_rag_module._embed_cached_many(["หมวด 1", "หมวด 2", "หมวด 3"], "test-model")
+        
+        create_embeddings.assert_called_once_with(["หมวด 2", "หมวด 3"])
+        # หมวด 3 ได้ vector ศูนย์ (Ollama ล้มเหลว) จึงไม่ถูกคืนค่าและไม่ถูกแคช
+        assert embeddings == {"หมวด 1": tuple(cached), "หมวด 2": tuple(fresh)}
+        assert graph_rag_module._query_embeddings.get(("หมวด 3", "test-model")) is None
+        
+        graph_rag_module._query_embeddings.clear()
+
+
+# การทดสอบหน่วยสำหรับการค้นหาแบบ Graph (full-text)
+@pytest.mark.unit
+class TestGraphQuery:
+    
+    def test_escape_lucene_operators(self):
+        """ทดสอบว่าคำสั่ง AND/OR/NOT และอักขระพิเศษถูกแปลงเป็นข้อความธรรมดา"""
+        escaped = graph_rag_module._escape_lucene("ยุทธศาสตร์ AND (แผน OR NOT ผล)")
+        assert escaped == "ยุทธศาสตร์ and \\(แผน or not ผล\\)"
+    
+    def test_empty_query_skips_fulltext_index(self):
+        """ทดสอบว่าคำค้นหาว่างไม่เรียก full-text index"""
+        query, _ = graph_rag_module.graph_rag._build_graph_query("   ")
+        assert "queryNodes" not in query
+        
+        query, params = graph_rag_module.graph_rag._build_graph_query("การนำองค์การ")
+        assert "queryNodes" in query
+        assert params["query"] == "การนำองค์การ"
+    
+    def test_graph_scores_normalized_before_fusion(self):
+        """ทดสอบว่าคะแนน Lucene ถูกปรับให้อยู่ในช่วง 0-1 ก่อนรวมกับคะแนน vector"""
+        def result(chunk_id, score):
+            return {"chunk_id": chunk_id, "score": score, "pmqa_references": []}
+        
+        combined = graph_rag_module.graph_rag._combine_results(
+            [result("a", 0.9)],
+            [result("b", 8.0), result("c", 4.0)],
+            0.5, 0.5, 3
+        )
+        
+        scores = {item["chunk_id"]: item["score"] for item in combined}
+        assert scores == pytest.approx({"a": 0.45, "b": 0.5, "c": 0.25})
+    
+    def test_fulltext_indexes_use_thai_analyzer(self):
+        """ทดสอบว่า full-text index ใช้ thai analyzer เพื่อให้ค้นคำภายในประโยคภาษาไทยที่ไม่เว้นวรรคได้"""
+        from app.db.graph_db import graph_db
+        from app.db.schema import FULLTEXT_INDEXES
+        
+        statements = [statement for statement, _ in FULLTEXT_INDEXES]
+        assert len(statements) == 2
+        for statement in statements:
+            assert "OPTIONS {indexConfig: {`fulltext.analyzer`: 'thai'}}" in statement
+        
+        with patch.object(graph_db, "execute_write_query") as execute_write_query:
+            graph_db.create_fulltext_indexes()
+        assert [call.args[0] for call in execute_write_query.call_args_list] == statements
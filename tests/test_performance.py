@@ -1,16 +1,22 @@
 import pytest
 import time
 import asyncio
-import statistics
 import json
+import numpy as np
+import httpx
 import requests
-from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib serializer
+    orjson = None
 
 # Define test API endpoints (adjust as needed for the actual environment)
 BASE_URL = "http://localhost:8000/api/v1"
 ENDPOINTS = {
     "health": f"{BASE_URL}/health",
     "vector_search": f"{BASE_URL}/search/vector",
+    "vector_search_batch": f"{BASE_URL}/search/vector/batch",
     "graph_search": f"{BASE_URL}/search/graph",
     "hybrid_search": f"{BASE_URL}/search/hybrid",
     "claude_ask": f"{BASE_URL}/claude/ask"
@@ -19,6 +25,7 @@ ENDPOINTS = {
 # Test configurations
 NUM_REQUESTS = 20  # Number of requests per test
 CONCURRENT_USERS = 5  # Number of concurrent users/requests
+WARMUP_REQUESTS = 5  # Requests sent before measuring; their results are discarded
 SEARCH_QUERIES = [
     "การวางแผนยุทธศาสตร์",
     "การบริหารจัดการองค์กร",
@@ -31,26 +38,29 @@ SEARCH_QUERIES = [
 RESPONSE_TIME_THRESHOLDS = {
     "health": 0.5,  # 500ms
     "vector_search": 2.0,  # 2s
+    "vector_search_batch": 4.0,  # 4s (ทุกคำค้นหาในคำขอเดียว)
     "graph_search": 2.0,  # 2s
     "hybrid_search": 3.0,  # 3s
     "claude_ask": 10.0  # 10s
 }
 
 # Helper functions
-def make_request(url, method="GET", json_data=None):
-    """ส่งคำขอไปยัง API และวัดเวลาการตอบสนอง"""
-    start_time = time.time()
+def _dumps(data):
+    """แปลงข้อมูลเป็น JSON bytes (ใช้ orjson ถ้าติดตั้งไว้)"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+async def make_request(client, url, method="GET", content=None):
+    """ส่งคำขอไปยัง API และวัดเวลาการตอบสนอง (content คือ body ที่แปลงเป็น JSON bytes แล้ว)"""
+    start_time = time.perf_counter_ns()
     
     try:
-        if method == "GET":
-            response = requests.get(url, timeout=30)
-        elif method == "POST":
-            response = requests.post(url, json=json_data, timeout=30)
-        else:
+        if method not in ("GET", "POST"):
             raise ValueError(f"Unsupported HTTP method: {method}")
         
-        end_time = time.time()
-        elapsed_time = end_time - start_time
+        response = await client.request(method, url, content=content, timeout=30)
+        elapsed_time = (time.perf_counter_ns() - start_time) / 1e9
         
         return {
             "status_code": response.status_code,
@@ -58,8 +68,7 @@ def make_request(url, method="GET", json_data=None):
             "success": 200 <= response.status_code < 300
         }
     except Exception as e:
-        end_time = time.time()
-        elapsed_time = end_time - start_time
+        elapsed_time = (time.perf_counter_ns() - start_time) / 1e9
         
         return {
             "status_code": 0,
@@ -68,26 +77,54 @@ def make_request(url, method="GET", json_data=None):
             "error": str(e)
         }
 
-def run_concurrent_requests(url, method="GET", json_data=None, num_requests=NUM_REQUESTS, concurrent_users=CONCURRENT_USERS):
-    """รันคำขอพร้อมกันหลายคำขอ"""
-    with ThreadPoolExecutor(max_workers=concurrent_users) as executor:
-        if method == "GET":
-            futures = [executor.submit(make_request, url, method) for _ in range(num_requests)]
-        else:
-            # สำหรับคำขอ POST ที่มีข้อมูล JSON
-            futures = [executor.submit(make_request, url, method, json_data) for _ in range(num_requests)]
-        
-        results = [future.result() for future in futures]
+async def _gather_requests(url, method, payloads, num_requests, concurrent_users, warmup_requests):
+    """ส่งคำขอทั้งหมดผ่าน client เดียว (payload ละ num_requests คำขอ) โดยมีคำขอที่ค้างอยู่พร้อมกันไม่เกิน concurrent_users"""
+    semaphore = asyncio.Semaphore(concurrent_users)
+    limits = httpx.Limits(max_connections=concurrent_users, max_keepalive_connections=concurrent_users)
+    
+    # body ของแต่ละ payload เหมือนกันทุกคำขอ จึงแปลงเป็น JSON ครั้งเดียว
+    contents = [_dumps(payload) if payload is not None else None for payload in payloads]
+    headers = {"Content-Type": "application/json"}
     
-    return results
+    async with httpx.AsyncClient(limits=limits, headers=headers) as client:
+        async def limited_request(content):
+            # จับเวลาหลังได้คิว เพื่อไม่ให้เวลารอคิวฝั่ง client ปนกับเวลาตอบสนองของ server
+            async with semaphore:
+                return await make_request(client, url, method, content)
+        
+        # warm-up: เปิด connection ใน pool และให้ server โหลดโมเดล/แคชก่อน โดยไม่นำผลมาวัด
+        await asyncio.gather(*(
+            limited_request(contents[i % len(contents)]) for i in range(warmup_requests)
+        ))
+        
+        start_time = time.perf_counter_ns()
+        results = await asyncio.gather(*(
+            limited_request(content) for content in contents for _ in range(num_requests)
+        ))
+        return results, (time.perf_counter_ns() - start_time) / 1e9
+
+def run_concurrent_requests(url, method="GET", json_data=None, num_requests=NUM_REQUESTS, concurrent_users=CONCURRENT_USERS, warmup_requests=WARMUP_REQUESTS):
+    """รันคำขอพร้อมกันหลายคำขอ คืนค่าเป็น (ผลลัพธ์, เวลาที่ใช้จริงทั้งหมดเป็นวินาที) โดยไม่นับคำขอ warm-up"""
+    return asyncio.run(
+        _gather_requests(url, method, [json_data], num_requests, concurrent_users, warmup_requests)
+    )
 
-def analyze_results(results, endpoint_name):
-    """วิเคราะห์ผลลัพธ์และสร้างรายงาน"""
-    response_times = [result["response_time"] for result in results if result["success"]]
-    success_count = sum(1 for result in results if result["success"])
+def run_concurrent_queries(url, json_data_list, num_requests=NUM_REQUESTS, concurrent_users=CONCURRENT_USERS, warmup_requests=WARMUP_REQUESTS):
+    """รันคำขอ POST ของทุก payload พร้อมกันในรอบเดียว (payload ละ num_requests คำขอ) คืนค่าเหมือน run_concurrent_requests"""
+    return asyncio.run(
+        _gather_requests(url, "POST", json_data_list, num_requests, concurrent_users, warmup_requests)
+    )
+
+def analyze_results(results, endpoint_name, elapsed_time):
+    """วิเคราะห์ผลลัพธ์และสร้างรายงาน (elapsed_time คือเวลาที่ใช้จริงของการยิงคำขอทั้งหมด)"""
+    response_times = np.fromiter(
+        (result["response_time"] for result in results if result["success"]),
+        dtype=np.float64
+    )
+    success_count = response_times.size
     error_count = len(results) - success_count
     
-    if not response_times:
+    if not success_count:
         return {
             "endpoint": endpoint_name,
             "success_rate": 0,
@@ -103,23 +140,15 @@ def analyze_results(results, endpoint_name):
             "passed": False
         }
     
-    avg_time = statistics.mean(response_times)
-    min_time = min(response_times)
-    max_time = max(response_times)
-    
-    # คำนวณเปอร์เซ็นไทล์
-    sorted_times = sorted(response_times)
-    p90_index = int(0.9 * len(sorted_times))
-    p95_index = int(0.95 * len(sorted_times))
-    p99_index = int(0.99 * len(sorted_times))
+    avg_time = float(response_times.mean())
+    min_time = float(response_times.min())
+    max_time = float(response_times.max())
     
-    p90_time = sorted_times[p90_index] if len(sorted_times) > p90_index else sorted_times[-1]
-    p95_time = sorted_times[p95_index] if len(sorted_times) > p95_index else sorted_times[-1]
-    p99_time = sorted_times[p99_index] if len(sorted_times) > p99_index else sorted_times[-1]
+    # คำนวณเปอร์เซ็นไทล์ (interpolate ระหว่างค่า จึงถูกต้องแม้จำนวนตัวอย่างน้อย)
+    p90_time, p95_time, p99_time = np.percentile(response_times, [90, 95, 99]).tolist()
     
-    # คำนวณ requests per second
-    total_time = sum(response_times)
-    requests_per_second = len(response_times) / total_time if total_time > 0 else 0
+    # คำนวณ requests per second จากเวลาที่ใช้จริง ไม่ใช่ผลรวมเวลาของแต่ละคำขอที่ทำงานซ้อนกัน
+    requests_per_second = success_count / elapsed_time if elapsed_time > 0 else 0
     
     # ตรวจสอบว่าผ่านเกณฑ์หรือไม่
     threshold = RESPONSE_TIME_THRESHOLDS.get(endpoint_name, float("inf"))
@@ -157,8 +186,8 @@ class TestPerformance:
     def test_health_endpoint_performance(self, check_api_availability):
         """ทดสอบประสิทธิภาพของ health endpoint"""
         print(f"\nทดสอบประสิทธิภาพของ health endpoint...")
-        results = run_concurrent_requests(ENDPOINTS["health"])
-        analysis = analyze_results(results, "health")
+        results, elapsed_time = run_concurrent_requests(ENDPOINTS["health"])
+        analysis = analyze_results(results, "health", elapsed_time)
         
         print_performance_report(analysis)
         
@@ -166,86 +195,57 @@ class TestPerformance:
         assert analysis["success_rate"] > 0.95, "อัตราความสำเร็จต่ำกว่า 95%"
         assert analysis["avg_time"] < RESPONSE_TIME_THRESHOLDS["health"], f"เวลาเฉลี่ยเกินกว่า {RESPONSE_TIME_THRESHOLDS['health']} วินาที"
     
-    def test_vector_search_performance(self, check_api_availability):
-        """ทดสอบประสิทธิภาพของ vector search endpoint"""
-        print(f"\nทดสอบประสิทธิภาพของ vector search endpoint...")
+    @pytest.mark.parametrize("endpoint_name", ["vector_search", "graph_search", "hybrid_search"])
+    def test_search_performance(self, endpoint_name, check_api_availability):
+        """ทดสอบประสิทธิภาพของ search endpoint แต่ละแบบ (vector, graph, hybrid)"""
+        print(f"\nทดสอบประสิทธิภาพของ {endpoint_name} endpoint...")
         
-        all_results = []
-        for query in SEARCH_QUERIES:
-            json_data = {"query": query, "limit": 5}
-            results = run_concurrent_requests(
-                ENDPOINTS["vector_search"],
-                method="POST",
-                json_data=json_data
-            )
-            all_results.extend(results)
+        # ยิงทุกคำค้นหาพร้อมกันในรอบเดียว แทนการวนทีละคำค้นหา
+        json_data_list = [{"query": query, "limit": 5} for query in SEARCH_QUERIES]
+        results, elapsed_time = run_concurrent_queries(ENDPOINTS[endpoint_name], json_data_list)
         
-        analysis = analyze_results(all_results, "vector_search")
+        analysis = analyze_results(results, endpoint_name, elapsed_time)
         print_performance_report(analysis)
         
         # ตรวจสอบว่าผ่านเกณฑ์
         assert analysis["success_rate"] > 0.95, "อัตราความสำเร็จต่ำกว่า 95%"
-        assert analysis["avg_time"] < RESPONSE_TIME_THRESHOLDS["vector_search"], f"เวลาเฉลี่ยเกินกว่า {RESPONSE_TIME_THRESHOLDS['vector_search']} วินาที"
+        assert analysis["avg_time"] < RESPONSE_TIME_THRESHOLDS[endpoint_name], f"เวลาเฉลี่ยเกินกว่า {RESPONSE_TIME_THRESHOLDS[endpoint_name]} วินาที"
     
-    def test_graph_search_performance(self, check_api_availability):
-        """ทดสอบประสิทธิภาพของ graph search endpoint"""
-        print(f"\nทดสอบประสิทธิภาพของ graph search endpoint...")
+    def test_vector_search_batch_performance(self, check_api_availability):
+        """ทดสอบประสิทธิภาพของ batch vector search endpoint (ส่งทุกคำค้นหาในคำขอเดียว)"""
+        print(f"\nทดสอบประสิทธิภาพของ batch vector search endpoint...")
         
-        all_results = []
-        for query in SEARCH_QUERIES:
-            json_data = {"query": query, "limit": 5}
-            results = run_concurrent_requests(
-                ENDPOINTS["graph_search"],
-                method="POST",
-                json_data=json_data
-            )
-            all_results.extend(results)
-        
-        analysis = analyze_results(all_results, "graph_search")
-        print_performance_report(analysis)
-        
-        # ตรวจสอบว่าผ่านเกณฑ์
-        assert analysis["success_rate"] > 0.95, "อัตราความสำเร็จต่ำกว่า 95%"
-        assert analysis["avg_time"] < RESPONSE_TIME_THRESHOLDS["graph_search"], f"เวลาเฉลี่ยเกินกว่า {RESPONSE_TIME_THRESHOLDS['graph_search']} วินาที"
-    
-    def test_hybrid_search_performance(self, check_api_availability):
-        """ทดสอบประสิทธิภาพของ hybrid search endpoint"""
-        print(f"\nทดสอบประสิทธิภาพของ hybrid search endpoint...")
-        
-        all_results = []
-        for query in SEARCH_QUERIES:
-            json_data = {"query": query, "limit": 5}
-            results = run_concurrent_requests(
-                ENDPOINTS["hybrid_search"],
-                method="POST",
-                json_data=json_data
-            )
-            all_results.extend(results)
+        json_data = {"queries": SEARCH_QUERIES, "top_k": 5}
+        results, elapsed_time = run_concurrent_requests(
+            ENDPOINTS["vector_search_batch"],
+            method="POST",
+            json_data=json_data
+        )
         
-        analysis = analyze_results(all_results, "hybrid_search")
+        analysis = analyze_results(results, "vector_search_batch", elapsed_time)
         print_performance_report(analysis)
         
         # ตรวจสอบว่าผ่านเกณฑ์
         assert analysis["success_rate"] > 0.95, "อัตราความสำเร็จต่ำกว่า 95%"
-        assert analysis["avg_time"] < RESPONSE_TIME_THRESHOLDS["hybrid_search"], f"เวลาเฉลี่ยเกินกว่า {RESPONSE_TIME_THRESHOLDS['hybrid_search']} วินาที"
+        assert analysis["avg_time"] < RESPONSE_TIME_THRESHOLDS["vector_search_batch"], f"เวลาเฉลี่ยเกินกว่า {RESPONSE_TIME_THRESHOLDS['vector_search_batch']} วินาที"
     
     def test_claude_ask_performance(self, check_api_availability):
         """ทดสอบประสิทธิภาพของ Claude ask endpoint"""
         print(f"\nทดสอบประสิทธิภาพของ Claude ask endpoint...")
         
-        all_results = []
-        for query in SEARCH_QUERIES[:2]:  # ใช้แค่ 2 คำถามเนื่องจาก API นี้อาจใช้เวลานาน
-            json_data = {"question": f"อธิบายเกี่ยวกับ {query} ในบริบทของ PMQA 4.0"}
-            results = run_concurrent_requests(
-                ENDPOINTS["claude_ask"],
-                method="POST",
-                json_data=json_data,
-                num_requests=5,  # ลดจำนวนคำขอลงเพื่อประหยัดเวลา
-                concurrent_users=2  # ลดจำนวนผู้ใช้พร้อมกันลงเพื่อไม่ให้เกิดการโอเวอร์โหลด
-            )
-            all_results.extend(results)
+        json_data_list = [
+            {"question": f"อธิบายเกี่ยวกับ {query} ในบริบทของ PMQA 4.0"}
+            for query in SEARCH_QUERIES[:2]  # ใช้แค่ 2 คำถามเนื่องจาก API นี้อาจใช้เวลานาน
+        ]
+        results, elapsed_time = run_concurrent_queries(
+            ENDPOINTS["claude_ask"],
+            json_data_list,
+            num_requests=5,  # ลดจำนวนคำขอลงเพื่อประหยัดเวลา
+            concurrent_users=2,  # ลดจำนวนผู้ใช้พร้อมกันลงเพื่อไม่ให้เกิดการโอเวอร์โหลด
+            warmup_requests=1  # คำขอ Claude มีค่าใช้จ่าย จึง warm-up เพียงครั้งเดียว
+        )
         
-        analysis = analyze_results(all_results, "claude_ask")
+        analysis = analyze_results(results, "claude_ask", elapsed_time)
         print_performance_report(analysis)
         
         # ตรวจสอบว่าผ่านเกณฑ์ (สำหรับ endpoint นี้ อาจยอมรับอัตราความสำเร็จที่ต่ำกว่าได้)
@@ -286,39 +286,35 @@ if __name__ == "__main__":
     print("เริ่มการทดสอบประสิทธิภาพ...")
     
     # ทดสอบ health endpoint
-    results = run_concurrent_requests(ENDPOINTS["health"])
-    analysis = analyze_results(results, "health")
+    results, elapsed_time = run_concurrent_requests(ENDPOINTS["health"])
+    analysis = analyze_results(results, "health", elapsed_time)
     print_performance_report(analysis)
     
     # ทดสอบ search endpoints
+    json_data_list = [{"query": query, "limit": 5} for query in SEARCH_QUERIES]
     for endpoint_name in ["vector_search", "graph_search", "hybrid_search"]:
-        all_results = []
-        for query in SEARCH_QUERIES:
-            json_data = {"query": query, "limit": 5}
-            results = run_concurrent_requests(
-                ENDPOINTS[endpoint_name],
-                method="POST",
-                json_data=json_data
-            )
-            all_results.extend(results)
-        
-        analysis = analyze_results(all_results, endpoint_name)
+        results, elapsed_time = run_concurrent_queries(ENDPOINTS[endpoint_name], json_data_list)
+        analysis = analyze_results(results, endpoint_name, elapsed_time)
         print_performance_report(analysis)
     
-    # ทดสอบ Claude ask endpoint
-    all_results = []
-    for query in SEARCH_QUERIES[:2]:
-        json_data = {"question": f"อธิบายเกี่ยวกับ {query} ในบริบทของ PMQA 4.0"}
-        results = run_concurrent_requests(
-            ENDPOINTS["claude_ask"],
-            method="POST",
-            json_data=json_data,
-            num_requests=5,
-            concurrent_users=2
-        )
-        all_results.extend(results)
+    # ทดสอบ batch vector search endpoint
+    results, elapsed_time = run_concurrent_requests(
+        ENDPOINTS["vector_search_batch"],
+        method="POST",
+        json_data={"queries": SEARCH_QUERIES, "top_k": 5}
+    )
+    analysis = analyze_results(results, "vector_search_batch", elapsed_time)
+    print_performance_report(analysis)
     
-    analysis = analyze_results(all_results, "claude_ask")
+    # ทดสอบ Claude ask endpoint
+    results, elapsed_time = run_concurrent_queries(
+        ENDPOINTS["claude_ask"],
+        [{"question": f"อธิบายเกี่ยวกับ {query} ในบริบทของ PMQA 4.0"} for query in SEARCH_QUERIES[:2]],
+        num_requests=5,
+        concurrent_users=2,
+        warmup_requests=1
+    )
+    analysis = analyze_results(results, "claude_ask", elapsed_time)
     print_performance_report(analysis)
     
     print("การทดสอบประสิทธิภาพเสร็จสิ้น")
\ No newline at end of file